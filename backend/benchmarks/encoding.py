@@ -0,0 +1,96 @@
+"""
+Response encoding benchmark.
+
+Seeds a throwaway SQLite database, fetches the largest payloads (a full page
+of the admin swap monitor, admin user list, a busy user's swap requests)
+once, then times rendering the same data with DRF's stdlib JSONRenderer and
+with FastJSONRenderer, and reports the bytes saved by gzip and (when the brotli
+package is installed) brotli at the CompressionMiddleware settings.
+
+Usage (from the backend directory):
+
+    python benchmarks/encoding.py                  # 2000 seeded users
+    python benchmarks/encoding.py --users 5000 --iterations 50
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from run import setup_django
+
+def median_ms(render, data, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        render(data)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def payloads(users):
+    """Response data of the endpoints being measured, keyed by route name"""
+    from django.core.management import call_command
+    from django.db.models import Count, Q
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from users.models import User
+    from users.seeding import generate_dataset
+
+    call_command('migrate', verbosity=0)
+    generate_dataset(users=users, seed=42)
+    admin = User.objects.create_user(username='bench_admin', password='password123', role='admin', is_staff=True)
+    busiest = User.objects.annotate(
+        swaps=Count('sent_requests', distinct=True) + Count('received_requests', distinct=True)
+    ).order_by('-swaps').first()
+
+    def client(user):
+        return Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+    routes = {
+        'monitor': (client(admin), '/api/swaps/monitor/?limit=500'),
+        'admin_list': (client(admin), '/api/users/admin_list/'),
+        'my_requests': (client(busiest), '/api/swaps/my_requests/?expand=from_user,to_user'),
+    }
+    data = {}
+    for name, (api, path) in routes.items():
+        response = api.get(path)
+        assert response.status_code == 200, f"{path}: {response.status_code}"
+        data[name] = response.data
+    return data
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000, help='Seeded user count')
+    parser.add_argument('--iterations', type=int, default=20, help='Renders timed per endpoint and renderer')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(str(Path(directory) / 'bench.sqlite3'))
+        from rest_framework.renderers import JSONRenderer
+        from talent_bridge.middleware import CompressionMiddleware, brotli
+        from talent_bridge.renderers import FastJSONRenderer, orjson
+
+        data = payloads(args.users)
+        stdlib, fast = JSONRenderer().render, FastJSONRenderer().render
+        print(f"users {args.users}, orjson {'yes' if orjson else 'no'}, brotli {'yes' if brotli else 'no'}")
+        print(f"{'endpoint':<12} {'bytes':>10} {'json ms':>9} {'fast ms':>9} {'speedup':>8} {'gzip':>10} {'br':>10}")
+        for name, payload in data.items():
+            body = fast(payload)
+            assert body == stdlib(payload), f"{name}: renderers disagree"
+            stdlib_ms = median_ms(stdlib, payload, args.iterations)
+            fast_ms = median_ms(fast, payload, args.iterations)
+            gzipped = len(CompressionMiddleware.compress('gzip', body))
+            brotlied = len(CompressionMiddleware.compress('br', body)) if brotli else None
+            print(
+                f"{name:<12} {len(body):>10} {stdlib_ms:>9.2f} {fast_ms:>9.2f} {stdlib_ms / fast_ms:>7.1f}x "
+                f"{gzipped:>10} {brotlied if brotlied is not None else '-':>10}"
+            )
+            print(f"{'':<12} gzip saves {100 * (1 - gzipped / len(body)):.0f}%" + (
+                f", brotli saves {100 * (1 - brotlied / len(body)):.0f}%" if brotlied else ''
+            ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Ring-swap search benchmark.
+
+Builds a synthetic "can teach" graph in memory (no database): skill
+popularity follows a Zipf distribution, so a few skills are offered and
+wanted by a large share of users, as in real data. Reports the time to build
+the skill index, the time to search every user without a direct partner,
+the rings found and peak RSS.
+
+Usage (from the backend directory):
+
+    python benchmarks/rings.py                                # 100k users, 1M skill rows
+    python benchmarks/rings.py --users 10000 --skills-per-user 10 --max-length 3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from run import BACKEND_DIR, peak_rss_mb
+
+def setup_django():
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'talent_bridge.settings')
+    import django
+    django.setup()
+
+def synthetic_skills(users, skills, per_user, exponent, seed):
+    """``offers`` and ``wants`` dicts with ``per_user`` rows per user split evenly"""
+    rng = random.Random(seed)
+    cum_weights, total = [], 0.0
+    for rank in range(1, skills + 1):
+        total += 1 / rank ** exponent
+        cum_weights.append(total)
+    offers, wants = {}, {}
+    for user in range(1, users + 1):
+        picked = set()
+        while len(picked) < per_user:
+            picked.update(rng.choices(range(skills), cum_weights=cum_weights, k=per_user - len(picked)))
+        picked = list(picked)
+        rng.shuffle(picked)
+        offers[user] = tuple(sorted(picked[:per_user // 2]))
+        wants[user] = tuple(sorted(picked[per_user // 2:]))
+    return offers, wants
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--skills', type=int, default=5_000, help='Distinct skills')
+    parser.add_argument('--skills-per-user', type=int, default=10, help='Offered plus wanted rows per user')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Skill popularity exponent')
+    parser.add_argument('--max-length', type=int, default=4, choices=[3, 4])
+    parser.add_argument('--branching', type=int, help='Candidates kept per skill (default from settings)')
+    parser.add_argument('--all-users', action='store_true',
+                        help='Search from every user, not only those without a direct partner (worst case)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    setup_django()
+    from swaps.rings import CanTeachGraph, find_rings
+
+    started = time.monotonic()
+    offers, wants = synthetic_skills(args.users, args.skills, args.skills_per_user, args.zipf, args.seed)
+    generated = time.monotonic()
+    users = list(offers)
+    graph = CanTeachGraph(users, offers, wants, args.branching)
+    indexed = time.monotonic()
+    rings = find_rings(graph, users, args.max_length, only_unpaired=not args.all_users)
+    searched = time.monotonic()
+
+    without_partner = sum(1 for user in users if not graph.has_direct_partner(user))
+    covered = {user for ring in rings.values() for user, _ in ring}
+    sizes = Counter(len(ring) for ring in rings.values())
+    print(f"users {args.users}, skill rows {args.users * args.skills_per_user}, skills {args.skills}")
+    print(f"generate {generated - started:.2f}s, index {indexed - generated:.2f}s, search {searched - indexed:.2f}s")
+    print(f"users without a direct partner {without_partner}, in a ring {len(covered)}")
+    print(f"rings {len(rings)} " + ' '.join(f"(size {size}: {count})" for size, count in sorted(sizes.items())))
+    print(f"peak RSS {peak_rss_mb()} MB")
+
+if __name__ == '__main__':
+    main()
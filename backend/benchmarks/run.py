@@ -0,0 +1,264 @@
+"""
+Endpoint latency benchmarks.
+
+Seeds a throwaway SQLite database per dataset size with users/seeding.py,
+drives the main API flows in-process through Django's test client and
+records p50/p95/p99 latency, queries per request and peak RSS per route.
+Results can be compared against a committed baseline to flag regressions.
+
+Usage (from the backend directory):
+
+    python benchmarks/run.py                              # run and compare with baseline.json
+    python benchmarks/run.py --sizes 500 --iterations 10
+    python benchmarks/run.py --output benchmarks/baseline.json --no-compare
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+UNLIMITED = '1000000/s'
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+def peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def setup_django(database):
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'talent_bridge.settings')
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = database
+    settings.LOGGING['handlers']['file']['filename'] = os.devnull
+    for handler in settings.LOGGING['handlers'].values():
+        handler['level'] = 'ERROR'
+    # A few clients replay every flow far faster than real traffic; the check
+    # still runs on each request, but against buckets they cannot drain
+    settings.RATE_LIMITS = {**settings.RATE_LIMITS, 'DEFAULT': {'user': UNLIMITED, 'ip': UNLIMITED}, 'SCOPES': {}}
+    import django
+    django.setup()
+
+def expect(response, status):
+    """Return the response, failing the run if a flow got an unexpected status"""
+    if response.status_code != status:
+        raise AssertionError(
+            f"{response.request['REQUEST_METHOD']} {response.request['PATH_INFO']} returned "
+            f"{response.status_code}, expected {status}: {response.content[:200]!r}"
+        )
+    return response
+
+class Flows:
+    """The API flows being measured; each route returns a callable run once per sample"""
+    
+    def __init__(self, size):
+        from django.core.management import call_command
+        from django.test import Client
+        from rest_framework_simplejwt.tokens import RefreshToken
+        from users.models import User
+        from users.seeding import generate_dataset
+        
+        call_command('migrate', verbosity=0)
+        generate_dataset(users=size, seed=42)
+        
+        self.users = list(User.objects.filter(username__startswith='seed').order_by('id')[:200])
+        admin = User.objects.create_user(username='bench_admin', password='password123', role='admin')
+        self.clients = {}
+        for user in self.users + [admin]:
+            token = RefreshToken.for_user(user).access_token
+            self.clients[user.id] = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.admin = self.clients[admin.id]
+        self.anonymous = Client()
+        self.counter = 0
+    
+    def next_pair(self):
+        self.counter += 1
+        first = self.users[self.counter % len(self.users)]
+        second = self.users[(self.counter * 7 + 1) % len(self.users)]
+        if first.id == second.id:
+            second = self.users[(self.counter + 1) % len(self.users)]
+        return first, second
+    
+    def routes(self):
+        return {
+            'register': self.register,
+            'login': self.login,
+            'users-list': lambda: expect(self.client().get('/api/users/'), 200),
+            'users-search': lambda: expect(self.client().get('/api/users/search/', {'q': 'Pune'}), 200),
+            'swap-create-accept-complete': self.swap_lifecycle,
+            'rating-create': self.rating_create,
+            'notifications-feed': lambda: expect(self.client().get('/api/notifications/'), 200),
+            'admin-dashboard': lambda: expect(self.admin.get('/api/users/admin_dashboard/'), 200),
+        }
+    
+    def client(self):
+        self.counter += 1
+        return self.clients[self.users[self.counter % len(self.users)].id]
+    
+    def register(self):
+        self.counter += 1
+        return expect(self.anonymous.post('/api/auth/register/', {
+            'username': f'bench{self.counter}', 'email': f'bench{self.counter}@example.com',
+            'password': 'Bench-pass-123', 'password2': 'Bench-pass-123',
+            'first_name': 'Bench', 'last_name': 'User', 'location': 'Pune',
+            'skills_offered': ['Python'], 'skills_wanted': ['Go'],
+        }, content_type='application/json'), 201)
+    
+    def login(self):
+        user = self.users[self.counter % len(self.users)]
+        self.counter += 1
+        return expect(self.anonymous.post('/api/auth/login/', {
+            'username': user.username, 'password': 'password123'
+        }, content_type='application/json'), 200)
+    
+    def create_completed_swap(self):
+        first, second = self.next_pair()
+        response = expect(self.clients[first.id].post('/api/swaps/', {
+            'to_user_id': second.id, 'skill_offered_name': 'Python',
+            'skill_wanted_name': 'Go', 'message': 'Benchmark swap',
+        }, content_type='application/json'), 201)
+        swap_id = response.json()['id']
+        expect(self.clients[second.id].post(f'/api/swaps/{swap_id}/accept/'), 200)
+        expect(self.clients[first.id].post(f'/api/swaps/{swap_id}/complete/'), 200)
+        return first, swap_id
+    
+    def swap_lifecycle(self):
+        return self.create_completed_swap()
+    
+    def rating_create(self):
+        # Setup runs outside the measured window via the prepare hook
+        first, swap_id = self.prepared
+        return expect(self.clients[first.id].post('/api/ratings/', {
+            'swap_request_id': swap_id, 'score': 5
+        }, content_type='application/json'), 201)
+    
+    def prepare(self, route):
+        if route == 'rating-create':
+            self.prepared = self.create_completed_swap()
+
+def run_size(size, iterations, database):
+    """Benchmark every route against a freshly seeded database"""
+    setup_django(database)
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+    
+    flows = Flows(size)
+    results = {}
+    for route, request in flows.routes().items():
+        latencies, queries = [], []
+        for _ in range(iterations):
+            flows.prepare(route)
+            # The query log is a bounded deque; a full log would count as zero queries
+            reset_queries()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                request()
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+        results[route] = {
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'queries': max(queries),
+            'peak_rss_mb': peak_rss_mb(),
+            'samples': iterations,
+        }
+    return results
+
+def compare(results, baseline, latency_threshold):
+    """Return regression messages for routes slower or chattier than the baseline"""
+    regressions = []
+    for size, routes in results.items():
+        for route, current in routes.items():
+            previous = baseline.get('results', {}).get(size, {}).get(route)
+            if not previous:
+                continue
+            if current['queries'] > previous['queries']:
+                regressions.append(
+                    f"{route} @ {size} users: {current['queries']} queries (baseline {previous['queries']})"
+                )
+            # The median is compared because tail percentiles of a few samples are mostly noise
+            if current['p50_ms'] > previous['p50_ms'] * latency_threshold:
+                regressions.append(
+                    f"{route} @ {size} users: p50 {current['p50_ms']}ms (baseline {previous['p50_ms']}ms)"
+                )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='500,5000', help='Comma-separated seeded user counts')
+    parser.add_argument('--iterations', type=int, default=20, help='Samples per route')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--baseline', default=str(BASELINE), help='Baseline JSON to compare with')
+    parser.add_argument('--no-compare', action='store_true', help='Skip the baseline comparison')
+    parser.add_argument('--latency-threshold', type=float, default=1.5,
+                        help='Flag routes whose p50 exceeds the baseline by this factor')
+    parser.add_argument('--child-size', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child_size:
+        with tempfile.TemporaryDirectory() as directory:
+            results = run_size(args.child_size, args.iterations, str(Path(directory) / 'bench.sqlite3'))
+        print(json.dumps(results))
+        return 0
+    
+    # Each size runs in its own process so peak RSS is measured per dataset
+    results = {}
+    for size in [int(value) for value in args.sizes.split(',')]:
+        print(f"Benchmarking {size} users...", file=sys.stderr)
+        child = subprocess.run(
+            [sys.executable, __file__, '--child-size', str(size), '--iterations', str(args.iterations)],
+            capture_output=True, text=True, cwd=BACKEND_DIR
+        )
+        if child.returncode:
+            print(child.stderr, file=sys.stderr)
+            return child.returncode
+        results[str(size)] = json.loads(child.stdout.strip().splitlines()[-1])
+    
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+        },
+        'results': results,
+    }
+    for size, routes in results.items():
+        print(f"\n{size} users")
+        print(f"{'route':32} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'rss MB':>8}")
+        for route, row in routes.items():
+            print(f"{route:32} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} "
+                  f"{row['queries']:>8} {row['peak_rss_mb']:>8}")
+    
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + '\n')
+    
+    if not args.no_compare and Path(args.baseline).exists():
+        baseline = json.loads(Path(args.baseline).read_text())
+        # Earlier routes add rows that later routes read, so counts depend on the iteration count
+        if baseline['meta']['iterations'] != args.iterations:
+            print(f"\nBaseline was recorded with {baseline['meta']['iterations']} iterations; comparison skipped")
+            return 0
+        regressions = compare(results, baseline, args.latency_threshold)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions against baseline")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Rate-limit check benchmark.
+
+Times TokenBucketThrottle.allow_request on its own (a user bucket and an IP
+bucket per check; a quarter of the clients are anonymous and only have the
+IP bucket) for buckets that are idle, busy and empty, against the local-memory cache or, with --redis, a Redis
+server. Reports the median and p99 cost per check; the budget is 100µs.
+
+Usage (from the backend directory):
+
+    python benchmarks/throttle.py
+    python benchmarks/throttle.py --checks 200000 --clients 1000
+    python benchmarks/throttle.py --redis redis://localhost:6379/0
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from run import percentile, setup_django
+
+BUDGET_US = 100
+
+def time_checks(check, requests, checks):
+    samples = []
+    for i in range(checks):
+        request = requests[i % len(requests)]
+        started = time.perf_counter()
+        check(request)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checks', type=int, default=100000, help='Checks timed per scenario')
+    parser.add_argument('--clients', type=int, default=500, help='Distinct users/IPs the checks rotate through')
+    parser.add_argument('--redis', help='Redis URL to use instead of the local-memory cache')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(str(Path(directory) / 'bench.sqlite3'))
+        from django.conf import settings
+        from django.contrib.auth.models import AnonymousUser
+        from django.core.cache import caches
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+        from talent_bridge.throttling import TokenBucketThrottle
+        from users.models import User
+        from users.views import UserViewSet
+
+        if args.redis:
+            settings.CACHES['throttle'] = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': args.redis}
+        else:
+            # Room for every bucket; the default 300 entries would evict them
+            settings.CACHES['throttle'] = {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttle-bench',
+                'OPTIONS': {'MAX_ENTRIES': args.clients * 4},
+            }
+        caches['throttle'].clear()
+
+        factory = APIRequestFactory()
+        requests = []
+        for i in range(args.clients):
+            request = Request(factory.get('/api/users/search/', REMOTE_ADDR=f"10.0.{i // 250}.{i % 250}"))
+            request.user = User(pk=i + 1, username=f'bench{i}') if i % 4 else AnonymousUser()
+            requests.append(request)
+        view = UserViewSet(basename='user', action='search')
+
+        scenarios = {
+            # Refilled between a client's requests, so every check resets the bucket
+            'idle': {'user': '1000000/min', 'ip': '1000000/min'},
+            # Drained faster than it refills but never empty
+            'busy': {'user': '1000000/day', 'ip': '1000000/day'},
+            # Empty; the token is drawn and given back
+            'refused': {'user': '1/day', 'ip': '1/day'},
+        }
+        print(f"cache {'redis' if args.redis else 'locmem'}, {args.clients} clients, {args.checks} checks per scenario")
+        print(f"{'scenario':<10} {'p50 µs':>8} {'p99 µs':>8} {'max µs':>9}")
+        for name, rates in scenarios.items():
+            settings.RATE_LIMITS = {'CACHE': 'throttle', 'DEFAULT': rates, 'SCOPES': {}}
+            check = lambda request: TokenBucketThrottle().allow_request(request, view)
+            # Create the buckets first so only steady-state checks are timed
+            for request in requests:
+                check(request)
+            samples = time_checks(check, requests, args.checks)
+            p50, p99 = percentile(samples, 50), percentile(samples, 99)
+            verdict = 'ok' if p99 < BUDGET_US else f'over the {BUDGET_US}µs budget'
+            print(f"{name:<10} {p50:>8.1f} {p99:>8.1f} {max(samples):>9.1f}  {verdict}")
+
+if __name__ == '__main__':
+    main()
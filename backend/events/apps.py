@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class EventsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'events'
+
+    def ready(self):
+        # Register the @consumer functions declared in each app's consumers.py
+        autodiscover_modules('consumers')
@@ -0,0 +1,215 @@
+"""
+Domain event log (transactional outbox).
+
+Changes to users, swaps, ratings and badges append an Event in the same
+transaction that makes them, so the log holds exactly the changes that
+committed. Side effects such as notifications, counters and badges are
+derived from the log by consumers: each one reads the events after its
+ConsumerCursor, handles them as a batch and moves the cursor in the same
+transaction, so a batch is applied exactly once or retried whole.
+A consumer with a ``reset`` function can be replayed from the start of the
+log to rebuild what it derives.
+
+Ids are taken when an event is inserted, not when it commits, so a lower
+id can become visible after a higher one. The cursor keeps the ids it
+skipped as gaps and hands those events out once they commit. A gap still
+empty after EVENT_LOG['GAP_SECONDS'] is taken to be a rolled-back insert
+and dropped, so exactly once holds for transactions that commit within
+that long of a later event being consumed. SQLite serializes writers and
+never leaves gaps.
+
+Events whose side effects were written directly, such as a seeded
+dataset, are marked handled with ``mark_handled``: their ids are kept on
+each cursor as settled ranges that consumers read past.
+
+The admin feed (``read``) has no cursor row to keep gaps in: it holds back
+events younger than EVENT_LOG['SETTLE_SECONDS'] instead, which only covers
+transactions that commit within that window.
+"""
+from collections import namedtuple
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import ConsumerCursor, Event
+
+_registry = {}
+
+DEFAULTS = {
+    'BATCH_SIZE': 500,
+    'SETTLE_SECONDS': 1,
+    'GAP_SECONDS': 60,
+}
+
+Consumer = namedtuple('Consumer', ['name', 'handler', 'types', 'reset'])
+
+def get_setting(name):
+    return getattr(settings, 'EVENT_LOG', {}).get(name, DEFAULTS[name])
+
+def build(event_type, object_id, actor_id=None, **payload):
+    """An unsaved event, for record_many"""
+    return Event(type=event_type, object_id=object_id, actor_id=actor_id, payload=payload)
+
+def record(event_type, object_id, actor_id=None, **payload):
+    """
+    Append one event. Call it inside the transaction that makes the change
+    so both commit or roll back together. Payload values must be JSON
+    serializable; pass ids rather than model instances.
+    """
+    event = build(event_type, object_id, actor_id, **payload)
+    event.save()
+    return event
+
+def record_many(events):
+    """Append unsaved events (see build) with batched inserts"""
+    return Event.objects.bulk_create(events, batch_size=get_setting('BATCH_SIZE'))
+
+def consumer(name, types=None, reset=None):
+    """
+    Register a function as an event consumer under ``name``.
+
+    It is called with lists of events in id order, only those of ``types``
+    if given. An event whose transaction committed late comes in a later
+    batch than higher ids. ``reset`` undoes everything the consumer derived, which makes
+    it replayable.
+    """
+    def decorator(func):
+        if name in _registry and _registry[name].handler is not func:
+            raise ValueError(f"Consumer '{name}' is already registered")
+        _registry[name] = Consumer(name, func, list(types) if types else None, reset)
+        return func
+    return decorator
+
+def get_consumer(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"Unknown consumer '{name}'")
+
+def consumer_names():
+    return sorted(_registry)
+
+def read(after_id, types=None, limit=None, now=None):
+    """
+    Up to ``limit`` events after ``after_id`` in log order, ending at the
+    last settled one. Best effort: an event whose transaction stays open
+    past SETTLE_SECONDS can be skipped (see the module docstring).
+    """
+    events = Event.objects.filter(id__gt=after_id)
+    if types:
+        events = events.filter(type__in=types)
+    events = list(events.order_by('id')[:limit or get_setting('BATCH_SIZE')])
+    cutoff = (now or timezone.now()) - timedelta(seconds=get_setting('SETTLE_SECONDS'))
+    while events and events[-1].created_at >= cutoff:
+        events.pop()
+    return events
+
+def merge_ranges(ranges):
+    """[first_id, last_id] ranges merged into sorted, disjoint runs"""
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return merged
+
+def without(ranges, removed):
+    """[first_id, last_id, ...] ranges with the ids of the ``removed`` ranges taken out"""
+    for removed_first, removed_last in removed:
+        kept = []
+        for first, last, *rest in ranges:
+            if last < removed_first or first > removed_last:
+                kept.append([first, last, *rest])
+                continue
+            if first < removed_first:
+                kept.append([first, removed_first - 1, *rest])
+            if last > removed_last:
+                kept.append([removed_last + 1, last, *rest])
+        ranges = kept
+    return ranges
+
+def open_gaps(cursor, now):
+    """The cursor's gaps as [first_id, last_id, seen_at] that are still waited for"""
+    horizon = now.timestamp() - get_setting('GAP_SECONDS')
+    return without([gap for gap in cursor.gaps if gap[2] > horizon], cursor.settled)
+
+def track_gaps(gaps, last_id, ids, seen_at):
+    """
+    ``gaps`` without the ``ids`` that turned up in them, plus the ids
+    skipped between ``last_id`` and the new ids
+    """
+    remaining = []
+    for first, last, since in gaps:
+        for pk in [pk for pk in ids if first <= pk <= last]:
+            if pk > first:
+                remaining.append([first, pk - 1, since])
+            first = pk + 1
+        if first <= last:
+            remaining.append([first, last, since])
+    previous = last_id
+    for pk in [pk for pk in ids if pk > last_id]:
+        if pk > previous + 1:
+            remaining.append([previous + 1, pk - 1, seen_at])
+        previous = pk
+    return remaining
+
+def consume(name, limit=None, now=None):
+    """
+    Hand the next batch of events to a consumer; returns the number read
+    past, including those of types it does not take
+    """
+    consumer = get_consumer(name)
+    now = now or timezone.now()
+    with transaction.atomic():
+        cursor, _ = ConsumerCursor.objects.select_for_update().get_or_create(consumer=name)
+        gaps = open_gaps(cursor, now)
+        # Gaps are found from the ids of every type; only wanted rows are loaded
+        window = Q(id__gt=cursor.last_id)
+        for first, last, _ in gaps:
+            window |= Q(id__range=(first, last))
+        scanned = Event.objects.filter(window)
+        for first, last in cursor.settled:
+            scanned = scanned.exclude(id__range=(first, last))
+        scanned = list(scanned.order_by('id').values_list('id', 'type')[:limit or get_setting('BATCH_SIZE')])
+        ids = [pk for pk, _ in scanned]
+        wanted = [pk for pk, event_type in scanned if not consumer.types or event_type in consumer.types]
+        events = list(Event.objects.filter(id__in=wanted).order_by('id')) if wanted else []
+        if events:
+            consumer.handler(events)
+        last_id = max([cursor.last_id, *ids])
+        updated_gaps = without(track_gaps(gaps, cursor.last_id, ids, now.timestamp()), cursor.settled)
+        settled = [settled for settled in cursor.settled if settled[1] > last_id]
+        if not ids and updated_gaps == cursor.gaps and settled == cursor.settled:
+            return 0
+        cursor.last_id = last_id
+        cursor.gaps = updated_gaps
+        cursor.settled = settled
+        cursor.save(update_fields=['last_id', 'gaps', 'settled', 'updated_at'])
+    return len(ids)
+
+def replay(name):
+    """Undo what a consumer derived and rewind it to the start of the log"""
+    consumer = get_consumer(name)
+    if consumer.reset is None:
+        raise ValueError(f"Consumer '{name}' has no reset and cannot be replayed")
+    with transaction.atomic():
+        cursor, _ = ConsumerCursor.objects.select_for_update().get_or_create(consumer=name)
+        consumer.reset()
+        cursor.last_id = 0
+        cursor.gaps = []
+        cursor.settled = []
+        cursor.save(update_fields=['last_id', 'gaps', 'settled', 'updated_at'])
+
+def mark_handled(events, names=None):
+    """
+    Have consumers (all by default) read past saved ``events`` without
+    handling them, for rows whose side effects were written directly.
+    Events logged before or between them are still handed out.
+    """
+    ranges = merge_ranges([event.pk, event.pk] for event in events)
+    for name in names or consumer_names():
+        cursor, _ = ConsumerCursor.objects.select_for_update().get_or_create(consumer=name)
+        cursor.settled = merge_ranges(cursor.settled + ranges)
+        cursor.save(update_fields=['settled', 'updated_at'])
@@ -0,0 +1,53 @@
+import logging
+import time
+from django.core.management.base import BaseCommand, CommandError
+from events.log import consume, consumer_names, replay
+
+logger = logging.getLogger('events')
+
+class Command(BaseCommand):
+    help = 'Feed new domain events to the registered consumers (notifications, counters and badges)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('consumers', nargs='*', help='Consumers to run (default: all)')
+        parser.add_argument('--replay', action='store_true',
+                            help='Reset the named consumers and rebuild them from the start of the log')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when idle')
+        parser.add_argument('--batch-size', type=int, default=None, help='Events handed to a consumer at once')
+        parser.add_argument('--once', action='store_true', help='Exit once every consumer has caught up')
+
+    def handle(self, *args, **options):
+        names = options['consumers'] or consumer_names()
+        unknown = set(names) - set(consumer_names())
+        if unknown:
+            raise CommandError(f"Unknown consumer: {', '.join(sorted(unknown))}")
+
+        if options['replay']:
+            if not options['consumers']:
+                raise CommandError("Name the consumers to replay")
+            for name in names:
+                try:
+                    replay(name)
+                except ValueError as e:
+                    raise CommandError(str(e))
+                self.stdout.write(f"Rewound {name}")
+
+        handled = dict.fromkeys(names, 0)
+        while True:
+            busy = False
+            for name in names:
+                try:
+                    count = consume(name, limit=options['batch_size'])
+                except Exception as e:
+                    # The batch was rolled back; it is retried on the next poll
+                    logger.error(f"Event consumer {name} failed: {e}", exc_info=True)
+                    continue
+                handled[name] += count
+                busy = busy or bool(count)
+            if options['once'] and not busy:
+                break
+            if not busy:
+                time.sleep(options['poll_interval'])
+
+        for name, count in handled.items():
+            self.stdout.write(f"{name}: {count} events")
@@ -0,0 +1,115 @@
+# Generated by Django 4.2 on 2026-10-19 10:43
+
+import heapq
+from itertools import islice
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, Max, Window
+from django.db.models.functions import Lag
+
+# Consumers whose side effects already exist for the history logged here
+CAUGHT_UP = ['notifications', 'users.counters']
+CHUNK_SIZE = 2000
+
+
+def log_history(apps, schema_editor):
+    """Existing registrations, swap status changes, ratings and badges, oldest first"""
+    User = apps.get_model('users', 'User')
+    SwapStatusChange = apps.get_model('swaps', 'SwapStatusChange')
+    Rating = apps.get_model('ratings', 'Rating')
+    UserBadge = apps.get_model('users', 'UserBadge')
+    Event = apps.get_model('events', 'Event')
+    ConsumerCursor = apps.get_model('events', 'ConsumerCursor')
+
+    def registrations():
+        users = User.objects.order_by('joined_at', 'id').values_list('id', 'joined_at')
+        for pk, joined_at in users.iterator(chunk_size=CHUNK_SIZE):
+            yield Event(type='user.registered', object_id=pk, actor_id=pk, created_at=joined_at)
+
+    def swap_changes():
+        # The swap's status before each change, so a change reads as created or status_changed
+        changes = SwapStatusChange.objects.annotate(previous_status=Window(
+            Lag('status'), partition_by=[F('swap_request_id')], order_by=[F('created_at').asc(), F('id').asc()]
+        )).order_by('created_at', 'id').values_list(
+            'swap_request_id', 'status', 'previous_status', 'created_at',
+            'swap_request__from_user_id', 'swap_request__to_user_id'
+        )
+        for swap_id, status, previous_status, created_at, from_user_id, to_user_id in changes.iterator(chunk_size=CHUNK_SIZE):
+            users = {'from_user_id': from_user_id, 'to_user_id': to_user_id}
+            if previous_status is not None:
+                yield Event(
+                    type='swap.status_changed', object_id=swap_id, created_at=created_at,
+                    payload={'status': status, 'previous_status': previous_status, **users}
+                )
+            else:
+                yield Event(
+                    type='swap.created', object_id=swap_id, actor_id=from_user_id, created_at=created_at,
+                    payload={'status': status, **users}
+                )
+
+    def ratings():
+        rows = Rating.objects.order_by('created_at', 'id').values_list(
+            'id', 'from_user_id', 'to_user_id', 'swap_request_id', 'score', 'created_at'
+        )
+        for pk, from_user_id, to_user_id, swap_id, score, created_at in rows.iterator(chunk_size=CHUNK_SIZE):
+            yield Event(
+                type='rating.created', object_id=pk, actor_id=from_user_id, created_at=created_at,
+                payload={'from_user_id': from_user_id, 'to_user_id': to_user_id, 'swap_request_id': swap_id, 'score': score}
+            )
+
+    def badges():
+        rows = UserBadge.objects.order_by('awarded_at', 'id').values_list('user_id', 'badge_id', 'badge__name', 'awarded_at')
+        for user_id, badge_id, name, awarded_at in rows.iterator(chunk_size=CHUNK_SIZE):
+            yield Event(
+                type='badge.awarded', object_id=user_id, created_at=awarded_at,
+                payload={'badge_id': badge_id, 'badge': name}
+            )
+
+    # Each source is read in date order, so merging them streams the history oldest first
+    history = heapq.merge(registrations(), swap_changes(), ratings(), badges(), key=lambda event: event.created_at)
+    while True:
+        chunk = list(islice(history, CHUNK_SIZE))
+        if not chunk:
+            break
+        Event.objects.bulk_create(chunk)
+    last_id = Event.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+    ConsumerCursor.objects.bulk_create([ConsumerCursor(consumer=name, last_id=last_id) for name in CAUGHT_UP])
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('ratings', '0002_initial'),
+        ('swaps', '0005_swap_status_changes'),
+        ('users', '0005_user_geolocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumerCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consumer', models.CharField(max_length=100, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('user.registered', 'User Registered'), ('user.activated', 'User Activated'), ('user.deactivated', 'User Deactivated'), ('user.visibility_changed', 'User Visibility Changed'), ('swap.created', 'Swap Created'), ('swap.status_changed', 'Swap Status Changed'), ('rating.created', 'Rating Created'), ('badge.awarded', 'Badge Awarded')], max_length=40)),
+                ('object_id', models.BigIntegerField(help_text='Id of the user, swap request or rating the event is about')),
+                ('actor_id', models.BigIntegerField(blank=True, help_text='User who caused the change', null=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['type', 'id'], name='event_type_id_idx')],
+            },
+        ),
+        migrations.RunPython(log_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_consumer_cursor_gaps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consumercursor',
+            name='settled',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+class Event(models.Model):
+    """
+    An append-only record of a domain state change, written in the same
+    transaction as the change itself
+    """
+    # Type choices
+    class Type(models.TextChoices):
+        USER_REGISTERED = 'user.registered', _('User Registered')
+        USER_ACTIVATED = 'user.activated', _('User Activated')
+        USER_DEACTIVATED = 'user.deactivated', _('User Deactivated')
+        USER_VISIBILITY_CHANGED = 'user.visibility_changed', _('User Visibility Changed')
+        SWAP_CREATED = 'swap.created', _('Swap Created')
+        SWAP_STATUS_CHANGED = 'swap.status_changed', _('Swap Status Changed')
+        RATING_CREATED = 'rating.created', _('Rating Created')
+        BADGE_AWARDED = 'badge.awarded', _('Badge Awarded')
+    
+    type = models.CharField(max_length=40, choices=Type.choices)
+    # Plain ids rather than foreign keys: the log outlives the rows it describes
+    object_id = models.BigIntegerField(help_text=_('Id of the user, swap request or rating the event is about'))
+    actor_id = models.BigIntegerField(null=True, blank=True, help_text=_('User who caused the change'))
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['type', 'id'], name='event_type_id_idx'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.id} {self.type} {self.object_id}"
+
+class ConsumerCursor(models.Model):
+    """Id of the last event a consumer has processed"""
+    consumer = models.CharField(max_length=100, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    # [first_id, last_id, seen_at] ranges below last_id not yet committed when it was read
+    gaps = models.JSONField(default=list, blank=True)
+    # [first_id, last_id] ranges of events marked handled without being handed out
+    settled = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.consumer} @ {self.last_id}"
@@ -0,0 +1,143 @@
+import datetime
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from swaps.models import SwapRequest
+from users.models import User
+from .log import consume, consumer, mark_handled, record, replay
+from .models import ConsumerCursor, Event
+
+handled = []
+
+@consumer('events.tests', types=[Event.Type.SWAP_CREATED, Event.Type.RATING_CREATED])
+def remember(events):
+    handled.extend(event.id for event in events)
+
+@consumer('events.tests.failing')
+def fail(events):
+    raise RuntimeError("handler failed")
+
+@override_settings(EVENT_LOG={'BATCH_SIZE': 500, 'SETTLE_SECONDS': 1, 'GAP_SECONDS': 60})
+class ConsumeTests(TestCase):
+    def setUp(self):
+        handled.clear()
+
+    def cursor(self):
+        return ConsumerCursor.objects.get(consumer='events.tests')
+
+    def test_record_rolls_back_with_its_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                record(Event.Type.SWAP_CREATED, 1, actor_id=1)
+                raise RuntimeError("change failed")
+
+        self.assertFalse(Event.objects.exists())
+        self.assertEqual(consume('events.tests'), 0)
+        self.assertEqual(handled, [])
+
+    def test_consume_advances_the_cursor(self):
+        created = record(Event.Type.SWAP_CREATED, 1, actor_id=1)
+        record(Event.Type.USER_REGISTERED, 2, actor_id=2)
+        rated = record(Event.Type.RATING_CREATED, 3, actor_id=1)
+
+        # Events of other types are read past but not handed over
+        self.assertEqual(consume('events.tests'), 3)
+        self.assertEqual(handled, [created.id, rated.id])
+        self.assertEqual(self.cursor().last_id, rated.id)
+
+        self.assertEqual(consume('events.tests'), 0)
+        later = record(Event.Type.SWAP_CREATED, 4, actor_id=1)
+        self.assertEqual(consume('events.tests'), 1)
+        self.assertEqual(handled, [created.id, rated.id, later.id])
+
+    def test_batches_stop_at_the_limit(self):
+        events = [record(Event.Type.SWAP_CREATED, pk, actor_id=1) for pk in range(3)]
+        self.assertEqual(consume('events.tests', limit=2), 2)
+        self.assertEqual(self.cursor().last_id, events[1].id)
+        self.assertEqual(consume('events.tests', limit=2), 1)
+        self.assertEqual(handled, [event.id for event in events])
+
+    def test_late_commits_are_picked_up_from_gaps(self):
+        first = record(Event.Type.SWAP_CREATED, 1, actor_id=1)
+        # The id in between belongs to a transaction that has not committed yet
+        third = Event.objects.create(id=first.id + 2, type=Event.Type.SWAP_CREATED, object_id=3)
+        now = timezone.now()
+        self.assertEqual(consume('events.tests', now=now), 2)
+        self.assertEqual(self.cursor().gaps, [[first.id + 1, first.id + 1, now.timestamp()]])
+
+        second = Event.objects.create(id=first.id + 1, type=Event.Type.SWAP_CREATED, object_id=2)
+        self.assertEqual(consume('events.tests', now=now), 1)
+        self.assertEqual(handled, [first.id, third.id, second.id])
+        self.assertEqual(self.cursor().gaps, [])
+
+    def test_gaps_are_dropped_as_rolled_back(self):
+        first = record(Event.Type.SWAP_CREATED, 1, actor_id=1)
+        Event.objects.create(id=first.id + 3, type=Event.Type.SWAP_CREATED, object_id=3)
+        now = timezone.now()
+        consume('events.tests', now=now)
+        self.assertEqual(self.cursor().gaps, [[first.id + 1, first.id + 2, now.timestamp()]])
+
+        self.assertEqual(consume('events.tests', now=now + datetime.timedelta(seconds=30)), 0)
+        self.assertEqual(len(self.cursor().gaps), 1)
+        consume('events.tests', now=now + datetime.timedelta(seconds=61))
+        self.assertEqual(self.cursor().gaps, [])
+
+        # An insert that turns up after that is not handed out
+        Event.objects.create(id=first.id + 1, type=Event.Type.SWAP_CREATED, object_id=2)
+        self.assertEqual(consume('events.tests'), 0)
+        self.assertEqual(len(handled), 2)
+
+    def test_events_marked_handled_are_read_past(self):
+        waiting = record(Event.Type.SWAP_CREATED, 1, actor_id=1)
+        seeded = [record(Event.Type.SWAP_CREATED, pk, actor_id=1) for pk in [2, 3]]
+        mark_handled(seeded, names=['events.tests'])
+        later = record(Event.Type.RATING_CREATED, 4, actor_id=1)
+
+        self.assertEqual(consume('events.tests'), 2)
+        self.assertEqual(handled, [waiting.id, later.id])
+        cursor = self.cursor()
+        self.assertEqual((cursor.last_id, cursor.gaps, cursor.settled), (later.id, [], []))
+
+    def test_failed_batches_leave_the_cursor(self):
+        record(Event.Type.SWAP_CREATED, 1, actor_id=1)
+        ConsumerCursor.objects.create(consumer='events.tests.failing')
+        with self.assertRaises(RuntimeError):
+            consume('events.tests.failing')
+        self.assertEqual(ConsumerCursor.objects.get(consumer='events.tests.failing').last_id, 0)
+
+class CounterReplayTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='pw')
+        self.carol = User.objects.create_user(username='carol', email='carol@example.com', password='pw')
+
+    def change_status(self, swap_id, status, from_user, to_user):
+        record(
+            Event.Type.SWAP_STATUS_CHANGED, swap_id, actor_id=to_user.id,
+            status=status, from_user_id=from_user.id, to_user_id=to_user.id
+        )
+
+    def drain(self):
+        while consume('users.counters'):
+            pass
+
+    def totals(self):
+        return dict(User.objects.values_list('username', 'total_completed_swaps'))
+
+    def test_replay_rebuilds_completed_swap_counters(self):
+        self.change_status(1, SwapRequest.Status.ACCEPTED, self.alice, self.bob)
+        self.change_status(1, SwapRequest.Status.COMPLETED, self.alice, self.bob)
+        self.change_status(2, SwapRequest.Status.COMPLETED, self.carol, self.alice)
+        self.drain()
+        expected = {'alice': 2, 'bob': 1, 'carol': 1}
+        self.assertEqual(self.totals(), expected)
+
+        User.objects.update(total_completed_swaps=9)
+        replay('users.counters')
+        self.assertEqual(ConsumerCursor.objects.get(consumer='users.counters').last_id, 0)
+        self.drain()
+        self.assertEqual(self.totals(), expected)
+
+    def test_notifications_cannot_be_replayed(self):
+        with self.assertRaises(ValueError):
+            replay('notifications')
@@ -0,0 +1,57 @@
+import logging
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from users.permissions import IsAdminUser
+from .log import get_setting, read
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+class EventFeedView(APIView):
+    """
+    The domain event log for consumers outside the backend (search
+    indexing, analytics): ?after=<id>&types=swap.created,rating.created&limit=N.
+    Store the returned ``next_cursor`` and pass it as ``after`` next time.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    
+    def get(self, request):
+        try:
+            after = int(request.query_params.get('after', 0))
+            limit = min(int(request.query_params.get('limit', 100)), get_setting('BATCH_SIZE'))
+        except ValueError:
+            return Response({"error": "after and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        types = sorted({name.strip() for name in request.query_params.get('types', '').split(',') if name.strip()})
+        unknown = set(types) - set(Event.Type.values)
+        if unknown:
+            return Response(
+                {"error": f"Unknown event type: {', '.join(sorted(unknown))}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if limit < 1:
+            return Response({"error": "limit must be positive."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            events = read(after, types, limit)
+            return Response({
+                "events": [
+                    {
+                        "id": event.id,
+                        "type": event.type,
+                        "object_id": event.object_id,
+                        "actor_id": event.actor_id,
+                        "payload": event.payload,
+                        "created_at": event.created_at,
+                    }
+                    for event in events
+                ],
+                "next_cursor": events[-1].id if events else after,
+            })
+        except Exception as e:
+            logger.error(f"Event feed failed: {e}")
+            return Response(
+                {"error": "Failed to load events. Please try again."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
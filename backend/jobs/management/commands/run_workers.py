@@ -0,0 +1,54 @@
+import logging
+import multiprocessing
+import time
+from django.core.management.base import BaseCommand
+from django.db import connections
+from jobs.queue import claim_jobs, run_job
+
+logger = logging.getLogger('jobs')
+
+def work(poll_interval, batch_size, once):
+    """Worker loop: claim due jobs, run them, sleep when the queue is empty"""
+    # Each process must open its own database connection
+    connections.close_all()
+    while True:
+        jobs = claim_jobs(limit=batch_size)
+        for job in jobs:
+            run_job(job)
+        if once and not jobs:
+            return
+        if not jobs:
+            time.sleep(poll_interval)
+
+class Command(BaseCommand):
+    help = 'Run a pool of background job workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Number of worker processes')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when idle')
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs claimed per poll')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is drained')
+
+    def handle(self, *args, **options):
+        worker_args = (options['poll_interval'], options['batch_size'], options['once'])
+        
+        if options['processes'] <= 1:
+            work(*worker_args)
+            return
+        
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=work, args=worker_args, daemon=True)
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {len(workers)} job workers")
+        
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping job workers")
+            for worker in workers:
+                worker.terminate()
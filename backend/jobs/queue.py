@@ -0,0 +1,103 @@
+import logging
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+DEFAULTS = {
+    'ALWAYS_EAGER': False,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 5,
+    'LOCK_TIMEOUT': 300,
+}
+
+def get_setting(name):
+    return getattr(settings, 'JOB_QUEUE', {}).get(name, DEFAULTS[name])
+
+def task(name):
+    """Register a function as a background task under ``name``"""
+    def decorator(func):
+        if name in _registry and _registry[name] is not func:
+            raise ValueError(f"Task '{name}' is already registered")
+        _registry[name] = func
+        func.task_name = name
+        return func
+    return decorator
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"Unknown task '{name}'")
+
+def enqueue(task_name, /, **kwargs):
+    """
+    Schedule a task to run once the current transaction commits.
+
+    The job row is inserted inside the caller's transaction, so it commits
+    or rolls back with the change that queued it; workers cannot see it
+    until then. Keyword arguments must be JSON serializable; pass ids rather
+    than model instances. With ``JOB_QUEUE['ALWAYS_EAGER']`` the task runs
+    in-process on commit instead.
+    """
+    get_task(task_name)
+    
+    if get_setting('ALWAYS_EAGER'):
+        transaction.on_commit(lambda: get_task(task_name)(**kwargs))
+        return None
+    
+    return Job.objects.create(
+        task_name=task_name,
+        payload=kwargs,
+        max_attempts=get_setting('MAX_ATTEMPTS'),
+    )
+
+def claim_jobs(limit=10):
+    """
+    Claim up to ``limit`` due jobs for this worker.
+
+    Each job is claimed with a conditional UPDATE so concurrent workers never
+    run the same job. Jobs left running past LOCK_TIMEOUT are reclaimed.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=get_setting('LOCK_TIMEOUT'))
+    claimable = (
+        Q(status=Job.Status.PENDING, run_at__lte=now) |
+        Q(status=Job.Status.RUNNING, locked_at__lt=stale)
+    )
+    
+    claimed = []
+    for job_id in list(Job.objects.filter(claimable).values_list('id', flat=True)[:limit]):
+        if Job.objects.filter(claimable, id=job_id).update(status=Job.Status.RUNNING, locked_at=now):
+            claimed.append(job_id)
+    
+    return list(Job.objects.filter(id__in=claimed))
+
+def run_job(job):
+    """Run a claimed job, deleting it on success and rescheduling it on failure"""
+    job.attempts += 1
+    try:
+        with transaction.atomic():
+            get_task(job.task_name)(**job.payload)
+    except Exception as e:
+        logger.error(f"Job {job.task_name} #{job.id} failed (attempt {job.attempts}): {e}")
+        job.last_error = traceback.format_exc()
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = Job.Status.FAILED
+        else:
+            backoff = get_setting('RETRY_BACKOFF') * 2 ** (job.attempts - 1)
+            job.status = Job.Status.PENDING
+            job.run_at = timezone.now() + timedelta(seconds=backoff)
+        job.save(update_fields=['attempts', 'status', 'run_at', 'locked_at', 'last_error'])
+        return False
+    
+    job.delete()
+    return True
@@ -0,0 +1,80 @@
+from datetime import timedelta
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .models import Job
+from .queue import claim_jobs, enqueue, run_job, task
+
+calls = []
+
+@task('jobs.tests.record')
+def record_call(value, fail=False):
+    calls.append(value)
+    if fail:
+        raise RuntimeError("task failed")
+
+@override_settings(JOB_QUEUE={'ALWAYS_EAGER': False, 'MAX_ATTEMPTS': 2, 'RETRY_BACKOFF': 5, 'LOCK_TIMEOUT': 300})
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_writes_the_job_in_the_callers_transaction(self):
+        enqueue('jobs.tests.record', value=1)
+        self.assertEqual(list(Job.objects.values_list('task_name', 'payload')), [('jobs.tests.record', {'value': 1})])
+
+        try:
+            with transaction.atomic():
+                enqueue('jobs.tests.record', value=2)
+                raise RuntimeError("rolled back")
+        except RuntimeError:
+            pass
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_enqueue_rejects_unknown_tasks(self):
+        with self.assertRaises(LookupError):
+            enqueue('jobs.tests.missing')
+
+    def test_claimed_jobs_are_not_claimed_twice(self):
+        enqueue('jobs.tests.record', value=1)
+        claimed = claim_jobs()
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(claimed[0].status, Job.Status.RUNNING)
+        self.assertEqual(claim_jobs(), [])
+
+    def test_stale_running_jobs_are_reclaimed(self):
+        job = enqueue('jobs.tests.record', value=1)
+        Job.objects.filter(id=job.id).update(
+            status=Job.Status.RUNNING, locked_at=timezone.now() - timedelta(seconds=301)
+        )
+        self.assertEqual([claimed.id for claimed in claim_jobs()], [job.id])
+
+    def test_successful_jobs_are_deleted(self):
+        enqueue('jobs.tests.record', value=7)
+        self.assertTrue(run_job(claim_jobs()[0]))
+        self.assertEqual(calls, [7])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_jobs_back_off_then_fail(self):
+        enqueue('jobs.tests.record', value=1, fail=True)
+        before = timezone.now()
+        self.assertFalse(run_job(claim_jobs()[0]))
+
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.Status.PENDING, 1))
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=5))
+        self.assertIn('task failed', job.last_error)
+        # Not due again until the backoff has passed
+        self.assertEqual(claim_jobs(), [])
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        self.assertFalse(run_job(claim_jobs()[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 2))
+
+    @override_settings(JOB_QUEUE={'ALWAYS_EAGER': True})
+    def test_eager_mode_runs_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('jobs.tests.record', value=3)
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, [3])
+        self.assertFalse(Job.objects.exists())
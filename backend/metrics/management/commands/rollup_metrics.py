@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from metrics.rollups import METRICS, roll_up_all
+
+class Command(BaseCommand):
+    help = 'Count new registrations, swap status changes, ratings and skill additions into the daily metric rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('metrics', nargs='*', help=f"Metrics to roll up (default: {', '.join(METRICS)})")
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Discard the stored rollups and recount all history')
+
+    def handle(self, *args, **options):
+        unknown = set(options['metrics']) - set(METRICS)
+        if unknown:
+            raise CommandError(f"Unknown metric: {', '.join(sorted(unknown))}")
+        started = time.monotonic()
+        counted = roll_up_all(options['metrics'], rebuild=options['rebuild'])
+        for name, rows in counted.items():
+            self.stdout.write(f"{name}: {rows} new rows")
+        self.stdout.write(f"Rolled up {len(counted)} metrics in {time.monotonic() - started:.2f}s")
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=40, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Last rollup run')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=40)),
+                ('dimension', models.CharField(blank=True, default='', max_length=40)),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['metric', 'dimension', 'day'],
+                'constraints': [models.UniqueConstraint(fields=('metric', 'day', 'dimension'), name='daily_metric_uniq')],
+            },
+        ),
+    ]
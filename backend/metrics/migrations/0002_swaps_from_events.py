@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-19 10:45
+
+from django.db import migrations
+
+
+def recount_swaps(apps, schema_editor):
+    """Swap rollups now read the event log; drop them so rollup_metrics recounts them from it"""
+    apps.get_model('metrics', 'DailyMetric').objects.filter(metric='swaps').delete()
+    apps.get_model('metrics', 'RollupCursor').objects.filter(metric='swaps').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+        ('metrics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_swaps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metrics', '0002_swaps_from_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rollupcursor',
+            name='gaps',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
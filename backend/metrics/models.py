@@ -0,0 +1,35 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+class DailyMetric(models.Model):
+    """
+    One day of one metric, optionally broken down by a dimension (a swap
+    status, a skill type). Maintained by ``rollup_metrics``.
+    """
+    metric = models.CharField(max_length=40)
+    dimension = models.CharField(max_length=40, blank=True, default='')
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    # Sum of the measured values (rating scores) so averages can be derived and re-aggregated
+    total = models.BigIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['metric', 'dimension', 'day']
+        constraints = [
+            # Also the index behind range queries: metric IN (...) AND day BETWEEN ...
+            models.UniqueConstraint(fields=['metric', 'day', 'dimension'], name='daily_metric_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.metric}{'/' + self.dimension if self.dimension else ''} {self.day}: {self.count}"
+
+class RollupCursor(models.Model):
+    """Highest source row id already counted into DailyMetric, per metric"""
+    metric = models.CharField(max_length=40, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    # [first_id, last_id, seen_at] id ranges below last_id skipped while uncommitted
+    gaps = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, help_text=_('Last rollup run'))
+    
+    def __str__(self):
+        return f"{self.metric} @ {self.last_id}"
@@ -0,0 +1,195 @@
+"""
+Daily metric rollups.
+
+Each metric counts the rows of one source table per day of their timestamp
+(in TIME_ZONE), optionally broken down by a column and summing a value
+column. ``roll_up`` only reads rows with ids above the metric's
+RollupCursor and moves the cursor in the same transaction, so every row is
+counted exactly once however often it runs.
+
+Ids are taken when a row is inserted, not when it commits, so a lower id
+can become visible after a higher one. As with the event log's consumer
+cursors, the ids a run skips are kept on the cursor as gaps and counted
+once they commit; a gap still empty after METRICS['GAP_SECONDS'] is taken
+to be a rolled-back insert or a deleted row and dropped. Ids missing below
+a row already older than that are dropped straight away, so history with
+deleted rows does not leave gaps behind.
+
+Rollups are history: deleting a user or swap later does not change past days.
+"""
+import datetime
+from collections import namedtuple
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from ratings.models import Rating
+from skills.models import UserSkill
+from events.log import track_gaps
+from events.models import Event
+from swaps.models import SwapRequest
+from .models import DailyMetric, RollupCursor
+
+DEFAULTS = {
+    'BATCH_SIZE': 1000,
+    'GAP_SECONDS': 60,
+    'MAX_RANGE_DAYS': 1100,
+}
+
+Metric = namedtuple(
+    'Metric', ['model', 'timestamp', 'dimension', 'value', 'filters', 'dimensions'], defaults=[{}, ()]
+)
+
+METRICS = {
+    'registrations': Metric(get_user_model(), 'joined_at', None, None),
+    # Swaps entering each status; "pending" counts new requests
+    'swaps': Metric(Event, 'created_at', 'payload__status', None, {
+        'type__in': [Event.Type.SWAP_CREATED, Event.Type.SWAP_STATUS_CHANGED],
+    }, SwapRequest.Status.values),
+    'ratings': Metric(Rating, 'created_at', None, 'score'),
+    'skill_additions': Metric(UserSkill, 'created_at', 'skill_type', None, {}, UserSkill.SkillType.values),
+}
+
+def get_setting(name):
+    return getattr(settings, 'METRICS', {}).get(name, DEFAULTS[name])
+
+def _merge(name, rows):
+    """Add per-day ``(count, total)`` increments to the stored rows of a metric"""
+    stored = {
+        (metric.day, metric.dimension): metric
+        for metric in DailyMetric.objects.filter(metric=name, day__in={day for day, _ in rows})
+    }
+    created, updated = [], []
+    for (day, dimension), (count, total) in rows.items():
+        metric = stored.get((day, dimension))
+        if metric is None:
+            created.append(DailyMetric(metric=name, day=day, dimension=dimension, count=count, total=total))
+        else:
+            metric.count += count
+            metric.total += total
+            updated.append(metric)
+    DailyMetric.objects.bulk_create(created)
+    DailyMetric.objects.bulk_update(updated, ['count', 'total'])
+
+def _roll_up_batch(name, now):
+    """Count the next batch of source rows of one metric; returns ``(ids read, rows counted)``"""
+    metric = METRICS[name]
+    horizon = now.timestamp() - get_setting('GAP_SECONDS')
+    with transaction.atomic():
+        cursor, _ = RollupCursor.objects.select_for_update().get_or_create(metric=name)
+        gaps = [gap for gap in cursor.gaps if gap[2] > horizon]
+        # Gaps are found from the ids of every row; only the metric's rows are counted
+        window = Q(id__gt=cursor.last_id)
+        for first, last, _ in gaps:
+            window |= Q(id__range=(first, last))
+        scanned = list(
+            metric.model.objects.filter(window).order_by('id')
+            .values_list('id', metric.timestamp)[:get_setting('BATCH_SIZE')]
+        )
+        ids = [pk for pk, _ in scanned]
+        # An id missing below a row this old would have committed by now
+        committed_below = max([pk for pk, timestamp in scanned if timestamp.timestamp() <= horizon], default=0)
+        updated_gaps = [gap for gap in track_gaps(gaps, cursor.last_id, ids, now.timestamp()) if gap[1] > committed_below]
+        if not ids and updated_gaps == cursor.gaps:
+            return 0, 0
+
+        increments = {}
+        if ids:
+            groups = ['day'] + ([metric.dimension] if metric.dimension else [])
+            aggregates = {'count': Count('id')}
+            if metric.value:
+                aggregates['total'] = Sum(metric.value)
+            rows = (
+                metric.model.objects.filter(id__in=ids, **metric.filters).order_by()
+                .annotate(day=TruncDate(metric.timestamp)).values(*groups).annotate(**aggregates)
+            )
+            increments = {
+                (row['day'], row[metric.dimension] if metric.dimension else ''): (row['count'], row.get('total') or 0)
+                for row in rows
+            }
+            _merge(name, increments)
+        cursor.last_id = max([cursor.last_id, *ids])
+        cursor.gaps = updated_gaps
+        cursor.save(update_fields=['last_id', 'gaps', 'updated_at'])
+    return len(ids), sum(count for count, _ in increments.values())
+
+def roll_up(name, now=None):
+    """Count new source rows of one metric into DailyMetric, a batch per transaction; returns the rows counted"""
+    now = now or timezone.now()
+    counted = 0
+    while True:
+        read, batch = _roll_up_batch(name, now)
+        counted += batch
+        if read < get_setting('BATCH_SIZE'):
+            return counted
+
+def roll_up_all(names=None, rebuild=False):
+    """Roll up the given metrics (all by default), from scratch with ``rebuild``; returns rows counted per metric"""
+    names = list(names or METRICS)
+    if rebuild:
+        with transaction.atomic():
+            DailyMetric.objects.filter(metric__in=names).delete()
+            RollupCursor.objects.filter(metric__in=names).delete()
+    return {name: roll_up(name) for name in names}
+
+def parse_range(query_params, today=None):
+    """
+    ``metrics`` (comma-separated, all by default) and the inclusive
+    ``start``/``end`` dates (the last 30 days by default) of a timeseries
+    request, raising ValidationError for invalid values.
+    """
+    names = sorted({name.strip() for name in query_params.get('metrics', '').split(',') if name.strip()})
+    unknown = set(names) - set(METRICS)
+    if unknown:
+        raise ValidationError(f"Unknown metric: {', '.join(sorted(unknown))}.")
+
+    today = today or timezone.localdate()
+    try:
+        end = datetime.date.fromisoformat(query_params['end']) if query_params.get('end') else today
+        start = (
+            datetime.date.fromisoformat(query_params['start']) if query_params.get('start')
+            else end - datetime.timedelta(days=29)
+        )
+    except ValueError:
+        raise ValidationError("start and end must be ISO dates (YYYY-MM-DD).")
+    if start > end:
+        raise ValidationError("start must not be after end.")
+    if (end - start).days >= get_setting('MAX_RANGE_DAYS'):
+        raise ValidationError(f"The range can span at most {get_setting('MAX_RANGE_DAYS')} days.")
+    return names or list(METRICS), start, end
+
+def _point(day, count, total, averaged):
+    point = {'day': day, 'count': count}
+    if averaged:
+        point['average'] = round(total / count, 2) if count else None
+    return point
+
+def timeseries(names, start, end):
+    """
+    Daily points of each metric (per dimension for broken-down metrics)
+    between ``start`` and ``end`` inclusive, with zeros for days without
+    data. Broken-down metrics get a series for every known dimension
+    even when it has no rows in the range. One query.
+    """
+    rows = DailyMetric.objects.filter(metric__in=names, day__gte=start, day__lte=end).order_by().values_list(
+        'metric', 'dimension', 'day', 'count', 'total'
+    )
+    found = {}
+    for name in names:
+        for dimension in METRICS[name].dimensions if METRICS[name].dimension else ['']:
+            found[(name, dimension)] = {}
+    for name, dimension, day, count, total in rows:
+        found.setdefault((name, dimension), {})[day] = (count, total)
+
+    days = [start + datetime.timedelta(days=offset) for offset in range((end - start).days + 1)]
+    return [
+        {
+            'metric': name,
+            'dimension': dimension or None,
+            'points': [_point(day, *points.get(day, (0, 0)), METRICS[name].value is not None) for day in days],
+        }
+        for (name, dimension), points in sorted(found.items())
+    ]
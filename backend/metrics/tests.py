@@ -0,0 +1,144 @@
+import datetime
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import User
+from .models import DailyMetric, RollupCursor
+from .rollups import roll_up, roll_up_all, timeseries
+
+MARCH_1, MARCH_2, MARCH_3 = (datetime.date(2026, 3, day) for day in [1, 2, 3])
+
+def at(day, hour=12):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour)))
+
+@override_settings(METRICS={'BATCH_SIZE': 1000, 'GAP_SECONDS': 60, 'MAX_RANGE_DAYS': 1100})
+class RollupTests(TestCase):
+    def setUp(self):
+        self.sequence = 0
+        self.now = at(MARCH_3)
+
+    def register(self, joined_at, **fields):
+        self.sequence += 1
+        name = f"member{self.sequence}"
+        user = User.objects.create_user(username=name, email=f"{name}@example.com", password='pw', **fields)
+        User.objects.filter(pk=user.pk).update(joined_at=joined_at)
+        return user
+
+    def counts(self):
+        return dict(DailyMetric.objects.filter(metric='registrations').values_list('day', 'count'))
+
+    def test_rows_are_counted_once(self):
+        self.register(at(MARCH_1, 9))
+        self.register(at(MARCH_1, 18))
+        self.register(at(MARCH_2))
+        self.assertEqual(roll_up('registrations', now=self.now), 3)
+        self.assertEqual(roll_up('registrations', now=self.now), 0)
+
+        # Late rows for a day already rolled up add to it
+        latest = self.register(at(MARCH_1))
+        self.assertEqual(roll_up('registrations', now=self.now), 1)
+        self.assertEqual(self.counts(), {MARCH_1: 3, MARCH_2: 1})
+        self.assertEqual(RollupCursor.objects.get(metric='registrations').last_id, latest.pk)
+
+    def test_late_commits_are_counted_from_gaps(self):
+        first = self.register(at(MARCH_2))
+        # The id in between belongs to a transaction that has not committed yet
+        self.register(self.now - datetime.timedelta(seconds=10), id=first.pk + 2)
+        self.assertEqual(roll_up('registrations', now=self.now), 2)
+        cursor = RollupCursor.objects.get(metric='registrations')
+        self.assertEqual(cursor.last_id, first.pk + 2)
+        self.assertEqual(cursor.gaps, [[first.pk + 1, first.pk + 1, self.now.timestamp()]])
+
+        self.register(at(MARCH_2), id=first.pk + 1)
+        self.assertEqual(roll_up('registrations', now=self.now), 1)
+        self.assertEqual(self.counts(), {MARCH_2: 2, MARCH_3: 1})
+        self.assertEqual(RollupCursor.objects.get(metric='registrations').gaps, [])
+
+    def test_gaps_are_dropped_as_rolled_back(self):
+        first = self.register(at(MARCH_2))
+        self.register(self.now, id=first.pk + 3)
+        roll_up('registrations', now=self.now)
+        self.assertEqual(len(RollupCursor.objects.get(metric='registrations').gaps), 1)
+        roll_up('registrations', now=self.now + datetime.timedelta(seconds=61))
+        self.assertEqual(RollupCursor.objects.get(metric='registrations').gaps, [])
+
+        # An insert that turns up after that is not counted
+        self.register(at(MARCH_2), id=first.pk + 1)
+        self.assertEqual(roll_up('registrations', now=self.now), 0)
+
+    def test_ids_missing_below_old_rows_are_not_waited_for(self):
+        first = self.register(at(MARCH_1))
+        # Deleted long ago
+        self.register(at(MARCH_2), id=first.pk + 2)
+        self.assertEqual(roll_up('registrations', now=self.now), 2)
+        self.assertEqual(RollupCursor.objects.get(metric='registrations').gaps, [])
+
+    @override_settings(METRICS={'BATCH_SIZE': 2, 'GAP_SECONDS': 60, 'MAX_RANGE_DAYS': 1100})
+    def test_rows_are_counted_in_batches(self):
+        for day in [MARCH_1, MARCH_1, MARCH_2, MARCH_2, MARCH_3]:
+            self.register(at(day, 9))
+        self.assertEqual(roll_up('registrations', now=self.now), 5)
+        self.assertEqual(self.counts(), {MARCH_1: 2, MARCH_2: 2, MARCH_3: 1})
+
+    def test_rebuild_recounts_without_doubling(self):
+        self.register(at(MARCH_1))
+        self.register(at(MARCH_2))
+        roll_up('registrations', now=self.now)
+        before = self.counts()
+
+        self.assertEqual(roll_up_all(['registrations'], rebuild=True), {'registrations': 2})
+        self.assertEqual(self.counts(), before)
+
+class TimeseriesTests(TestCase):
+    def setUp(self):
+        DailyMetric.objects.bulk_create([
+            DailyMetric(metric='ratings', day=MARCH_2, count=2, total=9),
+            DailyMetric(metric='swaps', dimension='pending', day=MARCH_1, count=4),
+            DailyMetric(metric='swaps', dimension='completed', day=MARCH_3, count=1),
+            # Outside the range
+            DailyMetric(metric='ratings', day=datetime.date(2026, 3, 4), count=1, total=5),
+        ])
+
+    def test_days_without_data_are_zero(self):
+        series = {
+            (row['metric'], row['dimension']): row['points']
+            for row in timeseries(['ratings', 'registrations', 'swaps'], MARCH_1, MARCH_3)
+        }
+        self.assertEqual(series[('ratings', None)], [
+            {'day': MARCH_1, 'count': 0, 'average': None},
+            {'day': MARCH_2, 'count': 2, 'average': 4.5},
+            {'day': MARCH_3, 'count': 0, 'average': None},
+        ])
+        # Metrics without rows still get a series
+        self.assertEqual([point['count'] for point in series[('registrations', None)]], [0, 0, 0])
+        self.assertEqual([point['count'] for point in series[('swaps', 'pending')]], [4, 0, 0])
+        self.assertEqual([point['count'] for point in series[('swaps', 'completed')]], [0, 0, 1])
+        # Dimensions without rows in the range are zeros too
+        self.assertEqual(
+            [dimension for metric, dimension in series if metric == 'swaps'],
+            sorted(['pending', 'accepted', 'rejected', 'completed', 'canceled'])
+        )
+        self.assertEqual([point['count'] for point in series[('swaps', 'canceled')]], [0, 0, 0])
+
+    def test_every_skill_type_gets_a_series(self):
+        series = timeseries(['skill_additions'], MARCH_1, MARCH_2)
+        self.assertEqual(
+            [(row['dimension'], [point['count'] for point in row['points']]) for row in series],
+            [('offered', [0, 0]), ('wanted', [0, 0])]
+        )
+
+    def test_endpoint_validates_the_range(self):
+        admin = User.objects.create_user(
+            username='metrics_admin', email='metrics_admin@example.com', password='pw', role=User.Roles.ADMIN
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(admin).access_token}")
+        url = reverse('metrics-timeseries')
+
+        response = client.get(url, {'metrics': 'ratings', 'start': '2026-03-01', 'end': '2026-03-03'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['series'][0]['points']), 3)
+        self.assertEqual(client.get(url, {'start': '2026-03-03', 'end': '2026-03-01'}).status_code, 400)
+        self.assertEqual(client.get(url, {'metrics': 'logins'}).status_code, 400)
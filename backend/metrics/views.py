@@ -0,0 +1,36 @@
+import logging
+from django.core.exceptions import ValidationError
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from users.permissions import IsAdminUser
+from .rollups import parse_range, timeseries
+
+logger = logging.getLogger(__name__)
+
+class TimeseriesView(APIView):
+    """
+    Daily trends for admin charts from the DailyMetric rollups:
+    ?metrics=registrations,swaps,ratings,skill_additions&start=YYYY-MM-DD&end=YYYY-MM-DD
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    
+    def get(self, request):
+        try:
+            names, start, end = parse_range(request.query_params)
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            return Response({
+                "start": start,
+                "end": end,
+                "series": timeseries(names, start, end),
+            })
+        except Exception as e:
+            logger.error(f"Metrics timeseries failed: {e}")
+            return Response(
+                {"error": "Failed to load metrics. Please try again."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
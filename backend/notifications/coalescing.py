@@ -0,0 +1,79 @@
+"""
+Coalescing of bursty notification types.
+
+Events of a coalesced type that land in the same time window are merged into
+one unread row per user, keyed by ``coalesce_key``. A partial unique index on
+unread rows lets the merge run as a single indexed UPDATE with an INSERT
+fallback. Once the row is read its key is cleared, and the next event
+starts a fresh one. Windows follow the time of the event, not of delivery,
+so a lagging consumer does not merge events from different windows.
+"""
+import logging
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Cast, Concat, Greatest
+from django.utils import timezone
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+# Merge attempts before a notification is inserted on its own
+MERGE_ATTEMPTS = 3
+
+# Title used once more than one event has been merged
+COALESCED_TITLES = {
+    Notification.Type.SWAP_REQUEST: ' new swap requests',
+    Notification.Type.NEW_RATING: ' new ratings',
+}
+
+def coalesce_key(notification_type, now):
+    window = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 86400)
+    return f"{notification_type}:{int(now.timestamp() // window)}"
+
+def notify(user_id, notification_type, title, message, actor_id=None,
+           related_object_id=None, related_object_type=None, created_at=None):
+    """
+    Create a notification, merging it into an unread one of the same type
+    and window. ``created_at`` is when the event happened (now by default).
+    """
+    created_at = created_at or timezone.now()
+    fields = {
+        'user_id': user_id,
+        'notification_type': notification_type,
+        'title': title,
+        'message': message,
+        'actor_id': actor_id,
+        'related_object_id': related_object_id,
+        'related_object_type': related_object_type,
+        'created_at': created_at,
+    }
+    if notification_type not in COALESCED_TITLES:
+        return Notification.objects.create(**fields)
+    
+    key = coalesce_key(notification_type, created_at)
+    
+    for _ in range(MERGE_ATTEMPTS):
+        merged = Notification.objects.filter(
+            user_id=user_id, coalesce_key=key, is_read=False
+        ).update(
+            count=F('count') + 1,
+            title=Concat(Cast(F('count') + 1, CharField()), Value(COALESCED_TITLES[notification_type])),
+            message=message,
+            actor_id=actor_id,
+            related_object_id=related_object_id,
+            related_object_type=related_object_type,
+            created_at=Greatest(F('created_at'), Value(created_at))
+        )
+        if merged:
+            return None
+        
+        try:
+            with transaction.atomic():
+                return Notification.objects.create(coalesce_key=key, **fields)
+        except IntegrityError:
+            # Another worker inserted the row first, or it was just read; merge again
+            continue
+    
+    logger.warning(f"Could not coalesce {notification_type} notification for user {user_id}; inserting it on its own")
+    return Notification.objects.create(**fields)
@@ -0,0 +1,155 @@
+from events.log import consumer
+from events.models import Event
+from ratings.models import Rating
+from swaps.models import SwapRequest
+from users.badges import BADGE_RULES, badge_notification, get_badge_catalog
+from users.models import User
+from .coalescing import COALESCED_TITLES, notify
+from .models import Notification
+
+SWAP_STATUS_NOTIFICATIONS = {
+    SwapRequest.Status.ACCEPTED: (
+        Notification.Type.SWAP_ACCEPTED, "Swap Request Accepted",
+        "{swap.to_user.username} accepted your swap request for {swap.skill_wanted.name}"
+    ),
+    SwapRequest.Status.REJECTED: (
+        Notification.Type.SWAP_REJECTED, "Swap Request Rejected",
+        "{swap.to_user.username} declined your swap request for {swap.skill_wanted.name}"
+    ),
+    SwapRequest.Status.CANCELED: (
+        Notification.Type.SWAP_CANCELED, "Swap Request Cancelled",
+        "{actor.username} cancelled the swap request."
+    ),
+    SwapRequest.Status.COMPLETED: (
+        Notification.Type.SWAP_COMPLETED, "Swap Completed",
+        "Your skill swap has been marked as completed"
+    ),
+}
+
+NOTIFYING_BADGES = {rule.name for rule in BADGE_RULES if rule.notify}
+
+def event_notifications(event, swaps, ratings, users, catalog):
+    """Unsaved notifications for one event, dated when it happened"""
+    notifications = []
+    if event.type.startswith('swap.'):
+        if event.object_id in swaps:
+            notifications = swap_notifications(event, swaps[event.object_id])
+    elif event.type == Event.Type.RATING_CREATED:
+        if event.object_id in ratings:
+            notifications = [rating_notification(ratings[event.object_id])]
+    elif event.object_id not in users:
+        pass
+    elif event.type == Event.Type.BADGE_AWARDED:
+        if event.payload['badge'] in NOTIFYING_BADGES:
+            notifications = [badge_notification(event.object_id, catalog[event.payload['badge']])]
+    else:
+        notifications = [account_notification(event)]
+    for notification in notifications:
+        notification.created_at = event.created_at
+    return notifications
+
+def swap_notifications(event, swap):
+    """Notifications for a swap request being created or changing status"""
+    if event.type == Event.Type.SWAP_CREATED:
+        return [Notification(
+            user_id=swap.to_user_id,
+            notification_type=Notification.Type.SWAP_REQUEST,
+            title="New Swap Request",
+            message=f"{swap.from_user.username} wants to swap {swap.skill_offered.name} for your {swap.skill_wanted.name}",
+            actor_id=swap.from_user_id,
+            related_object_id=swap.id,
+            related_object_type="swap_request"
+        )]
+    if event.payload['status'] not in SWAP_STATUS_NOTIFICATIONS:
+        return []
+
+    notification_type, title, message = SWAP_STATUS_NOTIFICATIONS[event.payload['status']]
+    if event.payload['status'] in [SwapRequest.Status.ACCEPTED, SwapRequest.Status.REJECTED]:
+        # The requester hears back from the recipient
+        recipients = [swap.from_user_id]
+    else:
+        # The other party of the user who cancelled or completed it
+        recipients = [user_id for user_id in [swap.from_user_id, swap.to_user_id] if user_id != event.actor_id]
+    actor = swap.from_user if event.actor_id == swap.from_user_id else swap.to_user
+    return [
+        Notification(
+            user_id=user_id,
+            notification_type=notification_type,
+            title=title,
+            message=message.format(swap=swap, actor=actor),
+            related_object_id=swap.id,
+            related_object_type="swap_request"
+        )
+        for user_id in recipients
+    ]
+
+def rating_notification(rating):
+    return Notification(
+        user_id=rating.to_user_id,
+        notification_type=Notification.Type.NEW_RATING,
+        title="New Rating Received",
+        message=f"{rating.from_user.username} gave you a {rating.score}-star rating",
+        actor_id=rating.from_user_id,
+        related_object_id=rating.id,
+        related_object_type="rating"
+    )
+
+def account_notification(event):
+    if event.type == Event.Type.USER_VISIBILITY_CHANGED:
+        title = "Profile Visibility Updated"
+        message = f"Your profile is now {'public' if event.payload['is_public'] else 'private'}."
+    else:
+        title = "Account Status Updated"
+        account_status = "activated" if event.type == Event.Type.USER_ACTIVATED else "deactivated"
+        message = f"Your account has been {account_status} by an administrator."
+    return Notification(
+        user_id=event.object_id,
+        notification_type=Notification.Type.ADMIN_MESSAGE,
+        title=title,
+        message=message
+    )
+
+@consumer('notifications', types=[
+    Event.Type.SWAP_CREATED, Event.Type.SWAP_STATUS_CHANGED, Event.Type.RATING_CREATED,
+    Event.Type.BADGE_AWARDED, Event.Type.USER_ACTIVATED, Event.Type.USER_DEACTIVATED,
+    Event.Type.USER_VISIBILITY_CHANGED,
+])
+def send_notifications(events):
+    """
+    Notify users of what happened to their swaps, ratings, badges and
+    account. Not replayable: notifications carry read state.
+    """
+    swap_ids = [event.object_id for event in events if event.type.startswith('swap.')]
+    rating_ids = [event.object_id for event in events if event.type == Event.Type.RATING_CREATED]
+    swaps = SwapRequest.objects.select_related(
+        'from_user', 'to_user', 'skill_offered', 'skill_wanted'
+    ).in_bulk(swap_ids) if swap_ids else {}
+    ratings = Rating.objects.select_related('from_user').in_bulk(rating_ids) if rating_ids else {}
+    # Users deleted since have nobody left to tell
+    users = set(User.objects.filter(
+        id__in=[event.object_id for event in events if not event.type.startswith(('swap.', 'rating.'))]
+    ).values_list('id', flat=True))
+    catalog = get_badge_catalog()
+
+    notifications = [
+        notification
+        for event in events
+        for notification in event_notifications(event, swaps, ratings, users, catalog)
+    ]
+
+    # Bursty types merge into unread notifications; the rest go in one insert
+    for notification in notifications:
+        if notification.notification_type in COALESCED_TITLES:
+            notify(
+                user_id=notification.user_id,
+                notification_type=notification.notification_type,
+                title=notification.title,
+                message=notification.message,
+                actor_id=notification.actor_id,
+                related_object_id=notification.related_object_id,
+                related_object_type=notification.related_object_type,
+                created_at=notification.created_at
+            )
+    Notification.objects.bulk_create(
+        [notification for notification in notifications if notification.notification_type not in COALESCED_TITLES]
+    )
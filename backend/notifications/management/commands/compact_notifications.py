@@ -0,0 +1,106 @@
+import gzip
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from notifications.models import Notification
+
+class Command(BaseCommand):
+    help = 'Purge old read notifications and archive stale ones, in small primary-key chunks'
+
+    def add_arguments(self, parser):
+        retention = getattr(settings, 'NOTIFICATION_RETENTION', {})
+        parser.add_argument('--read-days', type=int, default=retention.get('READ_DAYS', 30),
+                            help='Delete read notifications older than this many days')
+        parser.add_argument('--archive-days', type=int, default=retention.get('ARCHIVE_DAYS', 180),
+                            help='Archive and delete any notification older than this many days (0 to disable)')
+        parser.add_argument('--archive-dir', default=retention.get('ARCHIVE_DIR', settings.BASE_DIR / 'archive'),
+                            help='Directory for the gzipped JSONL archives')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Rows handled per transaction')
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='Seconds to sleep between chunks so other writers get the lock')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='Run VACUUM afterwards to return freed pages to the filesystem')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        self.chunk_size = options['chunk_size']
+        self.pause = options['pause']
+        used_before = self._used_bytes()
+        
+        # Read notifications past retention are simply dropped
+        deleted = self._purge(Notification.objects.filter(
+            is_read=True, created_at__lt=now - timedelta(days=options['read_days'])
+        ))
+        
+        # Anything older still is moved to cold storage
+        archived, archive_path = 0, None
+        if options['archive_days']:
+            archive_path = Path(options['archive_dir']) / f"notifications-{now:%Y%m%d%H%M%S}.jsonl.gz"
+            archived = self._archive(Notification.objects.filter(
+                created_at__lt=now - timedelta(days=options['archive_days'])
+            ), archive_path)
+        
+        if options['vacuum'] and connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+        
+        self.stdout.write(f"Deleted {deleted} read notifications")
+        if archived:
+            self.stdout.write(f"Archived {archived} notifications to {archive_path}")
+        used_after = self._used_bytes()
+        if used_before is not None:
+            self.stdout.write(f"Reclaimed {used_before - used_after} bytes")
+
+    def _chunks(self, queryset):
+        """Yield the queryset restricted to the next ``chunk_size`` matching ids, pausing after each"""
+        last_id = 0
+        while True:
+            ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:self.chunk_size])
+            if not ids:
+                return
+            yield queryset.filter(id__in=ids)
+            last_id = ids[-1]
+            time.sleep(self.pause)
+
+    def _purge(self, queryset):
+        deleted = 0
+        for chunk in self._chunks(queryset):
+            with transaction.atomic():
+                deleted += chunk.delete()[0]
+        return deleted
+
+    def _archive(self, queryset, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Every column, so no schema change can leave data out of the archive
+        fields = [field.attname for field in Notification._meta.concrete_fields]
+        archived = 0
+        for chunk in self._chunks(queryset):
+            rows = list(chunk.values(*fields))
+            if not rows:
+                continue
+            with gzip.open(path, 'at', encoding='utf-8') as archive:
+                for row in rows:
+                    archive.write(json.dumps(row, default=str) + '\n')
+            with transaction.atomic():
+                archived += Notification.objects.filter(
+                    id__in=[row['id'] for row in rows]
+                ).delete()[0]
+        return archived
+
+    def _used_bytes(self):
+        """Bytes of the SQLite file holding live pages, or None on other databases"""
+        if connection.vendor != 'sqlite':
+            return None
+        with connection.cursor() as cursor:
+            values = []
+            for pragma in ['page_size', 'page_count', 'freelist_count']:
+                cursor.execute(f'PRAGMA {pragma}')
+                values.append(cursor.fetchone()[0])
+        page_size, page_count, freelist_count = values
+        return (page_count - freelist_count) * page_size
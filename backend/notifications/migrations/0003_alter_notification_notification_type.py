@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('swap_request', 'Swap Request'), ('swap_accepted', 'Swap Accepted'), ('swap_rejected', 'Swap Rejected'), ('swap_completed', 'Swap Completed'), ('swap_canceled', 'Swap Canceled'), ('new_rating', 'New Rating'), ('badge_earned', 'Badge Earned'), ('admin_message', 'Admin Message'), ('system', 'System Message')], max_length=20),
+        ),
+    ]
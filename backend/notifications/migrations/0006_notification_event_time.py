@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-19 11:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def clear_read_coalesce_keys(apps, schema_editor):
+    """Read rows stop taking merges, so they can be marked unread without a key clash"""
+    Notification = apps.get_model('notifications', 'Notification')
+    Notification.objects.filter(is_read=True, coalesce_key__isnull=False).update(coalesce_key=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_notification_coalescing'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(clear_read_coalesce_keys, migrations.RunPython.noop),
+    ]
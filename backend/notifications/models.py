@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 class Notification(models.Model):
@@ -12,6 +13,7 @@ class Notification(models.Model):
         SWAP_ACCEPTED = 'swap_accepted', _('Swap Accepted')
         SWAP_REJECTED = 'swap_rejected', _('Swap Rejected')
         SWAP_COMPLETED = 'swap_completed', _('Swap Completed')
+        SWAP_CANCELED = 'swap_canceled', _('Swap Canceled')
         NEW_RATING = 'new_rating', _('New Rating')
         BADGE_EARNED = 'badge_earned', _('Badge Earned')
         ADMIN_MESSAGE = 'admin_message', _('Admin Message')
@@ -31,10 +33,35 @@ class Notification(models.Model):
     related_object_id = models.PositiveIntegerField(null=True, blank=True)
     related_object_type = models.CharField(max_length=50, null=True, blank=True)
     is_read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # When the event happened, which can be before the consumer delivered it
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    
+    # Coalescing of bursty types (see notifications/coalescing.py)
+    count = models.PositiveIntegerField(default=1, help_text=_('Number of events merged into this notification'))
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text=_('User who triggered the latest merged event')
+    )
+    # Cleared once read, so read rows never collide with the unread one
+    coalesce_key = models.CharField(max_length=50, null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notif_user_read_idx'),
+            models.Index(fields=['created_at'], name='notif_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'coalesce_key'],
+                condition=models.Q(is_read=False, coalesce_key__isnull=False),
+                name='notif_unread_coalesce_key_uniq'
+            ),
+        ]
         
     def __str__(self):
         return f"{self.get_notification_type_display()} for {self.user.username}: {self.title}"
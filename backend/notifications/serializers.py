@@ -11,11 +11,11 @@ class NotificationSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'notification_type', 'notification_type_display',
             'title', 'message', 'related_object_id', 
-            'related_object_type', 'is_read', 'created_at'
+            'related_object_type', 'is_read', 'count', 'actor', 'created_at'
         ]
         read_only_fields = ['id', 'notification_type', 'notification_type_display',
                          'title', 'message', 'related_object_id',
-                         'related_object_type', 'created_at']
+                         'related_object_type', 'count', 'actor', 'created_at']
 
 class NotificationUpdateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -27,3 +27,31 @@ class NotificationUpdateSerializer(serializers.ModelSerializer):
         if not isinstance(value, bool):
             raise serializers.ValidationError("is_read must be a boolean value")
         return value
+    
+    def update(self, instance, validated_data):
+        # A read row stops taking merges, and may be marked unread again
+        if validated_data.get('is_read'):
+            instance.coalesce_key = None
+        return super().update(instance, validated_data)
+
+class NotificationBulkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=1000)
+    up_to_id = serializers.IntegerField(min_value=1, required=False)
+    up_to_created_at = serializers.DateTimeField(required=False)
+    types = serializers.ListField(
+        child=serializers.ChoiceField(choices=Notification.Type.choices),
+        required=False
+    )
+    
+    def validate(self, attrs):
+        if 'up_to_id' in attrs and 'up_to_created_at' not in attrs:
+            # Merging an event into an unread notification moves its created_at
+            # but keeps its id, so an id alone is not a watermark
+            raise serializers.ValidationError(
+                "'up_to_id' breaks ties within 'up_to_created_at'; send both from the same notification."
+            )
+        if ('ids' in attrs) == ('up_to_created_at' in attrs):
+            raise serializers.ValidationError(
+                "Provide exactly one of 'ids' or an 'up_to_created_at' watermark."
+            )
+        return attrs
@@ -1,3 +1,176 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import User
+from .coalescing import coalesce_key, notify
+from .models import Notification
 
-# Create your tests here.
+class MarkReadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', email='reader@example.com', password='pw')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+    def notify_rating(self, rater):
+        notify(
+            user_id=self.user.id,
+            notification_type=Notification.Type.NEW_RATING,
+            title="New Rating Received",
+            message=f"{rater} gave you a 5-star rating"
+        )
+
+    def test_watermark_skips_notifications_merged_into_after_it_was_shown(self):
+        self.notify_rating('first')
+        merged = Notification.objects.get()
+        Notification.objects.filter(id=merged.id).update(created_at=timezone.now() - timedelta(minutes=5))
+        shown = Notification.objects.create(
+            user=self.user, notification_type=Notification.Type.SYSTEM, title='Welcome', message='Hello'
+        )
+        # A new rating lands in the unread row after the client listed it
+        self.notify_rating('second')
+
+        response = self.client.post(reverse('notifications-mark-read'), {
+            'up_to_created_at': shown.created_at.isoformat(), 'up_to_id': shown.id
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'updated': 1, 'unread_count': 1})
+        merged.refresh_from_db()
+        self.assertEqual((merged.is_read, merged.count), (False, 2))
+
+    def test_ties_on_created_at_are_broken_by_id(self):
+        first, second = Notification.objects.bulk_create([
+            Notification(user=self.user, notification_type=Notification.Type.SYSTEM, title='One', message='One'),
+            Notification(user=self.user, notification_type=Notification.Type.SYSTEM, title='Two', message='Two'),
+        ])
+        now = timezone.now()
+        Notification.objects.update(created_at=now)
+
+        response = self.client.post(reverse('notifications-mark-read'), {
+            'up_to_created_at': now.isoformat(), 'up_to_id': first.id
+        }, format='json')
+        self.assertEqual(response.data, {'updated': 1, 'unread_count': 1})
+        self.assertFalse(Notification.objects.get(id=second.id).is_read)
+
+    def test_an_id_alone_is_not_a_watermark(self):
+        response = self.client.post(reverse('notifications-mark-read'), {'up_to_id': 1}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('up_to_id', str(response.data))
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=3600)
+class CoalescingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='popular', email='popular@example.com', password='pw')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        self.hour = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=5)
+
+    def request(self, created_at=None):
+        return notify(
+            user_id=self.user.id, notification_type=Notification.Type.SWAP_REQUEST,
+            title="New Swap Request", message="Someone wants to swap", created_at=created_at
+        )
+
+    def test_windows_follow_the_event_time(self):
+        # Delivered late, together: the events still fall in separate windows
+        self.request(self.hour + timedelta(minutes=10))
+        self.request(self.hour + timedelta(minutes=50))
+        self.request(self.hour + timedelta(minutes=70))
+        rows = list(Notification.objects.order_by('created_at').values_list('count', 'created_at'))
+        self.assertEqual(rows, [
+            (2, self.hour + timedelta(minutes=50)),
+            (1, self.hour + timedelta(minutes=70)),
+        ])
+
+    def test_read_rows_can_be_marked_unread(self):
+        first = self.request()
+        response = self.client.patch(reverse('notifications-detail', args=[first.id]), {'is_read': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        second = self.request()
+        self.assertNotEqual(second, None)
+
+        response = self.client.patch(reverse('notifications-detail', args=[first.id]), {'is_read': False}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Notification.objects.filter(is_read=False).count(), 2)
+        # New events keep merging into the row that holds the key
+        self.request()
+        second.refresh_from_db()
+        self.assertEqual(second.count, 2)
+
+    def test_repeated_conflicts_fall_back_to_a_plain_insert(self):
+        self.request()
+        # Every merge misses the row its insert then collides with
+        with mock.patch('django.db.models.query.QuerySet.update', return_value=0):
+            with self.assertLogs('notifications.coalescing', level='WARNING'):
+                fallback = self.request()
+        self.assertIsNone(fallback.coalesce_key)
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+class CompactNotificationsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='keeper', email='keeper@example.com', password='pw')
+        self.actor = User.objects.create_user(username='sender', email='sender@example.com', password='pw')
+        self.archive_dir = Path(tempfile.mkdtemp())
+
+    def add(self, days, is_read=False, **fields):
+        fields = {'notification_type': Notification.Type.SYSTEM, 'title': 'Hi', **fields}
+        notification = Notification.objects.create(user=self.user, message='Hello', is_read=is_read, **fields)
+        Notification.objects.filter(id=notification.id).update(created_at=timezone.now() - timedelta(days=days))
+        return notification
+
+    def compact(self):
+        with mock.patch('notifications.management.commands.compact_notifications.time.sleep') as sleep:
+            call_command(
+                'compact_notifications', read_days=30, archive_days=180, archive_dir=self.archive_dir,
+                chunk_size=2, stdout=StringIO()
+            )
+        return sleep.call_count
+
+    def test_old_read_rows_are_purged_and_stale_rows_archived(self):
+        fresh_read = self.add(days=1, is_read=True)
+        old_unread = self.add(days=40)
+        old_read = [self.add(days=40, is_read=True) for _ in range(3)]
+        stale = self.add(
+            days=200, notification_type=Notification.Type.SWAP_REQUEST, title='3 new swap requests',
+            count=3, actor=self.actor, coalesce_key='swap_request'
+        )
+
+        self.compact()
+        self.assertEqual(
+            set(Notification.objects.values_list('id', flat=True)), {fresh_read.id, old_unread.id}
+        )
+        self.assertFalse(Notification.objects.filter(id__in=[row.id for row in old_read]).exists())
+
+        [path] = self.archive_dir.iterdir()
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            rows = [json.loads(line) for line in archive]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], stale.id)
+        self.assertEqual(
+            (rows[0]['count'], rows[0]['actor_id'], rows[0]['coalesce_key'], rows[0]['user_id']),
+            (3, self.actor.id, 'swap_request', self.user.id)
+        )
+        self.assertEqual(set(rows[0]), {field.attname for field in Notification._meta.concrete_fields})
+
+    def test_chunks_follow_matching_ids(self):
+        old_read = [self.add(days=40, is_read=True)]
+        # Many newer rows between the old ones used to cost a pause per id range
+        for _ in range(10):
+            self.add(days=1)
+        old_read.append(self.add(days=40, is_read=True))
+
+        # One chunk of two rows, and nothing to archive
+        self.assertEqual(self.compact(), 1)
+        self.assertFalse(Notification.objects.filter(id__in=[row.id for row in old_read]).exists())
+        self.assertEqual(list(self.archive_dir.iterdir()), [])
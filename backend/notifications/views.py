@@ -1,9 +1,12 @@
+from django.db.models import Q
 from django.shortcuts import render
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import Notification
-from .serializers import NotificationSerializer, NotificationUpdateSerializer
+from .serializers import (
+    NotificationSerializer, NotificationUpdateSerializer, NotificationBulkReadSerializer
+)
 from users.permissions import IsOwnerOrAdmin, IsAdminUser
 from django.contrib.auth import get_user_model
 
@@ -15,7 +18,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created_at']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
     
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
@@ -28,9 +31,40 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Mark all notifications as read"""
-        self.get_queryset().filter(is_read=False).update(is_read=True)
+        self.get_queryset().filter(is_read=False).update(is_read=True, coalesce_key=None)
         return Response({"status": "success"}, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['post'])
+    def mark_read(self, request):
+        """
+        Mark notifications read by id list or up to a (created_at, id)
+        watermark, optionally per type. Coalesced notifications that took a
+        new event after the watermark was read move past it and stay unread.
+        """
+        serializer = NotificationBulkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        unread = self.get_queryset().filter(is_read=False)
+        if 'types' in data:
+            unread = unread.filter(notification_type__in=data['types'])
+        
+        if 'ids' in data:
+            selected = unread.filter(id__in=data['ids'])
+        elif 'up_to_id' in data:
+            watermark = data['up_to_created_at']
+            selected = unread.filter(
+                Q(created_at__lt=watermark) | Q(created_at=watermark, id__lte=data['up_to_id'])
+            )
+        else:
+            selected = unread.filter(created_at__lte=data['up_to_created_at'])
+        
+        updated = selected.update(is_read=True, coalesce_key=None)
+        return Response({
+            "updated": updated,
+            "unread_count": self.get_queryset().filter(is_read=False).count()
+        }, status=status.HTTP_200_OK)
+    
     @action(detail=False, methods=['get'])
     def unread(self, request):
         """Get only unread notifications"""
@@ -47,12 +81,15 @@ class NotificationViewSet(viewsets.ModelViewSet):
         notification_type = request.data.get('type', 'admin_message')
         if not title or not message:
             return Response({"error": "Title and message are required."}, status=status.HTTP_400_BAD_REQUEST)
-        users = User.objects.filter(is_active=True)
-        for user in users:
-            Notification.objects.create(
-                user=user,
+        user_ids = User.objects.filter(is_active=True).values_list('id', flat=True)
+        notifications = [
+            Notification(
+                user_id=user_id,
                 notification_type=notification_type,
                 title=title,
                 message=message
             )
-        return Response({"message": f"Broadcast sent to {users.count()} users."}, status=status.HTTP_200_OK)
+            for user_id in user_ids.iterator()
+        ]
+        Notification.objects.bulk_create(notifications, batch_size=500)
+        return Response({"message": f"Broadcast sent to {len(notifications)} users."}, status=status.HTTP_200_OK)
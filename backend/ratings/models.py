@@ -1,8 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from swaps.models import SwapRequest
+from users.reputation import apply_rating, compute_reputation, REPUTATION_FIELDS
 
 class Rating(models.Model):
     """
@@ -37,13 +39,64 @@ class Rating(models.Model):
         return f"{self.from_user.username} → {self.to_user.username}: {self.score}★"
         
     def save(self, *args, **kwargs):
-        """Override save to update user's average rating"""
-        super().save(*args, **kwargs)
-        # Update the recipient's rating
-        to_user = self.to_user
-        ratings = Rating.objects.filter(to_user=to_user)
-        
-        if ratings:
-            to_user.rating = sum(r.score for r in ratings) / len(ratings)
-            to_user.total_ratings = len(ratings)
-            to_user.save(update_fields=['rating', 'total_ratings'])
+        """Override save to update user's average rating and reputation"""
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Lock the recipient so concurrent ratings fold in one at a time
+            to_user = self._locked_recipient()
+            if adding:
+                # Fold the new score into the running mean and reputation in O(1)
+                to_user.rating = (to_user.rating * to_user.total_ratings + self.score) / (to_user.total_ratings + 1)
+                to_user.total_ratings += 1
+                apply_rating(to_user, self.score, self.created_at)
+            else:
+                recompute_rating(to_user)
+            self._save_recipient(to_user)
+    
+    def delete(self, *args, **kwargs):
+        """
+        Override delete to take the score back out of the recipient's rating.
+        Cascades and queryset deletes bypass this; call ``recompute_rating``
+        for the recipients or run ``recompute_reputation`` afterwards.
+        """
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            to_user = self._locked_recipient()
+            recompute_rating(to_user)
+            self._save_recipient(to_user)
+        return result
+    
+    def _locked_recipient(self):
+        return type(self.to_user).objects.select_for_update().get(pk=self.to_user_id)
+    
+    def _save_recipient(self, to_user):
+        fields = RATING_FIELDS
+        to_user.save(update_fields=fields)
+        # Keep the instance the caller holds in step with the row
+        if self._meta.get_field('to_user').is_cached(self):
+            for field in fields:
+                setattr(self.to_user, field, getattr(to_user, field))
+
+RATING_FIELDS = ['rating', 'total_ratings', *REPUTATION_FIELDS]
+
+def rating_aggregates(ratings, now):
+    """
+    Values of RATING_FIELDS for a user who received ``(score, created_at)``
+    pairs; a user without ratings gets the prior reputation
+    """
+    reputation, score_sum, weight = compute_reputation(ratings, now)
+    return {
+        'rating': sum(score for score, _ in ratings) / len(ratings) if ratings else 0.0,
+        'total_ratings': len(ratings),
+        'reputation': reputation,
+        'reputation_score_sum': score_sum,
+        'reputation_weight': weight,
+        'reputation_updated_at': now,
+    }
+
+def recompute_rating(user):
+    """Rebuild a user's mean rating and reputation from the ratings they have received"""
+    ratings = list(Rating.objects.filter(to_user=user).values_list('score', 'created_at'))
+    for field, value in rating_aggregates(ratings, timezone.now()).items():
+        setattr(user, field, value)
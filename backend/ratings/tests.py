@@ -1,3 +1,55 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from skills.models import Skill
+from swaps.models import SwapRequest
+from users.models import User
+from .models import Rating
 
-# Create your tests here.
+@override_settings(REPUTATION={'PRIOR_MEAN': 3.5, 'PRIOR_WEIGHT': 5.0, 'HALF_LIFE_DAYS': 180})
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='rated', email='rated@example.com', password='pw')
+        self.skill = Skill.objects.create(name='Rated Skill')
+
+    def rate(self, name, score, to_user=None):
+        rater = User.objects.create_user(username=name, email=f"{name}@example.com", password='pw')
+        swap = SwapRequest.objects.create(
+            from_user=rater, to_user=self.user, skill_offered=self.skill, skill_wanted=self.skill,
+            status=SwapRequest.Status.COMPLETED
+        )
+        return Rating.objects.create(from_user=rater, to_user=to_user or swap.to_user, swap_request=swap, score=score)
+
+    def test_new_ratings_fold_into_the_stored_row(self):
+        # Loaded before the first rating, as a concurrent request would have
+        stale = User.objects.get(pk=self.user.pk)
+        self.rate('rater1', 5)
+        self.rate('rater2', 2, to_user=stale)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.total_ratings, 2)
+        self.assertAlmostEqual(self.user.rating, 3.5)
+        self.assertAlmostEqual(self.user.reputation_weight, 2.0, places=3)
+        self.assertAlmostEqual(self.user.reputation, (5 * 3.5 + 7) / 7, places=3)
+
+    def test_editing_a_rating_recomputes_the_recipient(self):
+        rating = self.rate('rater1', 5)
+        self.rate('rater2', 3)
+        rating.score = 1
+        rating.save()
+
+        self.user.refresh_from_db()
+        self.assertAlmostEqual(self.user.rating, 2.0)
+        self.assertAlmostEqual(self.user.reputation, (5 * 3.5 + 4) / 7, places=3)
+
+    def test_deleting_a_rating_takes_it_back_out(self):
+        first = self.rate('rater1', 5)
+        second = self.rate('rater2', 1)
+        second.delete()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.total_ratings, 1)
+        self.assertAlmostEqual(self.user.rating, 5.0)
+        self.assertAlmostEqual(self.user.reputation, (5 * 3.5 + 5) / 6, places=3)
+
+        first.delete()
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.total_ratings, self.user.rating, self.user.reputation), (0, 0.0, 3.5))
@@ -0,0 +1,197 @@
+"""
+Related skills from co-occurrence.
+
+Two skills are related when the same users hold both. Pair counts live in a
+sparse upper-triangular matrix (SkillCooccurrence); each skill's top-K
+neighbours by cosine similarity, ``users(a, b) / sqrt(users(a) * users(b))``,
+are materialized in RelatedSkill so the API reads a handful of indexed rows.
+
+``rebuild`` recounts everything from UserSkill. ``refresh`` applies only the
+skill-set changes logged in UserSkillChange since the last run.
+"""
+import math
+from collections import Counter, defaultdict
+from itertools import combinations, groupby
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from .models import RelatedSkill, SkillCooccurrence, UserSkill, UserSkillChange
+
+DEFAULTS = {
+    'TOP_K': 10,
+    'MIN_USERS': 2,
+    'BATCH_SIZE': 2000,
+}
+
+def get_setting(name):
+    return getattr(settings, 'RELATED_SKILLS', {}).get(name, DEFAULTS[name])
+
+def user_skill_sets(user_ids=None):
+    """Yield ``(user_id, skill ids)`` with each user's distinct skills in ascending order"""
+    rows = UserSkill.objects.order_by('user_id', 'skill_id').values_list('user_id', 'skill_id').distinct()
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+    for user_id, group in groupby(rows.iterator(chunk_size=get_setting('BATCH_SIZE')), key=lambda row: row[0]):
+        yield user_id, [skill_id for _, skill_id in group]
+
+def count_pairs(skill_sets):
+    """Co-occurrence counts keyed by ``(low, high)`` skill id pairs"""
+    counts = Counter()
+    for _, skills in skill_sets:
+        # Skills are sorted, so every combination is already (low, high)
+        counts.update(combinations(skills, 2))
+    return counts
+
+def skill_popularity(skill_ids=None):
+    """Number of distinct users holding each skill"""
+    rows = UserSkill.objects.order_by().values('skill_id').annotate(users=Count('user_id', distinct=True))
+    if skill_ids is not None:
+        rows = rows.filter(skill_id__in=skill_ids)
+    return {row['skill_id']: row['users'] for row in rows}
+
+def rank_related(skill_ids=None):
+    """Recompute the top-K neighbours of the given skills (all skills by default)"""
+    pairs = SkillCooccurrence.objects.filter(users__gte=get_setting('MIN_USERS'))
+    if skill_ids is not None:
+        pairs = pairs.filter(Q(skill_low_id__in=skill_ids) | Q(skill_high_id__in=skill_ids))
+
+    neighbours = defaultdict(list)
+    for low, high, users in pairs.values_list('skill_low_id', 'skill_high_id', 'users').iterator():
+        neighbours[low].append((high, users))
+        neighbours[high].append((low, users))
+
+    targets = set(neighbours) if skill_ids is None else set(skill_ids)
+    popularity = skill_popularity(
+        None if skill_ids is None else {other for skill in targets for other, _ in neighbours[skill]} | targets
+    )
+
+    top_k = get_setting('TOP_K')
+    rows = []
+    for skill_id in targets:
+        scored = [
+            (users / math.sqrt(popularity[skill_id] * popularity[other]), users, other)
+            for other, users in neighbours[skill_id]
+            if popularity.get(skill_id) and popularity.get(other)
+        ]
+        scored.sort(key=lambda item: (-item[0], -item[1], item[2]))
+        rows.extend(
+            RelatedSkill(skill_id=skill_id, related_id=other, users=users, score=round(score, 6), rank=rank)
+            for rank, (score, users, other) in enumerate(scored[:top_k], start=1)
+        )
+
+    with transaction.atomic():
+        stale = RelatedSkill.objects.all() if skill_ids is None else RelatedSkill.objects.filter(skill_id__in=targets)
+        stale.delete()
+        RelatedSkill.objects.bulk_create(rows, batch_size=get_setting('BATCH_SIZE'))
+    return len(targets)
+
+def rebuild():
+    """Recount the whole co-occurrence matrix; returns the number of skill pairs"""
+    with transaction.atomic():
+        last_change = UserSkillChange.objects.order_by('-id').values_list('id', flat=True).first()
+        counts = count_pairs(user_skill_sets())
+        SkillCooccurrence.objects.all().delete()
+        SkillCooccurrence.objects.bulk_create(
+            (SkillCooccurrence(skill_low_id=low, skill_high_id=high, users=users) for (low, high), users in counts.items()),
+            batch_size=get_setting('BATCH_SIZE')
+        )
+        if last_change is not None:
+            UserSkillChange.objects.filter(id__lte=last_change).delete()
+    rank_related()
+    return len(counts)
+
+def skill_set_changes(changes):
+    """
+    ``(before, after)`` skill sets of each user with logged changes.
+
+    A user's set before the logged changes is their current set with each
+    logged skill restored to its state before its first change.
+    """
+    first_change = defaultdict(dict)
+    for user_id, skill_id, added in changes:
+        first_change[user_id].setdefault(skill_id, added)
+
+    current = dict(user_skill_sets(list(first_change)))
+    sets = []
+    for user_id, skills in first_change.items():
+        after = set(current.get(user_id, ()))
+        before = set(after)
+        for skill_id, added in skills.items():
+            if added:
+                before.discard(skill_id)
+            else:
+                before.add(skill_id)
+        sets.append((before, after))
+    return sets
+
+def pair_deltas(set_changes):
+    """Net pair-count changes between ``(before, after)`` skill sets"""
+    delta = Counter()
+    for before, after in set_changes:
+        delta.update(combinations(sorted(after), 2))
+        delta.subtract(combinations(sorted(before), 2))
+    return {pair: change for pair, change in delta.items() if change}
+
+def pending_deltas(changes):
+    """Net pair-count changes implied by logged skill-set changes"""
+    return pair_deltas(skill_set_changes(changes))
+
+def resized_skills(set_changes):
+    """Skills whose number of holders changed, which moves every score involving them"""
+    delta = Counter()
+    for before, after in set_changes:
+        delta.update(after - before)
+        delta.subtract(before - after)
+    return {skill_id for skill_id, change in delta.items() if change}
+
+def neighbours_of(skill_ids):
+    """Skills ranked against any of ``skill_ids``, including them"""
+    pairs = SkillCooccurrence.objects.filter(
+        Q(skill_low_id__in=skill_ids) | Q(skill_high_id__in=skill_ids), users__gte=get_setting('MIN_USERS')
+    )
+    return set(skill_ids) | {skill for pair in pairs.values_list('skill_low_id', 'skill_high_id') for skill in pair}
+
+def refresh():
+    """Apply logged UserSkill changes to the matrix; returns the number of pairs changed"""
+    with transaction.atomic():
+        changes = list(UserSkillChange.objects.order_by('id').values_list('id', 'user_id', 'skill_id', 'added'))
+        if not changes:
+            return 0
+        set_changes = skill_set_changes((user_id, skill_id, added) for _, user_id, skill_id, added in changes)
+        delta = pair_deltas(set_changes)
+
+        existing = {}
+        if delta:
+            lows = {low for low, _ in delta}
+            highs = {high for _, high in delta}
+            for row in SkillCooccurrence.objects.filter(skill_low_id__in=lows, skill_high_id__in=highs):
+                existing[(row.skill_low_id, row.skill_high_id)] = row
+
+        created, updated, emptied = [], [], []
+        for (low, high), change in delta.items():
+            row = existing.get((low, high))
+            if row is None:
+                if change > 0:
+                    created.append(SkillCooccurrence(skill_low_id=low, skill_high_id=high, users=change))
+            elif row.users + change > 0:
+                row.users += change
+                updated.append(row)
+            else:
+                emptied.append(row.pk)
+
+        batch_size = get_setting('BATCH_SIZE')
+        SkillCooccurrence.objects.bulk_create(created, batch_size=batch_size)
+        SkillCooccurrence.objects.bulk_update(updated, ['users'], batch_size=batch_size)
+        SkillCooccurrence.objects.filter(pk__in=emptied).delete()
+        # Only the rows read: a lower id committed since is applied next time
+        change_ids = [change_id for change_id, _, _, _ in changes]
+        for start in range(0, len(change_ids), batch_size):
+            UserSkillChange.objects.filter(id__in=change_ids[start:start + batch_size]).delete()
+
+    touched = {skill for pair in delta for skill in pair}
+    resized = resized_skills(set_changes)
+    if resized:
+        touched |= neighbours_of(resized)
+    if touched:
+        rank_related(touched)
+    return len(delta)
@@ -0,0 +1,314 @@
+"""
+Fuzzy skill deduplication.
+
+Free-text skill names drift ("Javascript", "Java Script", "JS"). Every
+skill carries a ``key``, its name lowercased with spaces and punctuation
+removed, so spelling variants of the same words resolve to one skill.
+Trigrams of the key are kept in SkillTrigram, an inverted index used to find
+near-duplicates by Jaccard similarity the way pg_trgm would.
+
+``merge_skills`` folds duplicates into a canonical skill: it rewrites the
+foreign keys pointing at them in chunks, records their names as SkillAlias
+rows and deletes them. ``resolve_skill`` checks keys and aliases before a
+free-text name creates a new skill.
+"""
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from .models import Skill, SkillAlias, SkillTrigram, UserSkill, UserSkillChange
+
+DEFAULTS = {
+    'SIMILARITY_THRESHOLD': 0.6,
+    'BATCH_SIZE': 2000,
+}
+
+def get_setting(name):
+    return getattr(settings, 'SKILL_DEDUP', {}).get(name, DEFAULTS[name])
+
+def skill_key(name):
+    """Lowercase, accent-free name without spaces or punctuation ("C++" and "C#" keep their symbols)"""
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return re.sub(r'[^\w+#]|_', '', name.lower())
+
+def trigrams(key):
+    """pg_trgm-style trigrams of a key, padded with two leading spaces and one trailing"""
+    if not key:
+        return set()
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def similarity(a, b):
+    """Jaccard similarity of two trigram sets"""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+def same_numbers(a, b):
+    """Whether two keys mention the same numbers; "Python 2" and "Python 3" are different skills"""
+    return re.findall(r'\d+', a) == re.findall(r'\d+', b)
+
+def index_skills(skills):
+    """Replace the trigram rows of the given skills"""
+    skills = list(skills)
+    with transaction.atomic():
+        SkillTrigram.objects.filter(skill_id__in=[skill.pk for skill in skills]).delete()
+        SkillTrigram.objects.bulk_create(
+            [SkillTrigram(skill_id=skill.pk, trigram=trigram) for skill in skills for trigram in trigrams(skill.key)],
+            batch_size=get_setting('BATCH_SIZE')
+        )
+
+def rebuild_index():
+    """Recompute every skill key and the whole trigram index; returns the number of skills"""
+    batch_size = get_setting('BATCH_SIZE')
+    with transaction.atomic():
+        skills = list(Skill.objects.only('id', 'name', 'key'))
+        for skill in skills:
+            skill.key = skill_key(skill.name)
+        Skill.objects.bulk_update(skills, ['key'], batch_size=batch_size)
+        SkillTrigram.objects.all().delete()
+        SkillTrigram.objects.bulk_create(
+            (SkillTrigram(skill_id=skill.pk, trigram=trigram) for skill in skills for trigram in trigrams(skill.key)),
+            batch_size=batch_size
+        )
+    return len(skills)
+
+def similar_skills(name, threshold=None, limit=10):
+    """
+    Skills whose names are at least ``threshold`` similar to ``name``, most
+    similar first, as ``(skill, similarity)`` pairs. One indexed query.
+    """
+    threshold = get_setting('SIMILARITY_THRESHOLD') if threshold is None else threshold
+    key = skill_key(name)
+    wanted = trigrams(key)
+    if not wanted:
+        return []
+    # Jaccard >= t needs at least t * |wanted| shared trigrams
+    candidates = Skill.objects.filter(
+        id__in=SkillTrigram.objects.filter(trigram__in=wanted).values('skill_id')
+    ).annotate(
+        shared=Count('trigrams', filter=Q(trigrams__trigram__in=wanted)),
+        size=Count('trigrams'),
+    ).filter(shared__gte=math.ceil(threshold * len(wanted)))
+
+    scored = []
+    for skill in candidates:
+        score = skill.shared / (len(wanted) + skill.size - skill.shared)
+        if score >= threshold and same_numbers(key, skill.key):
+            scored.append((skill, round(score, 3)))
+    scored.sort(key=lambda item: (-item[1], item[0].name))
+    return scored[:limit]
+
+def resolve_skill(name):
+    """
+    The skill a free-text name refers to: an existing skill with the same
+    key (preferring an exact name match), then an alias, else a new skill.
+    """
+    name = name.strip()
+    key = skill_key(name)
+    if key:
+        matches = list(Skill.objects.filter(key=key).order_by('id')[:10])
+        if matches:
+            return next((skill for skill in matches if skill.name == name), matches[0])
+        alias = SkillAlias.objects.select_related('skill').filter(key=key).first()
+        if alias:
+            return alias.skill
+    skill, _ = Skill.objects.get_or_create(name=name)
+    return skill
+
+def resolve_skills(names):
+    """
+    ``resolve_skill`` for many names at once: ``{name: skill}`` from one key
+    lookup, one alias lookup and one insert for the skills that are new.
+    Names sharing a key resolve to the same skill even when it is new.
+    """
+    from .taxonomy import add_roots
+
+    by_key = defaultdict(list)
+    for name in {name.strip() for name in names}:
+        by_key[skill_key(name)].append(name)
+    matches = defaultdict(list)
+    for skill in Skill.objects.filter(key__in=[key for key in by_key if key]).order_by('id'):
+        matches[skill.key].append(skill)
+    unmatched = [key for key in by_key if key and key not in matches]
+    if unmatched:
+        for alias in SkillAlias.objects.select_related('skill').filter(key__in=unmatched):
+            matches[alias.key].append(alias.skill)
+    # Names without a key (all punctuation) can only match by exact name
+    for skill in Skill.objects.filter(name__in=by_key.get('', [])):
+        matches[skill.name].append(skill)
+
+    resolved, new = {}, {}
+    for key, key_names in by_key.items():
+        for name in sorted(key_names):
+            candidates = matches.get(key or name)
+            if candidates:
+                resolved[name] = next((skill for skill in candidates if skill.name == name), candidates[0])
+            else:
+                # The first spelling of a new key names the skill
+                new.setdefault(key or name, name)
+    if new:
+        with transaction.atomic():
+            Skill.objects.bulk_create([Skill(name=name, key=skill_key(name)) for name in new.values()])
+            created = {skill.name: skill for skill in Skill.objects.filter(name__in=list(new.values()))}
+            SkillTrigram.objects.bulk_create(
+                [SkillTrigram(skill=skill, trigram=trigram) for skill in created.values() for trigram in trigrams(skill.key)],
+                batch_size=get_setting('BATCH_SIZE')
+            )
+            add_roots(created.values())
+        for key, key_names in by_key.items():
+            for name in key_names:
+                if name not in resolved:
+                    resolved[name] = created[new[key or name]]
+    return resolved
+
+def skill_usage():
+    """Number of UserSkill rows per skill"""
+    rows = UserSkill.objects.order_by().values('skill_id').annotate(count=Count('id'))
+    return {row['skill_id']: row['count'] for row in rows}
+
+def find_clusters(threshold=None):
+    """
+    Groups of near-duplicate skills as ``(canonical, [duplicates])``.
+
+    Candidate pairs come from the trigram index and are joined with
+    union-find; the most used skill of each group becomes canonical and only
+    members similar enough to it directly are merged, so chains of small
+    differences never merge unrelated skills.
+    """
+    threshold = get_setting('SIMILARITY_THRESHOLD') if threshold is None else threshold
+    skills = {skill.pk: skill for skill in Skill.objects.only('id', 'name', 'key')}
+    grams = defaultdict(set)
+    postings = defaultdict(list)
+    for skill_id, trigram in SkillTrigram.objects.order_by('skill_id').values_list('skill_id', 'trigram').iterator(
+        chunk_size=get_setting('BATCH_SIZE')
+    ):
+        grams[skill_id].add(trigram)
+        postings[trigram].append(skill_id)
+
+    parent = {skill_id: skill_id for skill_id in skills}
+
+    def find(skill_id):
+        while parent[skill_id] != skill_id:
+            parent[skill_id] = parent[parent[skill_id]]
+            skill_id = parent[skill_id]
+        return skill_id
+
+    for skill_id, own in grams.items():
+        shared = Counter(other for trigram in own for other in postings[trigram] if other > skill_id)
+        needed = threshold * len(own)
+        for other, count in shared.items():
+            if count < needed or other not in skills:
+                continue
+            if count / (len(own) + len(grams[other]) - count) >= threshold and same_numbers(
+                skills[skill_id].key, skills[other].key
+            ):
+                parent[find(other)] = find(skill_id)
+
+    groups = defaultdict(list)
+    for skill_id in skills:
+        groups[find(skill_id)].append(skill_id)
+
+    usage = skill_usage()
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        canonical = min(members, key=lambda skill_id: (-usage.get(skill_id, 0), skill_id))
+        duplicates = [
+            skills[skill_id] for skill_id in sorted(members)
+            if skill_id != canonical and similarity(grams[canonical], grams[skill_id]) >= threshold
+        ]
+        if duplicates:
+            clusters.append((skills[canonical], duplicates))
+    clusters.sort(key=lambda cluster: cluster[0].name)
+    return clusters
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _rewrite(queryset, field, skill, batch_size):
+    """Point ``field`` of every row in ``queryset`` at ``skill``, one UPDATE per chunk"""
+    updated = 0
+    for chunk in _chunks(list(queryset.values_list('pk', flat=True)), batch_size):
+        updated += queryset.model.objects.filter(pk__in=chunk).update(**{field: skill})
+    return updated
+
+def merge_skills(canonical, duplicates, batch_size=None):
+    """
+    Fold ``duplicates`` into ``canonical`` in one transaction.
+
+    Profile skills move to the canonical skill unless the user already holds
+    it with the same type, in which case the duplicate row is dropped. Swap
+    requests and ring suggestions are repointed, sub-skills move under the
+    canonical skill, duplicate names become aliases, and the duplicates are
+    deleted. Returns per-table row counts.
+    """
+    from swaps.models import SwapRequest, SwapRingMember
+    from .taxonomy import detach_skills
+
+    batch_size = batch_size or get_setting('BATCH_SIZE')
+    duplicate_ids = [skill.pk for skill in duplicates if skill.pk != canonical.pk]
+    counts = Counter()
+    with transaction.atomic():
+        rows = list(
+            UserSkill.objects.filter(skill_id__in=duplicate_ids).order_by('id')
+            .values_list('id', 'user_id', 'skill_id', 'skill_type')
+        )
+        for chunk in _chunks(rows, batch_size):
+            held = set(
+                UserSkill.objects.filter(skill=canonical, user_id__in={user_id for _, user_id, _, _ in chunk})
+                .values_list('user_id', 'skill_type')
+            )
+            holders = {user_id for user_id, _ in held}
+            moved, dropped, changes = [], [], []
+            for pk, user_id, skill_id, skill_type in chunk:
+                # Neither update() nor queryset deletes log the change for the related-skills refresh
+                changes.append(UserSkillChange(user_id=user_id, skill_id=skill_id, added=False))
+                if (user_id, skill_type) in held:
+                    dropped.append(pk)
+                    continue
+                moved.append(pk)
+                held.add((user_id, skill_type))
+                if user_id not in holders:
+                    changes.append(UserSkillChange(user_id=user_id, skill_id=canonical.pk, added=True))
+                    holders.add(user_id)
+            counts['user_skills'] += UserSkill.objects.filter(pk__in=moved).update(skill=canonical)
+            UserSkillChange.objects.bulk_create(changes)
+            UserSkill.objects.filter(pk__in=dropped).delete()
+            counts['user_skills_dropped'] += len(dropped)
+
+        for field in ['skill_offered', 'skill_wanted']:
+            counts['swap_requests'] += _rewrite(
+                SwapRequest.objects.filter(**{f'{field}_id__in': duplicate_ids}), field, canonical, batch_size
+            )
+        counts['ring_members'] += _rewrite(
+            SwapRingMember.objects.filter(teaches_id__in=duplicate_ids), 'teaches', canonical, batch_size
+        )
+
+        detach_skills(duplicate_ids, canonical)
+        SkillAlias.objects.filter(skill_id__in=duplicate_ids).update(skill=canonical)
+        aliases = [
+            SkillAlias(key=skill.key, name=skill.name, skill=canonical)
+            for skill in duplicates if skill.pk != canonical.pk and skill.key and skill.key != canonical.key
+        ]
+        SkillAlias.objects.bulk_create(aliases, ignore_conflicts=True)
+        counts['aliases'] += len(aliases)
+        Skill.objects.filter(pk__in=duplicate_ids).delete()
+        counts['skills'] += len(duplicate_ids)
+    return counts
+
+def add_alias(alias, skill):
+    """Map another spelling to ``skill``; merges an existing skill with that spelling into it"""
+    key = skill_key(alias)
+    existing = [other for other in Skill.objects.filter(key=key) if other.pk != skill.pk]
+    counts = merge_skills(skill, existing) if existing else Counter()
+    if key != skill.key:
+        SkillAlias.objects.update_or_create(key=key, defaults={'name': alias.strip(), 'skill': skill})
+    return counts
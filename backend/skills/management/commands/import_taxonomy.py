@@ -0,0 +1,37 @@
+import time
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from skills.taxonomy import import_taxonomy, parse_taxonomy, rebuild_closure
+
+class Command(BaseCommand):
+    help = 'Load a skill taxonomy ("Parent > Child > Grandchild" per line) and rebuild the closure table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='Taxonomy file, e.g. skills/data/taxonomy.txt')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without importing it')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Only recompute the closure table from the current parent links')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            if options['rebuild']:
+                rows = rebuild_closure()
+                self.stdout.write(f"Rebuilt {rows} closure rows in {time.monotonic() - started:.2f}s")
+                return
+            if not options['path']:
+                raise CommandError('A taxonomy file is required unless --rebuild is given')
+            with open(options['path'], encoding='utf-8') as handle:
+                lines = handle.readlines()
+            if options['dry_run']:
+                parents, names = parse_taxonomy(lines)
+                self.stdout.write(f"{len(names)} skills, {len(parents)} parent links (dry run)")
+                return
+            created, moved = import_taxonomy(lines)
+        except OSError as e:
+            raise CommandError(e)
+        except ValidationError as e:
+            raise CommandError('; '.join(e.messages))
+        self.stdout.write(
+            f"Created {created} skills and set {moved} parents in {time.monotonic() - started:.2f}s"
+        )
@@ -0,0 +1,52 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from skills.cooccurrence import rebuild as rebuild_related_skills
+from skills.dedup import add_alias, find_clusters, merge_skills, rebuild_index, skill_key
+from skills.models import Skill
+
+class Command(BaseCommand):
+    help = 'Merge near-duplicate skills (by trigram similarity) and explicit aliases into canonical skills'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float,
+                            help='Minimum trigram similarity (default SKILL_DEDUP["SIMILARITY_THRESHOLD"])')
+        parser.add_argument('--alias', action='append', default=[], metavar='ALIAS=SKILL',
+                            help='Map another spelling to an existing skill, merging any skill with that spelling '
+                                 '(e.g. --alias "JS=JavaScript"); repeatable')
+        parser.add_argument('--batch-size', type=int, help='Rows rewritten per UPDATE')
+        parser.add_argument('--reindex', action='store_true', help='Rebuild skill keys and the trigram index first')
+        parser.add_argument('--dry-run', action='store_true', help='List the clusters without merging')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['reindex']:
+            self.stdout.write(f"Indexed {rebuild_index()} skills")
+
+        aliases = []
+        for value in options['alias']:
+            alias, _, target = value.partition('=')
+            skill = Skill.objects.filter(key=skill_key(target)).order_by('id').first()
+            if not alias.strip() or skill is None:
+                raise CommandError(f"Invalid alias '{value}': expected ALIAS=SKILL with an existing skill")
+            aliases.append((alias.strip(), skill))
+
+        clusters = find_clusters(options['threshold'])
+        for canonical, duplicates in clusters:
+            self.stdout.write(f"{canonical.name} <- {', '.join(skill.name for skill in duplicates)}")
+        if options['dry_run']:
+            self.stdout.write(f"{len(clusters)} clusters, {len(aliases)} aliases (dry run)")
+            return
+
+        totals = {}
+        for alias, skill in aliases:
+            for table, count in add_alias(alias, skill).items():
+                totals[table] = totals.get(table, 0) + count
+        for canonical, duplicates in clusters:
+            for table, count in merge_skills(canonical, duplicates, options['batch_size']).items():
+                totals[table] = totals.get(table, 0) + count
+        if totals.get('skills'):
+            # Merges rewrite UserSkill in bulk, so recount co-occurrence from scratch
+            rebuild_related_skills()
+
+        summary = ', '.join(f"{table} {count}" for table, count in sorted(totals.items())) or 'nothing to merge'
+        self.stdout.write(f"Merged {len(clusters)} clusters ({summary}) in {time.monotonic() - started:.2f}s")
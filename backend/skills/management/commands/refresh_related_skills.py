@@ -0,0 +1,19 @@
+import time
+from django.core.management.base import BaseCommand
+from skills.cooccurrence import rebuild, refresh
+
+class Command(BaseCommand):
+    help = 'Update skill co-occurrence counts and related-skill rankings from recent UserSkill changes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Recount the whole co-occurrence matrix instead of applying logged changes')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['full']:
+            pairs = rebuild()
+            self.stdout.write(f"Rebuilt {pairs} skill pairs in {time.monotonic() - started:.2f}s")
+        else:
+            pairs = refresh()
+            self.stdout.write(f"Updated {pairs} skill pairs in {time.monotonic() - started:.2f}s")
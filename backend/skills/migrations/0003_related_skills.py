@@ -0,0 +1,54 @@
+# Generated by Django 4.2 on 2026-10-19 09:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSkillChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('added', models.BooleanField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='skills.skill')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RelatedSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('users', models.PositiveIntegerField(help_text='Users holding both skills')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='skills.skill')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_skills', to='skills.skill')),
+            ],
+            options={
+                'ordering': ['skill', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('skill', 'rank'), name='related_skill_rank_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SkillCooccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('users', models.PositiveIntegerField(default=0)),
+                ('skill_high', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='skills.skill')),
+                ('skill_low', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='skills.skill')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['skill_high'], name='skill_cooc_high_idx')],
+                'constraints': [models.UniqueConstraint(fields=('skill_low', 'skill_high'), name='skill_cooccurrence_pair_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2 on 2026-10-19 10:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_existing_skills(apps, schema_editor):
+    from skills.dedup import skill_key, trigrams
+    Skill = apps.get_model('skills', 'Skill')
+    SkillTrigram = apps.get_model('skills', 'SkillTrigram')
+    skills = list(Skill.objects.all())
+    for skill in skills:
+        skill.key = skill_key(skill.name)
+    Skill.objects.bulk_update(skills, ['key'], batch_size=2000)
+    SkillTrigram.objects.bulk_create(
+        [SkillTrigram(skill=skill, trigram=trigram) for skill in skills for trigram in trigrams(skill.key)],
+        batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0003_related_skills'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.CreateModel(
+            name='SkillAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Normalized alias, see skills/dedup.py', max_length=100, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='skills.skill')),
+            ],
+            options={
+                'verbose_name_plural': 'skill aliases',
+            },
+        ),
+        migrations.CreateModel(
+            name='SkillTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='skills.skill')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('trigram', 'skill'), name='skill_trigram_uniq')],
+            },
+        ),
+        migrations.RunPython(index_existing_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-19 10:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    # Every existing skill is a root, so the closure is just the self rows
+    Skill = apps.get_model('skills', 'Skill')
+    SkillClosure = apps.get_model('skills', 'SkillClosure')
+    SkillClosure.objects.bulk_create(
+        [SkillClosure(ancestor_id=pk, descendant_id=pk, depth=0) for pk in Skill.objects.values_list('pk', flat=True)],
+        batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0004_skill_dedup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='skills.skill'),
+        ),
+        migrations.CreateModel(
+            name='SkillClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='skills.skill')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='skills.skill')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='skill_closure_desc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='skill_closure_pair_uniq')],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
@@ -7,11 +9,53 @@ class Skill(models.Model):
     Skill model for the platform
     """
     name = models.CharField(max_length=100, unique=True)
+    # Case-, space- and punctuation-insensitive form of the name (see skills/dedup.py)
+    key = models.CharField(max_length=100, db_index=True, editable=False, default='')
+    # Taxonomy; SkillClosure follows changes made through save()
+    parent = models.ForeignKey('self', on_delete=models.SET_NULL, blank=True, null=True, related_name='children')
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return self.name
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_parent_id = instance.__dict__.get('parent_id')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        from .dedup import index_skills, skill_key, trigrams
+        from .taxonomy import add_to_closure, move_in_closure
+        adding = self._state.adding
+        renamed = not adding and self.key != skill_key(self.name)
+        self.key = skill_key(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'key'}
+        moved = (
+            not adding and (update_fields is None or 'parent' in update_fields)
+            and self.parent_id != getattr(self, '_loaded_parent_id', self.parent_id)
+        )
+        if moved:
+            with transaction.atomic():
+                move_in_closure(self, self.parent_id)
+                super().save(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+        self._loaded_parent_id = self.parent_id
+        # Keep the trigram index and taxonomy closure in step
+        if adding:
+            SkillTrigram.objects.bulk_create([SkillTrigram(skill=self, trigram=trigram) for trigram in trigrams(self.key)])
+            add_to_closure(self)
+        elif renamed:
+            index_skills([self])
+    
+    def delete(self, *args, **kwargs):
+        from .taxonomy import detach_skills
+        detach_skills([self.pk])
+        return super().delete(*args, **kwargs)
 
 class UserSkill(models.Model):
     """
@@ -46,3 +90,128 @@ class UserSkill(models.Model):
         
     def __str__(self):
         return f"{self.user.username} - {self.skill.name} ({self.get_skill_type_display()})"
+    
+    def _holds_skill_otherwise(self):
+        return UserSkill.objects.filter(user_id=self.user_id, skill_id=self.skill_id).exclude(pk=self.pk).exists()
+    
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        # Log skill-set changes for the incremental related-skills refresh
+        if adding and not self._holds_skill_otherwise():
+            UserSkillChange.objects.create(user_id=self.user_id, skill_id=self.skill_id, added=True)
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        if not self._holds_skill_otherwise():
+            UserSkillChange.objects.create(user_id=self.user_id, skill_id=self.skill_id, added=False)
+        return result
+
+def _log_removals(user_skills):
+    UserSkillChange.objects.bulk_create(
+        UserSkillChange(user_id=user_id, skill_id=skill_id, added=False)
+        for user_id, skill_id in user_skills.order_by().values_list('user_id', 'skill_id').distinct()
+    )
+
+# Cascades bypass UserSkill.delete(), so deleting a user or a skill logs the
+# removals up front, in one insert. Queryset deletes of UserSkill rows must
+# log theirs as well (see UserSkillBulkSerializer and merge_skills).
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def log_user_removal(sender, instance, **kwargs):
+    _log_removals(UserSkill.objects.filter(user_id=instance.pk))
+
+@receiver(pre_delete, sender=Skill)
+def log_skill_removal(sender, instance, **kwargs):
+    _log_removals(UserSkill.objects.filter(skill_id=instance.pk))
+
+class UserSkillChange(models.Model):
+    """
+    A skill entering or leaving a user's skill set, consumed by
+    ``refresh_related_skills`` to update co-occurrence counts incrementally.
+    Entries outlive the user or skill they name, whose removal they record.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+'
+    )
+    skill = models.ForeignKey(Skill, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    added = models.BooleanField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+class SkillCooccurrence(models.Model):
+    """
+    Sparse upper-triangular skill x skill matrix: the number of users whose
+    skill set (offered or wanted) contains both skills
+    """
+    skill_low = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='+')
+    skill_high = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='+')
+    users = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['skill_low', 'skill_high'], name='skill_cooccurrence_pair_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['skill_high'], name='skill_cooc_high_idx'),
+        ]
+
+class RelatedSkill(models.Model):
+    """
+    Top-K co-occurring neighbours of a skill, ranked by cosine similarity
+    """
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='related_skills')
+    related = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='+')
+    users = models.PositiveIntegerField(help_text=_('Users holding both skills'))
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        ordering = ['skill', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['skill', 'rank'], name='related_skill_rank_uniq'),
+        ]
+
+class SkillAlias(models.Model):
+    """
+    Another spelling of a skill ("JS" for JavaScript), recorded when skills are
+    merged and checked before a free-text skill name creates a new skill
+    """
+    key = models.CharField(max_length=100, unique=True, help_text=_('Normalized alias, see skills/dedup.py'))
+    name = models.CharField(max_length=100)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='aliases')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name_plural = 'skill aliases'
+    
+    def __str__(self):
+        return f"{self.name} -> {self.skill.name}"
+
+class SkillTrigram(models.Model):
+    """
+    Inverted trigram index over skill names for similarity lookups (SQLite
+    has no pg_trgm)
+    """
+    trigram = models.CharField(max_length=3)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='trigrams')
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['trigram', 'skill'], name='skill_trigram_uniq'),
+        ]
+
+class SkillClosure(models.Model):
+    """
+    Transitive closure of the skill taxonomy: one row for every ancestor and
+    descendant pair, including each skill paired with itself at depth 0
+    """
+    ancestor = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='skill_closure_pair_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'ancestor'], name='skill_closure_desc_idx'),
+        ]
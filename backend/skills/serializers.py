@@ -1,11 +1,38 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Skill, UserSkill
+from .dedup import resolve_skill, resolve_skills
+from .models import RelatedSkill, Skill, UserSkill, UserSkillChange
 
 class SkillSerializer(serializers.ModelSerializer):
     class Meta:
         model = Skill
-        fields = ['id', 'name', 'description', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'name', 'description', 'parent', 'created_at']
+        read_only_fields = ['id', 'parent', 'created_at']
+
+class PopularSkillSerializer(SkillSerializer):
+    usage = serializers.IntegerField(read_only=True, help_text='Distinct users holding the skill')
+    
+    class Meta(SkillSerializer.Meta):
+        fields = SkillSerializer.Meta.fields + ['usage']
+
+class RelatedSkillSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='related.id', read_only=True)
+    name = serializers.CharField(source='related.name', read_only=True)
+    
+    class Meta:
+        model = RelatedSkill
+        fields = ['id', 'name', 'users', 'score']
+
+class SkillNodeSerializer(serializers.ModelSerializer):
+    """A skill in a taxonomy listing, with its distance from the skill asked about"""
+    depth = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = Skill
+        fields = ['id', 'name', 'parent', 'depth']
+
+class SkillMoveSerializer(serializers.Serializer):
+    parent = serializers.PrimaryKeyRelatedField(queryset=Skill.objects.all(), allow_null=True)
 
 class UserSkillCreateSerializer(serializers.ModelSerializer):
     skill_name = serializers.CharField(write_only=True)
@@ -16,10 +43,10 @@ class UserSkillCreateSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         skill_name = validated_data.pop('skill_name')
-        user = self.context['request'].user
+        user = validated_data.pop('user', None) or self.context['request'].user
         
-        # Get or create the skill
-        skill, _ = Skill.objects.get_or_create(name=skill_name)
+        # Reuse an existing spelling or alias of the skill before creating one
+        skill = resolve_skill(skill_name)
         
         # Check if user already has this skill with this type
         existing = UserSkill.objects.filter(
@@ -42,6 +69,64 @@ class UserSkillCreateSerializer(serializers.ModelSerializer):
             **validated_data
         )
 
+class UserSkillItemSerializer(serializers.Serializer):
+    """One skill of a bulk profile update; omitted fields keep their current value"""
+    skill_name = serializers.CharField(max_length=100)
+    proficiency = serializers.ChoiceField(choices=UserSkill._meta.get_field('proficiency').choices, required=False)
+    description = serializers.CharField(allow_blank=True, allow_null=True, required=False)
+
+class UserSkillBulkSerializer(serializers.Serializer):
+    """
+    The complete offered and wanted skill sets of a user. Saving diffs them
+    against the stored rows and applies the difference with one insert, one
+    update and one delete.
+    """
+    offered = UserSkillItemSerializer(many=True)
+    wanted = UserSkillItemSerializer(many=True)
+    
+    def apply(self, user):
+        """Bring ``user``'s skills in line with the validated data; returns change counts"""
+        with transaction.atomic():
+            names = [item['skill_name'] for items in self.validated_data.values() for item in items]
+            skills = resolve_skills(names)
+            desired = {}
+            for skill_type, items in self.validated_data.items():
+                for item in items:
+                    # Later entries for the same skill win
+                    fields = {key: value for key, value in item.items() if key != 'skill_name'}
+                    desired.setdefault((skills[item['skill_name'].strip()].pk, skill_type), {}).update(fields)
+            
+            current = {
+                (row.skill_id, row.skill_type): row
+                for row in UserSkill.objects.select_for_update().filter(user=user)
+            }
+            created = [
+                UserSkill(user=user, skill_id=skill_id, skill_type=skill_type, **fields)
+                for (skill_id, skill_type), fields in desired.items() if (skill_id, skill_type) not in current
+            ]
+            updated = []
+            for key, fields in desired.items():
+                row = current.get(key)
+                if row and any(getattr(row, attr) != value for attr, value in fields.items()):
+                    for attr, value in fields.items():
+                        setattr(row, attr, value)
+                    updated.append(row)
+            deleted = [row.pk for key, row in current.items() if key not in desired]
+            
+            UserSkill.objects.bulk_create(created)
+            UserSkill.objects.bulk_update(updated, ['proficiency', 'description'])
+            UserSkill.objects.filter(pk__in=deleted).delete()
+            
+            # bulk_create and queryset deletes bypass UserSkill.save()/delete(),
+            # so log skill-set changes for the related-skills refresh here
+            before = {skill_id for skill_id, _ in current}
+            after = {skill_id for skill_id, _ in desired}
+            UserSkillChange.objects.bulk_create(
+                [UserSkillChange(user=user, skill_id=skill_id, added=True) for skill_id in after - before]
+                + [UserSkillChange(user=user, skill_id=skill_id, added=False) for skill_id in before - after]
+            )
+        return {'created': len(created), 'updated': len(updated), 'deleted': len(deleted)}
+
 class UserSkillDetailSerializer(serializers.ModelSerializer):
     skill_name = serializers.CharField(source='skill.name')
     proficiency_display = serializers.CharField(source='get_proficiency_display')
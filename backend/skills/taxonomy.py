@@ -0,0 +1,194 @@
+"""
+Hierarchical skill taxonomy.
+
+``Skill.parent`` holds the tree and SkillClosure its transitive closure:
+one row per (ancestor, descendant) pair, with every skill its own ancestor
+at depth 0. "Everything under Web Development" or "everything above React"
+is then a single indexed lookup instead of a recursive walk, so skill
+filters, matching and popularity roll-ups stay one join deep.
+
+New skills and moves update the closure incrementally; ``import_taxonomy``
+loads a whole tree from a file and rebuilds it in bulk.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from .dedup import index_skills, skill_key
+from .models import Skill, SkillAlias, SkillClosure
+
+DEFAULTS = {
+    'SEPARATOR': '>',
+    'BATCH_SIZE': 2000,
+}
+
+def get_setting(name):
+    return getattr(settings, 'SKILL_TAXONOMY', {}).get(name, DEFAULTS[name])
+
+def descendant_ids(ancestor_ids):
+    """Subquery of the given skills and everything under them"""
+    return SkillClosure.objects.filter(ancestor_id__in=ancestor_ids).values('descendant_id')
+
+def ancestor_ids(descendant_ids):
+    """Subquery of the given skills and everything above them"""
+    return SkillClosure.objects.filter(descendant_id__in=descendant_ids).values('ancestor_id')
+
+def descendants_of_name(name):
+    """Subquery of the skill named ``name`` (by key) and everything under it"""
+    return SkillClosure.objects.filter(ancestor__key=skill_key(name)).values('descendant_id')
+
+def add_to_closure(skill):
+    """Closure rows for a new skill: itself, plus its parent's ancestors one level further up"""
+    rows = [SkillClosure(ancestor_id=skill.pk, descendant_id=skill.pk, depth=0)]
+    if skill.parent_id:
+        rows += [
+            SkillClosure(ancestor_id=ancestor, descendant_id=skill.pk, depth=depth + 1)
+            for ancestor, depth in SkillClosure.objects.filter(descendant_id=skill.parent_id)
+            .values_list('ancestor_id', 'depth')
+        ]
+    SkillClosure.objects.bulk_create(rows)
+
+def add_roots(skills):
+    """Closure rows for parentless skills created with bulk_create, which bypasses save()"""
+    SkillClosure.objects.bulk_create(
+        [SkillClosure(ancestor_id=skill.pk, descendant_id=skill.pk, depth=0) for skill in skills],
+        batch_size=get_setting('BATCH_SIZE')
+    )
+
+def move_in_closure(skill, parent_id):
+    """
+    Re-link ``skill`` and its subtree under ``parent_id`` (None for the root)
+    in the closure table. Skill.save() calls this inside the transaction that
+    saves ``Skill.parent``.
+
+    Paths from the old ancestors into the subtree are deleted and paths from
+    the new parent's ancestors are added, so the cost is proportional to the
+    subtree and the new ancestry, not the whole taxonomy.
+    """
+    subtree = SkillClosure.objects.filter(ancestor_id=skill.pk)
+    if parent_id is not None and subtree.filter(descendant_id=parent_id).exists():
+        raise ValidationError(f"Cannot move '{skill.name}' under itself or one of its descendants.")
+    members = subtree.values('descendant_id')
+    SkillClosure.objects.filter(descendant_id__in=members).exclude(ancestor_id__in=members).delete()
+    if parent_id is not None:
+        ancestors = list(SkillClosure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth'))
+        descendants = list(subtree.values_list('descendant_id', 'depth'))
+        SkillClosure.objects.bulk_create(
+            (
+                SkillClosure(ancestor_id=ancestor, descendant_id=descendant, depth=above + below + 1)
+                for ancestor, above in ancestors for descendant, below in descendants
+            ),
+            batch_size=get_setting('BATCH_SIZE')
+        )
+
+def move_skill(skill, parent):
+    """Move ``skill`` (with its subtree) under ``parent``, or to the root when None"""
+    previous = skill.parent_id
+    skill.parent = parent
+    try:
+        skill.save(update_fields=['parent'])
+    except ValidationError:
+        skill.parent_id = previous
+        raise
+
+def detach_skills(skill_ids, new_parent=None):
+    """
+    Re-home the children of skills about to be deleted: under ``new_parent``
+    when it is outside the child's subtree, else under the nearest surviving
+    ancestor.
+    """
+    skill_ids = set(skill_ids)
+    children = list(Skill.objects.filter(parent_id__in=skill_ids).exclude(pk__in=skill_ids))
+    if not children:
+        return
+    surviving = {}
+    for descendant, ancestor in (
+        SkillClosure.objects.filter(descendant_id__in=skill_ids).exclude(ancestor_id__in=skill_ids)
+        .order_by('descendant_id', '-depth').values_list('descendant_id', 'ancestor_id')
+    ):
+        # Ordered deepest ancestor last, so the nearest one wins
+        surviving[descendant] = ancestor
+    for child in children:
+        parent_id = surviving.get(child.parent_id)
+        if new_parent is not None and not SkillClosure.objects.filter(
+            ancestor_id=child.pk, descendant_id=new_parent.pk
+        ).exists():
+            parent_id = new_parent.pk
+        child.parent_id = parent_id
+        child.save(update_fields=['parent'])
+
+def rebuild_closure():
+    """Recompute the whole closure table from ``Skill.parent``; returns the number of rows"""
+    parents = dict(Skill.objects.values_list('id', 'parent_id'))
+    rows = []
+    for skill_id in parents:
+        ancestor, depth, seen = skill_id, 0, set()
+        while ancestor is not None:
+            if ancestor in seen:
+                raise ValidationError(f"Skill taxonomy has a cycle through skill {ancestor}.")
+            seen.add(ancestor)
+            rows.append(SkillClosure(ancestor_id=ancestor, descendant_id=skill_id, depth=depth))
+            ancestor, depth = parents.get(ancestor), depth + 1
+    with transaction.atomic():
+        SkillClosure.objects.all().delete()
+        SkillClosure.objects.bulk_create(rows, batch_size=get_setting('BATCH_SIZE'))
+    return len(rows)
+
+def parse_taxonomy(lines):
+    """
+    Parent links from taxonomy lines of the form ``Technology > Programming > Python``.
+
+    Returns ``{child key: parent key}`` and ``{key: name as first written}``
+    (see skills/dedup.py for keys); blank lines and ``#`` comments are skipped. A skill given two
+    different parents is an error.
+    """
+    separator = get_setting('SEPARATOR')
+    parents, names, errors = {}, {}, []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        path = [part.strip() for part in line.split(separator)]
+        if not all(path):
+            errors.append(f"line {number}: empty skill name")
+            continue
+        for name in path:
+            names.setdefault(skill_key(name), name)
+        for parent, child in zip(path, path[1:]):
+            key = skill_key(child)
+            if parents.get(key, skill_key(parent)) != skill_key(parent):
+                errors.append(f"line {number}: '{child}' already has parent '{names[parents[key]]}'")
+            parents[key] = skill_key(parent)
+    if errors:
+        raise ValidationError(errors)
+    return parents, names
+
+def import_taxonomy(lines):
+    """
+    Create missing skills and set parents from taxonomy lines, then rebuild
+    the closure. Names resolve through skill keys and aliases, so the file
+    can use any known spelling. Returns ``(skills created, parents set)``.
+    """
+    parents, names = parse_taxonomy(lines)
+    batch_size = get_setting('BATCH_SIZE')
+    with transaction.atomic():
+        by_key = {}
+        for skill in Skill.objects.filter(key__in=list(names)).order_by('-id'):
+            by_key[skill.key] = skill
+        for alias in SkillAlias.objects.filter(key__in=[key for key in names if key not in by_key]).select_related('skill'):
+            by_key[alias.key] = alias.skill
+
+        missing = [Skill(name=name, key=key) for key, name in names.items() if key not in by_key]
+        Skill.objects.bulk_create(missing, batch_size=batch_size)
+        created = list(Skill.objects.filter(name__in=[skill.name for skill in missing]))
+        index_skills(created)
+        by_key.update((skill.key, skill) for skill in created)
+
+        changed = []
+        for key, parent_key in parents.items():
+            skill, parent = by_key[key], by_key[parent_key]
+            if skill.parent_id != parent.pk:
+                skill.parent_id = parent.pk
+                changed.append(skill)
+        Skill.objects.bulk_update(changed, ['parent'], batch_size=batch_size)
+        rebuild_closure()
+    return len(created), len(changed)
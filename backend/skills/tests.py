@@ -1,3 +1,254 @@
+from unittest import mock
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import User
+from . import cooccurrence
+from .cooccurrence import pending_deltas, rebuild, refresh
+from swaps.models import SwapRequest, SwapRing, SwapRingMember
+from .dedup import find_clusters, merge_skills, resolve_skills, similar_skills
+from .models import RelatedSkill, SkillAlias, SkillCooccurrence, Skill, UserSkill, UserSkillChange
 
-# Create your tests here.
+OFFERED, WANTED = UserSkill.SkillType.OFFERED, UserSkill.SkillType.WANTED
+
+class CooccurrenceRefreshTests(TestCase):
+    def setUp(self):
+        self.python, self.django, self.guitar, self.piano = (
+            Skill.objects.create(name=name) for name in ['Python', 'Django', 'Guitar', 'Piano']
+        )
+        self.ann = self.make_user('ann', [self.python, self.django, self.guitar])
+        self.bob = self.make_user('bob', [self.python, self.django])
+        rebuild()
+
+    def make_user(self, name, skills, skill_type=OFFERED):
+        user = User.objects.create_user(username=name, email=f"{name}@example.com", password='pw')
+        for skill in skills:
+            UserSkill.objects.create(user=user, skill=skill, skill_type=skill_type)
+        return user
+
+    def matrix(self):
+        return dict(
+            ((low, high), users) for low, high, users
+            in SkillCooccurrence.objects.values_list('skill_low_id', 'skill_high_id', 'users')
+        )
+
+    def assert_refresh_matches_rebuild(self):
+        refresh()
+        self.assertFalse(UserSkillChange.objects.exists())
+        refreshed = self.matrix()
+        rebuild()
+        self.assertEqual(refreshed, self.matrix())
+
+    def related(self):
+        return list(RelatedSkill.objects.values_list('skill_id', 'related_id', 'users', 'score', 'rank'))
+
+    def pair(self, first, second):
+        return tuple(sorted([first.pk, second.pk]))
+
+    def test_pending_deltas_compare_against_the_set_before_the_first_change(self):
+        UserSkill.objects.get(user=self.bob, skill=self.django).delete()
+        UserSkill.objects.create(user=self.bob, skill=self.guitar, skill_type=WANTED)
+        # Removed and added back, under another type: no change overall
+        UserSkill.objects.get(user=self.ann, skill=self.python).delete()
+        UserSkill.objects.create(user=self.ann, skill=self.python, skill_type=WANTED)
+
+        changes = UserSkillChange.objects.order_by('id').values_list('user_id', 'skill_id', 'added')
+        self.assertEqual(pending_deltas(changes), {
+            self.pair(self.python, self.django): -1,
+            self.pair(self.python, self.guitar): 1,
+        })
+
+    def test_bulk_replacement_is_logged(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.ann).access_token}")
+        response = client.put(reverse('user-skills-bulk'), {
+            'offered': [{'skill_name': 'Python'}], 'wanted': [{'skill_name': 'Piano'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assert_refresh_matches_rebuild()
+        self.assertEqual(self.matrix()[self.pair(self.python, self.django)], 1)
+        self.assertEqual(self.matrix()[self.pair(self.python, self.piano)], 1)
+
+    def test_deleting_a_user_takes_their_pairs_out(self):
+        self.make_user('cy', [self.guitar, self.piano])
+        self.ann.delete()
+        self.assert_refresh_matches_rebuild()
+        self.assertEqual(self.matrix()[self.pair(self.python, self.django)], 1)
+
+    def test_deleting_a_skill_leaves_the_other_pairs_alone(self):
+        self.guitar.delete()
+        self.assert_refresh_matches_rebuild()
+
+    def test_merged_skills_move_their_pairs(self):
+        pyhton = Skill.objects.create(name='Pyhton')
+        self.make_user('cy', [pyhton, self.guitar])
+        UserSkill.objects.create(user=self.bob, skill=pyhton, skill_type=WANTED)
+        refresh()
+        merge_skills(self.python, [pyhton])
+        self.assert_refresh_matches_rebuild()
+        self.assertEqual(self.matrix()[self.pair(self.python, self.guitar)], 2)
+
+    def test_changes_committed_during_a_refresh_are_kept(self):
+        UserSkill.objects.create(user=self.bob, skill=self.guitar, skill_type=WANTED)
+        read = UserSkillChange.objects.get()
+        UserSkillChange.objects.filter(pk=read.pk).update(id=read.pk + 100)
+        original = cooccurrence.skill_set_changes
+
+        def change_meanwhile(changes):
+            # Another transaction logs a change under a lower id than the last one read
+            sets = original(changes)
+            UserSkill.objects.create(user=self.ann, skill=self.piano, skill_type=WANTED)
+            UserSkillChange.objects.filter(user=self.ann, skill=self.piano).update(id=read.pk + 50)
+            return sets
+
+        with mock.patch.object(cooccurrence, 'skill_set_changes', side_effect=change_meanwhile):
+            refresh()
+        self.assertEqual(list(UserSkillChange.objects.values_list('id', flat=True)), [read.pk + 50])
+        self.assert_refresh_matches_rebuild()
+
+    def test_popularity_changes_rerank_related_skills(self):
+        # No new pairs, but Django is now held by more users
+        self.make_user('cy', [self.django])
+        self.make_user('dee', [self.django])
+        refresh()
+        refreshed = self.related()
+        rebuild()
+        self.assertEqual(refreshed, self.related())
+        self.assertAlmostEqual(
+            RelatedSkill.objects.get(skill=self.python, related=self.django).score, round(2 / (2 * 4) ** 0.5, 6)
+        )
+
+class UserSkillBulkTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='dee', email='dee@example.com', password='pw')
+        self.python, self.django, self.guitar = (
+            Skill.objects.create(name=name) for name in ['Python', 'Django', 'Guitar']
+        )
+        UserSkill.objects.create(user=self.user, skill=self.python, skill_type=OFFERED, proficiency=2)
+        UserSkill.objects.create(user=self.user, skill=self.django, skill_type=OFFERED, proficiency=3)
+        UserSkill.objects.create(user=self.user, skill=self.guitar, skill_type=WANTED)
+        UserSkillChange.objects.all().delete()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+    def put(self, offered, wanted):
+        return self.client.put(reverse('user-skills-bulk'), {'offered': offered, 'wanted': wanted}, format='json')
+
+    def skills(self):
+        return set(UserSkill.objects.filter(user=self.user).values_list('skill__name', 'skill_type', 'proficiency'))
+
+    def test_counts_come_from_the_diff(self):
+        response = self.put(
+            # Python changes, Django is unchanged and Guitar moves from wanted to offered
+            [{'skill_name': 'Python', 'proficiency': 4}, {'skill_name': 'Django', 'proficiency': 3},
+             {'skill_name': 'Guitar'}],
+            [{'skill_name': 'Piano'}],
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {key: response.data[key] for key in ['created', 'updated', 'deleted']},
+            {'created': 2, 'updated': 1, 'deleted': 1}
+        )
+        self.assertEqual(len(response.data['skills']), 4)
+        default_proficiency = UserSkill._meta.get_field('proficiency').default
+        self.assertEqual(self.skills(), {
+            ('Python', OFFERED, 4), ('Django', OFFERED, 3), ('Guitar', OFFERED, default_proficiency),
+            ('Piano', WANTED, default_proficiency),
+        })
+
+    def test_resending_the_same_sets_changes_nothing(self):
+        offered = [{'skill_name': 'Python', 'proficiency': 2}, {'skill_name': 'Django'}]
+        response = self.put(offered, [{'skill_name': 'Guitar'}])
+
+        self.assertEqual(
+            {key: response.data[key] for key in ['created', 'updated', 'deleted']},
+            {'created': 0, 'updated': 0, 'deleted': 0}
+        )
+        self.assertFalse(UserSkillChange.objects.exists())
+
+    def test_skill_set_changes_are_logged(self):
+        self.put([{'skill_name': 'Python'}, {'skill_name': 'Guitar'}], [{'skill_name': 'Piano'}])
+
+        piano = Skill.objects.get(name='Piano')
+        # Guitar only changed type, so it stays in the skill set
+        self.assertEqual(
+            set(UserSkillChange.objects.values_list('user_id', 'skill_id', 'added')),
+            {(self.user.pk, piano.pk, True), (self.user.pk, self.django.pk, False)}
+        )
+
+    def test_invalid_items_change_nothing(self):
+        response = self.put([{'skill_name': 'Python', 'proficiency': 9}], [])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(self.skills()), 3)
+        self.assertFalse(UserSkillChange.objects.exists())
+
+class SkillDedupTests(TestCase):
+    def setUp(self):
+        self.javascript = Skill.objects.create(name='JavaScript')
+        self.typo = Skill.objects.create(name='Javascrpt')
+        self.python2 = Skill.objects.create(name='Python 2')
+        self.python3 = Skill.objects.create(name='Python 3')
+
+    def make_user(self, name):
+        return User.objects.create_user(username=name, email=f"{name}@example.com", password='pw')
+
+    def test_spelling_variants_resolve_to_one_skill(self):
+        resolved = resolve_skills(['javascript', 'Java Script', ' JavaScript ', 'Rust', 'rust'])
+
+        for name in ['javascript', 'Java Script', 'JavaScript']:
+            self.assertEqual(resolved[name], self.javascript)
+        # New names sharing a key create one skill, named by the first spelling
+        self.assertEqual(resolved['Rust'], resolved['rust'])
+        self.assertEqual(Skill.objects.filter(key='rust').count(), 1)
+
+    def test_different_numbers_are_not_near_duplicates(self):
+        self.assertEqual([skill.name for skill, _ in similar_skills('python 3')], ['Python 3'])
+        self.assertEqual([skill.name for skill, _ in similar_skills('Javascript')], ['JavaScript', 'Javascrpt'])
+        self.assertEqual(
+            [(canonical.name, [skill.name for skill in duplicates]) for canonical, duplicates in find_clusters()],
+            [('JavaScript', ['Javascrpt'])]
+        )
+
+    def test_merge_repoints_references_and_keeps_the_name_as_an_alias(self):
+        ann, bob = self.make_user('ann'), self.make_user('bob')
+        UserSkill.objects.create(user=ann, skill=self.javascript, skill_type=OFFERED)
+        UserSkill.objects.create(user=ann, skill=self.typo, skill_type=OFFERED)
+        UserSkill.objects.create(user=bob, skill=self.typo, skill_type=WANTED)
+        swap = SwapRequest.objects.create(
+            from_user=ann, to_user=bob, skill_offered=self.typo, skill_wanted=self.typo
+        )
+        ring = SwapRing.objects.create(signature='ring', size=3)
+        member = SwapRingMember.objects.create(ring=ring, user=ann, position=0, teaches=self.typo)
+        react = Skill.objects.create(name='React', parent=self.typo)
+        UserSkillChange.objects.all().delete()
+
+        counts = merge_skills(self.javascript, [self.typo])
+
+        self.assertEqual(counts['user_skills'], 1)
+        self.assertEqual(counts['user_skills_dropped'], 1)
+        self.assertEqual(counts['swap_requests'], 2)
+        self.assertEqual(counts['ring_members'], 1)
+        self.assertFalse(Skill.objects.filter(pk=self.typo.pk).exists())
+        self.assertEqual(
+            set(UserSkill.objects.values_list('user__username', 'skill_id', 'skill_type')),
+            {('ann', self.javascript.pk, OFFERED), ('bob', self.javascript.pk, WANTED)}
+        )
+        swap.refresh_from_db()
+        self.assertEqual((swap.skill_offered_id, swap.skill_wanted_id), (self.javascript.pk, self.javascript.pk))
+        member.refresh_from_db()
+        self.assertEqual(member.teaches_id, self.javascript.pk)
+        react.refresh_from_db()
+        self.assertEqual(react.parent_id, self.javascript.pk)
+
+        # The duplicate leaves both skill sets; only bob gains the canonical skill
+        self.assertEqual(
+            set(UserSkillChange.objects.values_list('user__username', 'skill_id', 'added')),
+            {('ann', self.typo.pk, False), ('bob', self.typo.pk, False), ('bob', self.javascript.pk, True)}
+        )
+
+        self.assertEqual(SkillAlias.objects.get(key='javascrpt').skill, self.javascript)
+        self.assertEqual(resolve_skills(['javascrpt'])['javascrpt'], self.javascript)
+        self.assertFalse(Skill.objects.filter(name='javascrpt').exists())
@@ -1,9 +1,16 @@
 from django.shortcuts import render
+from django.core.exceptions import ValidationError
+from django.db.models import Count, F
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from .models import Skill, UserSkill
-from .serializers import SkillSerializer, UserSkillCreateSerializer, UserSkillDetailSerializer
+from .dedup import similar_skills
+from .models import RelatedSkill, Skill, UserSkill
+from .serializers import (
+    SkillSerializer, UserSkillCreateSerializer, UserSkillDetailSerializer, RelatedSkillSerializer,
+    PopularSkillSerializer, SkillNodeSerializer, SkillMoveSerializer, UserSkillBulkSerializer
+)
+from .taxonomy import descendant_ids, descendants_of_name, move_skill
 from users.permissions import IsOwnerOrAdmin, IsAdminUser
 
 class SkillViewSet(viewsets.ReadOnlyModelViewSet):
@@ -18,9 +25,68 @@ class SkillViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def popular(self, request):
-        """Get popular skills based on usage"""
-        popular_skills = Skill.objects.all().order_by('-userskill')[:20]
-        serializer = self.get_serializer(popular_skills, many=True)
+        """
+        Get popular skills based on usage. ?under= (skill id or name) limits
+        them to one branch of the taxonomy and ?rollup=true counts the users
+        of each skill's sub-skills too.
+        """
+        skills = Skill.objects.all()
+        under = request.query_params.get('under', '').strip()
+        if under:
+            skills = skills.filter(id__in=descendant_ids([int(under)]) if under.isdigit() else descendants_of_name(under))
+        if request.query_params.get('rollup', '').lower() in ['1', 'true', 'yes']:
+            usage = Count('descendant_links__descendant__userskill__user', distinct=True)
+        else:
+            usage = Count('userskill__user', distinct=True)
+        popular_skills = skills.annotate(usage=usage).order_by('-usage', 'name')[:20]
+        serializer = PopularSkillSerializer(popular_skills, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def hierarchy(self, request, pk=None):
+        """Ancestors of this skill (root first) and every skill under it"""
+        skill = self.get_object()
+        ancestors = Skill.objects.filter(
+            descendant_links__descendant=skill, descendant_links__depth__gt=0
+        ).annotate(depth=F('descendant_links__depth')).order_by('-depth')
+        descendants = Skill.objects.filter(
+            ancestor_links__ancestor=skill, ancestor_links__depth__gt=0
+        ).annotate(depth=F('ancestor_links__depth')).order_by('depth', 'name')
+        return Response({
+            'skill': SkillSerializer(skill).data,
+            'ancestors': SkillNodeSerializer(ancestors, many=True).data,
+            'descendants': SkillNodeSerializer(descendants, many=True).data,
+        })
+    
+    @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
+    def move(self, request, pk=None):
+        """Admin: Move a skill and everything under it to a new parent (null for the top level)"""
+        skill = self.get_object()
+        serializer = SkillMoveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            move_skill(skill, serializer.validated_data['parent'])
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(SkillSerializer(skill).data)
+    
+    @action(detail=False, methods=['get'])
+    def similar(self, request):
+        """Existing skills spelled like ?name=, so clients can suggest them before creating a new one"""
+        name = request.query_params.get('name', '').strip()
+        if not name:
+            return Response({"error": "name is required."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response([
+            {'id': skill.id, 'name': skill.name, 'similarity': score}
+            for skill, score in similar_skills(name)
+        ])
+    
+    @action(detail=True, methods=['get'])
+    def related(self, request, pk=None):
+        """Skills most often held together with this one"""
+        skill = self.get_object()
+        related = RelatedSkill.objects.filter(skill=skill).select_related('related').order_by('rank')
+        serializer = RelatedSkillSerializer(related, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
@@ -44,9 +110,9 @@ class UserSkillViewSet(viewsets.ModelViewSet):
         # Filter skills by the requested user
         user_id = self.kwargs.get('user_pk')
         if user_id:
-            return UserSkill.objects.filter(user_id=user_id)
+            return UserSkill.objects.select_related('skill').filter(user_id=user_id)
         # For non-detailed routes, only return the current user's skills
-        return UserSkill.objects.filter(user=self.request.user)
+        return UserSkill.objects.select_related('skill').filter(user=self.request.user)
     
     def get_serializer_class(self):
         if self.action == 'create' or self.action == 'update' or self.action == 'partial_update':
@@ -69,3 +135,16 @@ class UserSkillViewSet(viewsets.ModelViewSet):
         skills = self.get_queryset().filter(skill_type=UserSkill.SkillType.WANTED)
         serializer = UserSkillDetailSerializer(skills, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['put'])
+    def bulk(self, request):
+        """
+        Replace the current user's skills with the given offered and wanted
+        sets in one transaction; skills left out are removed
+        """
+        serializer = UserSkillBulkSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        counts = serializer.apply(request.user)
+        skills = UserSkill.objects.select_related('skill').filter(user=request.user).order_by('skill_type', 'skill__name')
+        return Response({**counts, 'skills': UserSkillDetailSerializer(skills, many=True).data})
@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand
+from swaps.rings import find_rings, load_graph, store_rings
+
+class Command(BaseCommand):
+    help = 'Find multi-party ring swaps for users without a direct swap partner'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-length', type=int, choices=[3, 4],
+                            help='Longest ring to suggest (default SWAP_RINGS["MAX_LENGTH"])')
+        parser.add_argument('--branching', type=int,
+                            help='Candidates considered per skill at each hop')
+        parser.add_argument('--per-user', type=int,
+                            help='Rings to suggest per user')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would be stored without replacing existing rings')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        graph, users = load_graph(options['branching'])
+        loaded = time.monotonic()
+        rings = find_rings(graph, users, options['max_length'], options['per_user'])
+        searched = time.monotonic()
+        if not options['dry_run']:
+            store_rings(rings)
+        self.stdout.write(
+            f"Found {len(rings)} rings among {len(users)} users "
+            f"(load {loaded - started:.2f}s, search {searched - loaded:.2f}s, "
+            f"total {time.monotonic() - started:.2f}s)"
+        )
@@ -0,0 +1,40 @@
+# Generated by Django 4.2 on 2026-10-19 10:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0003_related_skills'),
+        ('swaps', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SwapRing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('signature', models.CharField(help_text='Member ids starting from the lowest', max_length=100, unique=True)),
+                ('size', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SwapRingMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('ring', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='swaps.swapring')),
+                ('teaches', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='skills.skill')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='swap_rings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['ring', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('ring', 'position'), name='swap_ring_position_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-19 10:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0005_skill_taxonomy'),
+        ('swaps', '0003_swap_rings'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['created_at', 'id'], name='swap_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='swap_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['from_user', 'created_at', 'id'], name='swap_from_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['to_user', 'created_at', 'id'], name='swap_to_created_idx'),
+        ),
+    ]
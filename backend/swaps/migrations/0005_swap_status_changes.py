@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-19 10:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def log_existing_statuses(apps, schema_editor):
+    """Creation of every existing swap, plus its current status as of its last update"""
+    SwapRequest = apps.get_model('swaps', 'SwapRequest')
+    SwapStatusChange = apps.get_model('swaps', 'SwapStatusChange')
+    changes = []
+    for pk, status, created_at, updated_at in SwapRequest.objects.values_list(
+        'id', 'status', 'created_at', 'updated_at'
+    ).iterator(chunk_size=2000):
+        changes.append(SwapStatusChange(swap_request_id=pk, status='pending', created_at=created_at))
+        if status != 'pending':
+            changes.append(SwapStatusChange(swap_request_id=pk, status=status, created_at=updated_at))
+    SwapStatusChange.objects.bulk_create(changes, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swaps', '0004_swap_monitor_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SwapStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('completed', 'Completed'), ('canceled', 'Canceled')], max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('swap_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to='swaps.swaprequest')),
+            ],
+        ),
+        migrations.RunPython(log_existing_statuses, migrations.RunPython.noop),
+    ]
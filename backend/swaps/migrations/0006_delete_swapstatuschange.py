@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 10:43
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+        ('swaps', '0005_swap_status_changes'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='SwapStatusChange',
+        ),
+    ]
@@ -1,8 +1,13 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import gettext_lazy as _
 from skills.models import Skill
 
+def swap_summary_cache_key(user_id):
+    """Cache key for a user's per-status swap counts"""
+    return f"swaps:summary:{user_id}"
+
 class SwapRequest(models.Model):
     """
     Swap Request model for skill exchanges between users
@@ -47,6 +52,61 @@ class SwapRequest(models.Model):
     
     def __str__(self):
         return f"{self.from_user.username} → {self.to_user.username}: {self.skill_offered.name} ↔ {self.skill_wanted.name}"
+    
+    def save(self, *args, **kwargs):
+        """Override save to invalidate the cached swap summaries"""
+        super().save(*args, **kwargs)
+        self.invalidate_summaries()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.invalidate_summaries()
+        return result
+    
+    def invalidate_summaries(self):
+        """
+        Drop the cached summaries of both participants once the change
+        commits, so a summary read before then is not cached again after
+        the drop. Queryset update() and delete() bypass save()/delete(), so
+        code changing swap statuses in bulk must call this (or delete the
+        keys) itself.
+        """
+        keys = [swap_summary_cache_key(self.from_user_id), swap_summary_cache_key(self.to_user_id)]
+        transaction.on_commit(lambda: cache.delete_many(keys))
         
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination and filters of the admin monitor (see swaps/monitor.py)
+            models.Index(fields=['created_at', 'id'], name='swap_created_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='swap_status_created_idx'),
+            models.Index(fields=['from_user', 'created_at', 'id'], name='swap_from_created_idx'),
+            models.Index(fields=['to_user', 'created_at', 'id'], name='swap_to_created_idx'),
+        ]
+
+class SwapRing(models.Model):
+    """
+    A suggested multi-party swap: each member teaches the next one and the
+    last member teaches the first
+    """
+    signature = models.CharField(max_length=100, unique=True, help_text=_('Member ids starting from the lowest'))
+    size = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Ring {self.signature}"
+
+class SwapRingMember(models.Model):
+    """
+    One member of a suggested ring and the skill they teach the next member
+    """
+    ring = models.ForeignKey(SwapRing, on_delete=models.CASCADE, related_name='members')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='swap_rings')
+    position = models.PositiveSmallIntegerField()
+    teaches = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='+')
+    
+    class Meta:
+        ordering = ['ring', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['ring', 'position'], name='swap_ring_position_uniq'),
+        ]
@@ -0,0 +1,166 @@
+"""
+Admin swap monitor.
+
+Swaps are listed newest first with keyset pagination: the cursor is the
+``(created_at, id)`` of the last row served and the next page starts
+strictly after it, so every page is an index range scan no matter how deep
+the admin pages, and rows inserted meanwhile never shift the pages.
+
+Rows are a flat projection read with ``values()`` (ids, usernames, skill
+names, status and timestamps) rather than nested profiles. The CSV export
+streams the same projection from a server-side iterator in chunks, so its
+memory use does not depend on the number of rows.
+"""
+import base64
+import csv
+import datetime
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from skills.taxonomy import descendant_ids, descendants_of_name
+from .models import SwapRequest
+
+DEFAULTS = {
+    'PAGE_SIZE': 50,
+    'MAX_PAGE_SIZE': 500,
+    'CSV_CHUNK_SIZE': 2000,
+}
+
+# Columns of a monitor row, in CSV order; renamed ones map to their lookup
+FIELDS = [
+    'id', 'status', 'from_user_id', 'from_username', 'to_user_id', 'to_username',
+    'skill_offered_name', 'skill_wanted_name', 'created_at', 'updated_at',
+]
+RENAMED = {
+    'from_username': 'from_user__username',
+    'to_username': 'to_user__username',
+    'skill_offered_name': 'skill_offered__name',
+    'skill_wanted_name': 'skill_wanted__name',
+}
+
+def get_setting(name):
+    return getattr(settings, 'SWAP_MONITOR', {}).get(name, DEFAULTS[name])
+
+def _split(query_params, name):
+    values = set()
+    for raw in query_params.getlist(name):
+        values.update(value.strip() for value in raw.split(',') if value.strip())
+    return sorted(values)
+
+def _parse_bound(value, name, end):
+    """A datetime from an ISO date or datetime; a bare date as an upper bound means the end of that day"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError(f"{name} must be an ISO date or datetime.")
+        parsed = datetime.datetime.combine(day + datetime.timedelta(days=1 if end else 0), datetime.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+def encode_cursor(row):
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        created_at, pk = parse_datetime(created_at), int(pk)
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid cursor.")
+    if created_at is None:
+        raise ValidationError("Invalid cursor.")
+    return created_at, pk
+
+def parse_filters(query_params):
+    """
+    Normalize ``status`` (comma-separated), ``user`` and ``skill`` (id or
+    name), ``created_after``/``created_before`` and ``cursor``, raising
+    ValidationError for invalid values.
+    """
+    filters = {}
+
+    statuses = _split(query_params, 'status')
+    unknown = set(statuses) - set(SwapRequest.Status.values)
+    if unknown:
+        raise ValidationError(f"Unknown status: {', '.join(sorted(unknown))}.")
+    if statuses:
+        filters['status'] = statuses
+
+    for name in ['user', 'skill']:
+        value = query_params.get(name, '').strip()
+        if value:
+            filters[name] = value
+
+    for name, end in [('created_after', False), ('created_before', True)]:
+        value = query_params.get(name, '').strip()
+        if value:
+            filters[name] = _parse_bound(value, name, end)
+
+    cursor = query_params.get('cursor', '').strip()
+    if cursor:
+        filters['cursor'] = decode_cursor(cursor)
+    return filters
+
+def apply_filters(queryset, filters):
+    """
+    Restrict swaps to those matching every filter. ``user`` matches either
+    side of the swap and ``skill`` either skill, including sub-skills.
+    """
+    if 'status' in filters:
+        queryset = queryset.filter(status__in=filters['status'])
+    user = filters.get('user')
+    if user:
+        if user.isdigit():
+            queryset = queryset.filter(Q(from_user_id=int(user)) | Q(to_user_id=int(user)))
+        else:
+            queryset = queryset.filter(Q(from_user__username=user) | Q(to_user__username=user))
+    skill = filters.get('skill')
+    if skill:
+        skills = descendant_ids([int(skill)]) if skill.isdigit() else descendants_of_name(skill)
+        queryset = queryset.filter(Q(skill_offered_id__in=skills) | Q(skill_wanted_id__in=skills))
+    if 'created_after' in filters:
+        queryset = queryset.filter(created_at__gte=filters['created_after'])
+    if 'created_before' in filters:
+        queryset = queryset.filter(created_at__lt=filters['created_before'])
+    if 'cursor' in filters:
+        created_at, pk = filters['cursor']
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    return queryset.order_by('-created_at', '-id')
+
+def project(queryset):
+    """The compact monitor rows for ``queryset``, as dicts"""
+    return queryset.values(
+        *(field for field in FIELDS if field not in RENAMED),
+        **{field: F(lookup) for field, lookup in RENAMED.items()}
+    )
+
+def page(queryset, limit):
+    """One page of rows and the cursor for the next page (None on the last page)"""
+    rows = list(project(queryset)[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+class Echo:
+    """File-like object whose write() returns the line instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+def stream_csv(queryset):
+    """CSV lines of every row in ``queryset``, a chunk of rows per yielded string"""
+    chunk_size = get_setting('CSV_CHUNK_SIZE')
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    lines = []
+    for row in project(queryset).values_list(*FIELDS).iterator(chunk_size=chunk_size):
+        lines.append(writer.writerow(row))
+        if len(lines) >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
@@ -0,0 +1,196 @@
+"""
+Multi-party ring swaps.
+
+Users form a directed "can teach" graph: A -> B when A offers a skill B
+wants. A ring is a short cycle A -> B -> C (-> D) -> A, which lets users with
+no reciprocal partner swap anyway.
+
+The user-level graph is far too dense to materialize (everyone offering
+Python points at everyone wanting it), so the search walks the skill index
+instead. ``teachers[(a, b)]`` lists users who want ``a`` and offer ``b``;
+a path can only close back to the root through one of those lists, so the
+last hop of every cycle is an index lookup rather than a scan. Candidate
+lists are capped and sorted by reputation, depth is bounded, and each root
+stops once it has enough rings.
+"""
+from collections import defaultdict
+from itertools import groupby
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from skills.models import UserSkill
+from .models import SwapRing, SwapRingMember
+
+DEFAULTS = {
+    'MAX_LENGTH': 4,
+    'BRANCHING': 20,
+    'RINGS_PER_USER': 3,
+    'BATCH_SIZE': 2000,
+}
+
+# Above this many candidate closing skills a root probes the pair index per
+# skill rather than building the set
+CLOSABLE_SET_LIMIT = 4096
+
+def get_setting(name):
+    return getattr(settings, 'SWAP_RINGS', {}).get(name, DEFAULTS[name])
+
+class CanTeachGraph:
+    """
+    Skill-indexed view of who can teach whom.
+
+    ``offers`` and ``wants`` map user ids to tuples of skill ids; ``users``
+    lists user ids in preference order (best first), which is the order
+    candidate lists keep when they are capped at ``branching``.
+    """
+
+    def __init__(self, users, offers, wants, branching=None):
+        self.offers = offers
+        self.wants = wants
+        self.branching = branching or get_setting('BRANCHING')
+        self.wanters = defaultdict(list)
+        self.teachers = defaultdict(list)
+        # offered skill -> skills whose wanters can teach it back
+        self.closing = defaultdict(set)
+        for user in users:
+            for wanted in wants.get(user, ()):
+                if len(self.wanters[wanted]) < self.branching:
+                    self.wanters[wanted].append(user)
+                for offered in offers.get(user, ()):
+                    candidates = self.teachers[(wanted, offered)]
+                    self.closing[offered].add(wanted)
+                    if len(candidates) < self.branching:
+                        candidates.append(user)
+
+    def has_direct_partner(self, user):
+        """Whether someone wants a skill ``user`` offers and offers one they want"""
+        for offered in self.offers.get(user, ()):
+            for wanted in self.wants.get(user, ()):
+                if any(other != user for other in self.teachers.get((offered, wanted), ())):
+                    return True
+        return False
+
+    def _closers(self, taught, root):
+        """``(closer, skill closer teaches root)`` for everyone who wants ``taught`` and can teach ``root``"""
+        for wanted in self.wants.get(root, ()):
+            for closer in self.teachers.get((taught, wanted), ()):
+                yield closer, wanted
+
+    def rings_for(self, root, max_length=None, limit=None):
+        """
+        Up to ``limit`` rings through ``root`` of length 3..max_length.
+
+        Each ring is ``((user, skill taught to the next member), ...)`` starting
+        at ``root``. Shorter rings are found first.
+        """
+        max_length = max_length or get_setting('MAX_LENGTH')
+        limit = limit or get_setting('RINGS_PER_USER')
+        rings = []
+
+        def found(ring):
+            rings.append(ring)
+            return len(rings) >= limit
+
+        # Only skills wanted by someone who can teach the root can be taught
+        # by the second-to-last member. Materialize that set unless the root
+        # wants very popular skills, then probe the pair index instead.
+        wanted_by_root = self.wants.get(root, ())
+        if sum(len(self.closing.get(wanted, ())) for wanted in wanted_by_root) <= CLOSABLE_SET_LIMIT:
+            closes = {skill for wanted in wanted_by_root for skill in self.closing.get(wanted, ())}.__contains__
+        else:
+            def closes(skill):
+                return any((skill, wanted) in self.teachers for wanted in wanted_by_root)
+
+        first_hops = [
+            (first, taught) for taught in self.offers.get(root, ())
+            for first in self.wanters.get(taught, ()) if first != root
+        ]
+
+        # root -> first -> closer -> root
+        for first, taught in first_hops:
+            for via in self.offers.get(first, ()):
+                if not closes(via):
+                    continue
+                for closer, closing in self._closers(via, root):
+                    if closer not in (root, first):
+                        if found(((root, taught), (first, via), (closer, closing))):
+                            return rings
+        if max_length < 4:
+            return rings
+
+        # root -> first -> second -> closer -> root
+        for first, taught in first_hops:
+            for second_skill in self.offers.get(first, ()):
+                for second in self.wanters.get(second_skill, ()):
+                    if second in (root, first):
+                        continue
+                    for via in self.offers.get(second, ()):
+                        if not closes(via):
+                            continue
+                        for closer, closing in self._closers(via, root):
+                            if closer not in (root, first, second):
+                                if found(((root, taught), (first, second_skill), (second, via), (closer, closing))):
+                                    return rings
+        return rings
+
+def signature(ring):
+    """Rotation-independent key for a ring"""
+    users = [user for user, _ in ring]
+    start = users.index(min(users))
+    return '-'.join(str(user) for user in users[start:] + users[:start])
+
+def find_rings(graph, roots, max_length=None, per_user=None, only_unpaired=True):
+    """
+    Rings for every root (by default only those without a direct partner),
+    deduplicated.
+
+    Returns ``{signature: ring}``; a ring found for one root also counts
+    towards the quota of its other members.
+    """
+    per_user = per_user or get_setting('RINGS_PER_USER')
+    rings = {}
+    suggested = defaultdict(int)
+    for root in roots:
+        if suggested[root] >= per_user or (only_unpaired and graph.has_direct_partner(root)):
+            continue
+        for ring in graph.rings_for(root, max_length, per_user - suggested[root]):
+            key = signature(ring)
+            if key in rings:
+                continue
+            rings[key] = ring
+            for user, _ in ring:
+                suggested[user] += 1
+    return rings
+
+def load_graph(branching=None):
+    """Build the graph from active public users' skills, best reputation first"""
+    User = get_user_model()
+    users = list(
+        User.objects.filter(is_active=True, is_public=True).exclude(role='admin')
+        .order_by('-reputation', 'id').values_list('id', flat=True)
+    )
+    offers, wants = {}, {}
+    rows = UserSkill.objects.order_by('user_id', 'skill_type', 'skill_id').values_list(
+        'user_id', 'skill_type', 'skill_id'
+    ).iterator(chunk_size=get_setting('BATCH_SIZE'))
+    for (user_id, skill_type), group in groupby(rows, key=lambda row: row[:2]):
+        target = offers if skill_type == UserSkill.SkillType.OFFERED else wants
+        target[user_id] = tuple(skill_id for _, _, skill_id in group)
+    return CanTeachGraph(users, offers, wants, branching), users
+
+def store_rings(rings):
+    """Replace all suggested rings; returns the number stored"""
+    batch_size = get_setting('BATCH_SIZE')
+    with transaction.atomic():
+        SwapRing.objects.all().delete()
+        objects = SwapRing.objects.bulk_create(
+            [SwapRing(signature=key, size=len(ring)) for key, ring in rings.items()],
+            batch_size=batch_size
+        )
+        members = [
+            SwapRingMember(ring_id=swap_ring.pk, user_id=user, position=position, teaches_id=skill)
+            for swap_ring, ring in zip(objects, rings.values())
+            for position, (user, skill) in enumerate(ring)
+        ]
+        SwapRingMember.objects.bulk_create(members, batch_size=batch_size)
+    return len(objects)
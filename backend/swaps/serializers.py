@@ -2,9 +2,11 @@ import re
 from django.utils.html import strip_tags
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import SwapRequest
+from .models import SwapRequest, SwapRing, SwapRingMember
 from skills.models import Skill
+from skills.dedup import resolve_skill
 from users.serializers import UserPublicSerializer
+from users.avatars import rendition_urls
 
 User = get_user_model()
 
@@ -75,8 +77,8 @@ class SwapRequestCreateSerializer(serializers.ModelSerializer):
         skill_offered_name = attrs.pop('skill_offered_name')
         skill_wanted_name = attrs.pop('skill_wanted_name')
         
-        skill_offered, _ = Skill.objects.get_or_create(name=skill_offered_name)
-        skill_wanted, _ = Skill.objects.get_or_create(name=skill_wanted_name)
+        skill_offered = resolve_skill(skill_offered_name)
+        skill_wanted = resolve_skill(skill_wanted_name)
         
         attrs['skill_offered'] = skill_offered
         attrs['skill_wanted'] = skill_wanted
@@ -89,6 +91,100 @@ class SwapRequestCreateSerializer(serializers.ModelSerializer):
         
         return SwapRequest.objects.create(**validated_data)
 
+class SparseFieldsetMixin:
+    """
+    Honour ``?fields=`` and ``?expand=`` query parameters on the request.
+
+    ``fields`` keeps only the listed top-level fields, ``expand`` swaps the
+    fields named in ``expandable_fields`` for their full nested serializer.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+
+        for name in self._parse_param(request, 'expand'):
+            if name in self.expandable_fields and name in self.fields:
+                self.fields[name] = self.expandable_fields[name](read_only=True)
+
+        only = self._parse_param(request, 'fields')
+        if only:
+            for name in set(self.fields) - set(only):
+                self.fields.pop(name)
+
+    @staticmethod
+    def _parse_param(request, param):
+        value = request.query_params.get(param, '')
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+class SwapUserSummarySerializer(serializers.ModelSerializer):
+    name = serializers.SerializerMethodField()
+    avatar_urls = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'name', 'avatar', 'avatar_urls']
+    
+    def get_avatar_urls(self, obj):
+        return rendition_urls(obj.avatar_hash, self.context.get('request'))
+    
+    def get_name(self, obj):
+        if obj.first_name and obj.last_name:
+            return f"{obj.first_name} {obj.last_name}"
+        return obj.username
+
+class SkillSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Skill
+        fields = ['id', 'name']
+
+class SwapRequestListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Compact swap representation for list endpoints. Expects the queryset to
+    ``select_related`` both users and both skills.
+    """
+    from_user = SwapUserSummarySerializer(read_only=True)
+    to_user = SwapUserSummarySerializer(read_only=True)
+    skill_offered = SkillSummarySerializer(read_only=True)
+    skill_wanted = SkillSummarySerializer(read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    expandable_fields = {
+        'from_user': UserPublicSerializer,
+        'to_user': UserPublicSerializer,
+    }
+    
+    class Meta:
+        model = SwapRequest
+        fields = [
+            'id', 'from_user', 'to_user', 'skill_offered', 'skill_wanted',
+            'message', 'response_message', 'status', 'status_display',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+class SwapRingMemberSerializer(serializers.ModelSerializer):
+    user = SwapUserSummarySerializer(read_only=True)
+    teaches = SkillSummarySerializer(read_only=True)
+    
+    class Meta:
+        model = SwapRingMember
+        fields = ['position', 'user', 'teaches']
+
+class SwapRingSerializer(serializers.ModelSerializer):
+    """
+    A suggested ring; each member teaches ``teaches`` to the next member and
+    the last member teaches the first
+    """
+    members = SwapRingMemberSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = SwapRing
+        fields = ['id', 'size', 'members', 'created_at']
+
 class SwapRequestDetailSerializer(serializers.ModelSerializer):
     from_user = UserPublicSerializer(read_only=True)
     to_user = UserPublicSerializer(read_only=True)
@@ -1,3 +1,184 @@
+import base64
+import csv
+import datetime
+import io
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from skills.models import Skill
+from users.models import User
+from .models import SwapRequest, swap_summary_cache_key
+from .monitor import FIELDS
+from .rings import CanTeachGraph, find_rings, signature
 
-# Create your tests here.
+class SwapSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='summary_user', email='summary@example.com', password='pw')
+        self.skill = Skill.objects.create(name='Summary Skill')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+    def make_user(self, name):
+        return User.objects.create_user(username=name, email=f"{name}@example.com", password='pw')
+
+    def make_swap(self, from_user, to_user, status=SwapRequest.Status.PENDING):
+        return SwapRequest.objects.create(
+            from_user=from_user, to_user=to_user, skill_offered=self.skill, skill_wanted=self.skill, status=status
+        )
+
+    def test_counts_add_up_across_senders_and_recipients(self):
+        senders = [self.make_user(f'sender{i}') for i in range(3)]
+        for sender in senders:
+            self.make_swap(sender, self.user)
+        self.make_swap(senders[0], self.user, SwapRequest.Status.ACCEPTED)
+        for recipient in senders[:2]:
+            self.make_swap(self.user, recipient, SwapRequest.Status.COMPLETED)
+
+        summary = self.client.get('/api/swaps/summary/').json()
+
+        self.assertEqual(summary['received']['pending'], 3)
+        self.assertEqual(summary['received']['accepted'], 1)
+        self.assertEqual(summary['received']['total'], 4)
+        self.assertEqual(summary['sent']['completed'], 2)
+        self.assertEqual(summary['sent']['total'], 2)
+
+    def test_saving_a_swap_refreshes_the_cached_summary(self):
+        swap = self.make_swap(self.make_user('sender'), self.user)
+        self.assertEqual(self.client.get('/api/swaps/summary/').json()['received']['pending'], 1)
+
+        swap.status = SwapRequest.Status.REJECTED
+        with self.captureOnCommitCallbacks(execute=True):
+            swap.save()
+        summary = self.client.get('/api/swaps/summary/').json()
+
+        self.assertEqual(summary['received']['pending'], 0)
+        self.assertEqual(summary['received']['rejected'], 1)
+
+    def test_summaries_cached_before_the_commit_are_dropped(self):
+        swap = self.make_swap(self.make_user('sender'), self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            swap.status = SwapRequest.Status.ACCEPTED
+            swap.save()
+            # A concurrent request caches the counts from before the change
+            self.client.get('/api/swaps/summary/')
+            cache.set(swap_summary_cache_key(self.user.id), {'received': {'pending': 1}})
+
+        summary = self.client.get('/api/swaps/summary/').json()
+        self.assertEqual((summary['received']['pending'], summary['received']['accepted']), (0, 1))
+
+class SwapMonitorTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='monitor_admin', email='monitor_admin@example.com', password='pw',
+            role=User.Roles.ADMIN, is_staff=True
+        )
+        self.ann = User.objects.create_user(username='ann', email='ann@example.com', password='pw')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='pw')
+        self.skill = Skill.objects.create(name='Monitor Skill')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.admin).access_token}")
+        self.url = '/api/swaps/monitor/'
+
+    def make_swaps(self, count, created_at):
+        swaps = [
+            SwapRequest.objects.create(
+                from_user=self.ann, to_user=self.bob, skill_offered=self.skill, skill_wanted=self.skill
+            )
+            for _ in range(count)
+        ]
+        SwapRequest.objects.filter(pk__in=[swap.pk for swap in swaps]).update(created_at=created_at)
+        return swaps
+
+    def test_pages_do_not_skip_or_repeat_rows_sharing_a_timestamp(self):
+        noon = timezone.make_aware(datetime.datetime(2026, 3, 1, 12))
+        tied = self.make_swaps(3, noon)
+        older = self.make_swaps(1, noon - datetime.timedelta(hours=1))
+
+        seen, cursor = [], None
+        while True:
+            response = self.client.get(self.url, {'limit': 2, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            seen += [row['id'] for row in response.data['swap_requests']]
+            cursor = response.data['next_cursor']
+            if not cursor:
+                break
+
+        # Newest first, ties broken by descending id
+        self.assertEqual(seen, [swap.pk for swap in reversed(tied)] + [older[0].pk])
+
+    def test_bad_cursors_are_rejected(self):
+        for cursor in ['not a cursor', base64.urlsafe_b64encode(b'yesterday|5').decode()]:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data['error'], "Invalid cursor.")
+
+    def test_csv_lists_every_row(self):
+        swaps = self.make_swaps(2, timezone.now())
+
+        response = self.client.get(self.url, {'format': 'csv'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], FIELDS)
+        self.assertEqual(
+            [(row[0], row[1], row[3], row[5], row[6]) for row in rows[1:]],
+            [(str(swap.pk), 'pending', 'ann', 'bob', 'Monitor Skill') for swap in reversed(swaps)]
+        )
+
+class SwapRingTests(TestCase):
+    # Skill ids
+    COOKING, GUITAR, PYTHON, SPANISH = 10, 20, 30, 40
+
+    def graph(self, offers, wants):
+        return CanTeachGraph(sorted(set(offers) | set(wants)), offers, wants, branching=20)
+
+    def test_three_ring(self):
+        # 1 teaches 2 cooking, 2 teaches 3 guitar, 3 teaches 1 python
+        graph = self.graph(
+            offers={1: (self.COOKING,), 2: (self.GUITAR,), 3: (self.PYTHON,)},
+            wants={1: (self.PYTHON,), 2: (self.COOKING,), 3: (self.GUITAR,)},
+        )
+        self.assertEqual(graph.rings_for(1), [((1, self.COOKING), (2, self.GUITAR), (3, self.PYTHON))])
+        self.assertEqual(graph.rings_for(2), [((2, self.GUITAR), (3, self.PYTHON), (1, self.COOKING))])
+
+    def test_four_ring(self):
+        graph = self.graph(
+            offers={1: (self.COOKING,), 2: (self.GUITAR,), 3: (self.PYTHON,), 4: (self.SPANISH,)},
+            wants={1: (self.SPANISH,), 2: (self.COOKING,), 3: (self.GUITAR,), 4: (self.PYTHON,)},
+        )
+        self.assertEqual(
+            graph.rings_for(1),
+            [((1, self.COOKING), (2, self.GUITAR), (3, self.PYTHON), (4, self.SPANISH))]
+        )
+        self.assertEqual(graph.rings_for(1, max_length=3), [])
+
+    def test_signature_ignores_rotation(self):
+        ring = ((3, self.PYTHON), (1, self.COOKING), (2, self.GUITAR))
+        rotated = ((1, self.COOKING), (2, self.GUITAR), (3, self.PYTHON))
+        self.assertEqual(signature(ring), signature(rotated))
+        self.assertEqual(signature(ring), '1-2-3')
+        # The same users in the other direction are another ring
+        self.assertNotEqual(signature(((1, 0), (3, 0), (2, 0))), signature(rotated))
+
+    def test_rings_are_found_once_for_all_members(self):
+        graph = self.graph(
+            offers={1: (self.COOKING,), 2: (self.GUITAR,), 3: (self.PYTHON,)},
+            wants={1: (self.PYTHON,), 2: (self.COOKING,), 3: (self.GUITAR,)},
+        )
+        self.assertEqual(list(find_rings(graph, [1, 2, 3])), ['1-2-3'])
+
+    def test_users_with_a_direct_partner_are_skipped(self):
+        graph = self.graph(
+            # 4 wants what 1 offers and offers what 1 wants
+            offers={1: (self.COOKING,), 2: (self.GUITAR,), 3: (self.PYTHON,), 4: (self.PYTHON,)},
+            wants={1: (self.PYTHON,), 2: (self.COOKING,), 3: (self.GUITAR,), 4: (self.COOKING,)},
+        )
+        self.assertTrue(graph.has_direct_partner(1))
+        self.assertFalse(graph.has_direct_partner(2))
+        self.assertEqual(find_rings(graph, [1]), {})
+        self.assertEqual(list(find_rings(graph, [1], only_unpaired=False)), ['1-2-3'])
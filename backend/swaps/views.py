@@ -6,14 +6,21 @@ from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.db.utils import IntegrityError
 import logging
-from django.db.models import Q
-from .models import SwapRequest
+from django.db.models import Case, Count, Prefetch, Q, Value, When
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+from . import monitor as swap_monitor
+from .models import SwapRequest, SwapRing, SwapRingMember, swap_summary_cache_key
 from .serializers import (
     SwapRequestDetailSerializer, SwapRequestCreateSerializer,
-    SwapRequestUpdateSerializer
+    SwapRequestUpdateSerializer, SwapRequestListSerializer, SwapRingSerializer
 )
 from users.permissions import IsOwnerOrAdmin, IsAdminUser
-from notifications.models import Notification
+from users.serializers import profile_prefetches
+from events.log import record
+from events.models import Event
+from talent_bridge.renderers import CSVRenderer
 
 logger = logging.getLogger(__name__)
 
@@ -26,28 +33,50 @@ class SwapRequestViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created_at', 'updated_at', 'status']
     ordering = ['-created_at']
+    list_actions = ['list', 'sent', 'received', 'my_requests']
+    summary_cache_timeout = 300
+    related_fields = ['from_user', 'to_user', 'skill_offered', 'skill_wanted']
     
     def get_serializer_class(self):
         if self.action == 'create':
             return SwapRequestCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return SwapRequestUpdateSerializer
+        elif self.action in self.list_actions:
+            return SwapRequestListSerializer
         return SwapRequestDetailSerializer
     
     def get_permissions(self):
-        if self.action in ['update', 'partial_update', 'destroy']:
+        # Updates are open to the participants, which update() checks itself
+        if self.action == 'destroy':
             self.permission_classes = [IsOwnerOrAdmin]
         return super().get_permissions()
     
+    def renders_profiles(self):
+        """Whether the response nests full user profiles for each swap"""
+        if self.action in self.list_actions:
+            return bool(self.request.query_params.get('expand'))
+        return True
+    
+    def base_queryset(self):
+        queryset = SwapRequest.objects.select_related(*self.related_fields)
+        if self.renders_profiles():
+            queryset = queryset.prefetch_related(
+                *profile_prefetches('from_user__'), *profile_prefetches('to_user__')
+            )
+        return queryset
+    
     def get_queryset(self):
         user = self.request.user
         
+        queryset = self.base_queryset()
+        
         # Admin can see all requests
         if user.is_admin:
-            return SwapRequest.objects.all()
+            return queryset
         
         # Users can only see requests they are involved in
-        return SwapRequest.objects.filter(Q(from_user=user) | Q(to_user=user))
+        return queryset.filter(Q(from_user=user) | Q(to_user=user))
     
     def create(self, request, *args, **kwargs):
         """Create a new swap request"""
@@ -63,7 +92,8 @@ class SwapRequestViewSet(viewsets.ModelViewSet):
                 )
             
             # Create the swap request
-            swap_request = serializer.save(from_user=request.user)
+            self.perform_create(serializer)
+            swap_request = serializer.instance
             
             logger.info(f"Swap request created: {swap_request.id} by {request.user.username}")
             
@@ -105,7 +135,8 @@ class SwapRequestViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            swap_request = serializer.save()
+            self.perform_update(serializer)
+            swap_request = serializer.instance
             
             logger.info(f"Swap request updated: {swap_request.id} by {request.user.username}")
             
@@ -125,68 +156,53 @@ class SwapRequestViewSet(viewsets.ModelViewSet):
             )
     
     def perform_create(self, serializer):
-        swap_request = serializer.save()
-        
-        # Create notification for recipient
-        Notification.objects.create(
-            user=swap_request.to_user,
-            notification_type=Notification.Type.SWAP_REQUEST,
-            title="New Swap Request",
-            message=f"{swap_request.from_user.username} wants to swap {swap_request.skill_offered.name} for your {swap_request.skill_wanted.name}",
-            related_object_id=swap_request.id,
-            related_object_type="swap_request"
-        )
+        # The recipient is notified from the event log
+        with transaction.atomic():
+            swap_request = serializer.save()
+            record(
+                Event.Type.SWAP_CREATED,
+                swap_request.id,
+                actor_id=self.request.user.id,
+                from_user_id=swap_request.from_user_id,
+                to_user_id=swap_request.to_user_id,
+                status=swap_request.status
+            )
     
     def perform_update(self, serializer):
         previous_status = serializer.instance.status
-        swap_request = serializer.save()
-        
-        # Create notifications based on status change
-        if previous_status != swap_request.status:
-            if swap_request.status == SwapRequest.Status.ACCEPTED:
-                # Notify requester that their request was accepted
-                Notification.objects.create(
-                    user=swap_request.from_user,
-                    notification_type=Notification.Type.SWAP_ACCEPTED,
-                    title="Swap Request Accepted",
-                    message=f"{swap_request.to_user.username} accepted your swap request for {swap_request.skill_wanted.name}",
-                    related_object_id=swap_request.id,
-                    related_object_type="swap_request"
-                )
-            elif swap_request.status == SwapRequest.Status.REJECTED:
-                # Notify requester that their request was rejected
-                Notification.objects.create(
-                    user=swap_request.from_user,
-                    notification_type=Notification.Type.SWAP_REJECTED,
-                    title="Swap Request Rejected",
-                    message=f"{swap_request.to_user.username} declined your swap request for {swap_request.skill_wanted.name}",
-                    related_object_id=swap_request.id,
-                    related_object_type="swap_request"
-                )
-            elif swap_request.status == SwapRequest.Status.COMPLETED:
-                # Notify both users that the swap is completed
-                for user in [swap_request.from_user, swap_request.to_user]:
-                    if user != self.request.user:  # Don't notify the user who marked it complete
-                        Notification.objects.create(
-                            user=user,
-                            notification_type=Notification.Type.SWAP_COMPLETED,
-                            title="Swap Completed",
-                            message=f"Your skill swap has been marked as completed",
-                            related_object_id=swap_request.id,
-                            related_object_type="swap_request"
-                        )
-                
-                # Update completed swaps count for both users
-                for user in [swap_request.from_user, swap_request.to_user]:
-                    user.total_completed_swaps += 1
-                    user.save(update_fields=['total_completed_swaps'])
+        with transaction.atomic():
+            swap_request = serializer.save()
+            if previous_status != swap_request.status:
+                self._record_status_change(swap_request, previous_status)
+    
+    def _change_status(self, swap_request, new_status):
+        """Save a status transition together with its event"""
+        previous_status = swap_request.status
+        swap_request.status = new_status
+        with transaction.atomic():
+            swap_request.save()
+            self._record_status_change(swap_request, previous_status)
+    
+    def _record_status_change(self, swap_request, previous_status):
+        """Log a status transition; notifications and completion counters are derived from it"""
+        record(
+            Event.Type.SWAP_STATUS_CHANGED,
+            swap_request.id,
+            actor_id=self.request.user.id,
+            from_user_id=swap_request.from_user_id,
+            to_user_id=swap_request.to_user_id,
+            status=swap_request.status,
+            previous_status=previous_status
+        )
     
     @action(detail=False, methods=['get'])
     def sent(self, request):
         """Get swap requests sent by current user"""
         try:
-            requests = SwapRequest.objects.filter(from_user=request.user).order_by('-created_at')
-            serializer = SwapRequestDetailSerializer(requests, many=True)
+            requests = self.base_queryset().filter(
+                from_user=request.user
+            ).order_by('-created_at')
+            serializer = self.get_serializer(requests, many=True)
             return Response(serializer.data)
         except Exception as e:
             logger.error(f"Failed to get sent requests: {e}")
@@ -199,8 +215,10 @@ class SwapRequestViewSet(viewsets.ModelViewSet):
     def received(self, request):
         """Get swap requests received by current user"""
         try:
-            requests = SwapRequest.objects.filter(to_user=request.user).order_by('-created_at')
-            serializer = SwapRequestDetailSerializer(requests, many=True)
+            requests = self.base_queryset().filter(
+                to_user=request.user
+            ).order_by('-created_at')
+            serializer = self.get_serializer(requests, many=True)
             return Response(serializer.data)
         except Exception as e:
             logger.error(f"Failed to get received requests: {e}")
@@ -228,8 +246,7 @@ class SwapRequestViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            swap_request.status = SwapRequest.Status.ACCEPTED
-            swap_request.save()
+            self._change_status(swap_request, SwapRequest.Status.ACCEPTED)
             
             logger.info(f"Swap request accepted: {swap_request.id} by {request.user.username}")
             
@@ -264,8 +281,7 @@ class SwapRequestViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            swap_request.status = SwapRequest.Status.REJECTED
-            swap_request.save()
+            self._change_status(swap_request, SwapRequest.Status.REJECTED)
             
             logger.info(f"Swap request rejected: {swap_request.id} by {request.user.username}")
             
@@ -300,8 +316,7 @@ class SwapRequestViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            swap_request.status = SwapRequest.Status.COMPLETED
-            swap_request.save()
+            self._change_status(swap_request, SwapRequest.Status.COMPLETED)
             
             logger.info(f"Swap request completed: {swap_request.id} by {request.user.username}")
             
@@ -335,17 +350,7 @@ class SwapRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        swap_request.status = SwapRequest.Status.CANCELLED
-        swap_request.save()
-        
-        # Create notification for provider
-        Notification.objects.create(
-            user=swap_request.to_user,
-            notification_type=Notification.NotificationType.SWAP_CANCELLED,
-            title="Swap Request Cancelled",
-            message=f"{swap_request.from_user.username} cancelled the swap request.",
-            related_object_id=swap_request.id
-        )
+        self._change_status(swap_request, SwapRequest.Status.CANCELED)
         
         return Response({
             'message': 'Swap request cancelled',
@@ -355,31 +360,90 @@ class SwapRequestViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_requests(self, request):
         """Get current user's swap requests (sent and received)"""
-        sent_requests = SwapRequest.objects.filter(from_user=request.user)
-        received_requests = SwapRequest.objects.filter(to_user=request.user)
+        queryset = self.base_queryset()
+        sent_requests = queryset.filter(from_user=request.user)
+        received_requests = queryset.filter(to_user=request.user)
         
         return Response({
-            'sent_requests': SwapRequestDetailSerializer(sent_requests, many=True).data,
-            'received_requests': SwapRequestDetailSerializer(received_requests, many=True).data
+            'sent_requests': self.get_serializer(sent_requests, many=True).data,
+            'received_requests': self.get_serializer(received_requests, many=True).data
         })
     
-    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Get per-status counts of the current user's sent and received requests"""
+        try:
+            cache_key = swap_summary_cache_key(request.user.id)
+            summary = cache.get(cache_key)
+            if summary is None:
+                summary = self._build_summary(request.user)
+                cache.set(cache_key, summary, self.summary_cache_timeout)
+            return Response(summary)
+        except Exception as e:
+            logger.error(f"Failed to get swap summary: {e}")
+            return Response(
+                {"error": "Failed to load swap summary. Please try again."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    @action(detail=False, methods=['get'])
+    def rings(self, request):
+        """Suggested multi-party swaps the current user is part of (see find_swap_rings)"""
+        rings = SwapRing.objects.filter(members__user=request.user).prefetch_related(
+            Prefetch('members', queryset=SwapRingMember.objects.select_related('user', 'teaches'))
+        ).order_by('size', 'id')
+        return Response(SwapRingSerializer(rings, many=True, context={'request': request}).data)
+    
+    def _build_summary(self, user):
+        """Count sent and received requests per status in a single grouped query"""
+        summary = {
+            direction: {**{value: 0 for value in SwapRequest.Status.values}, 'total': 0}
+            for direction in ['sent', 'received']
+        }
+        
+        rows = SwapRequest.objects.filter(
+            Q(from_user=user) | Q(to_user=user)
+        ).order_by().annotate(
+            direction=Case(When(from_user=user, then=Value('sent')), default=Value('received'))
+        ).values('direction', 'status').annotate(count=Count('id'))
+        
+        for row in rows:
+            summary[row['direction']][row['status']] = row['count']
+            summary[row['direction']]['total'] += row['count']
+        
+        return summary
+    
+    @action(
+        detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer]
+    )
     def monitor(self, request):
-        """Admin endpoint to monitor all swap requests"""
+        """
+        Admin endpoint to monitor all swap requests, newest first. Filters:
+        ?status= (comma-separated), ?user= and ?skill= (id or name, either
+        side of the swap), ?created_after= / ?created_before=. Pages with
+        ?cursor= (the previous page's next_cursor) and ?limit=; ?format=csv
+        streams every matching swap instead.
+        """
         try:
-            status_filter = request.query_params.get('status', '')
-            queryset = SwapRequest.objects.all()
-            
-            if status_filter:
-                queryset = queryset.filter(status=status_filter)
-            
-            queryset = queryset.order_by('-created_at')
-            serializer = SwapRequestDetailSerializer(queryset, many=True)
+            filters = swap_monitor.parse_filters(request.query_params)
+            limit = int(request.query_params.get('limit') or swap_monitor.get_setting('PAGE_SIZE'))
+        except (ValidationError, ValueError) as e:
+            message = e.messages[0] if isinstance(e, ValidationError) else "limit must be a number."
+            return Response({"error": message}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            queryset = swap_monitor.apply_filters(SwapRequest.objects.all(), filters)
+            if request.accepted_renderer.format == 'csv':
+                response = StreamingHttpResponse(swap_monitor.stream_csv(queryset), content_type='text/csv')
+                response['Content-Disposition'] = 'attachment; filename="swap_requests.csv"'
+                return response
             
+            rows, next_cursor = swap_monitor.page(queryset, max(1, min(limit, swap_monitor.get_setting('MAX_PAGE_SIZE'))))
             return Response({
-                "swap_requests": serializer.data,
-                "total_count": queryset.count(),
-                "status_filter": status_filter
+                "swap_requests": rows,
+                "next_cursor": next_cursor,
+                "status_filter": request.query_params.get('status', '')
             })
             
         except Exception as e:
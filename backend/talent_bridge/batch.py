@@ -0,0 +1,168 @@
+"""
+Batch API.
+
+``POST /api/batch/`` runs an ordered list of API sub-requests in one HTTP
+round trip. Each sub-request is resolved with the URL resolver and handed
+straight to its view, authenticated as the caller, so it behaves exactly
+like the same call made on its own minus the network and middleware cost.
+
+With ``"atomic": true`` the whole batch runs in one transaction: the first
+sub-request that fails rolls back everything before it and the rest are
+not run. Background jobs queued by the batch only start once it commits.
+"""
+import io
+import json
+import logging
+from urllib.parse import urlencode, urlsplit
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MAX_REQUESTS': 20,
+    'PATH_PREFIX': '/api/',
+}
+
+ALLOWED_METHODS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+# Status reported for items not run because an earlier item of an atomic batch failed
+NOT_RUN = status.HTTP_424_FAILED_DEPENDENCY
+
+def get_setting(name):
+    return getattr(settings, 'BATCH', {}).get(name, DEFAULTS[name])
+
+class BatchRollback(Exception):
+    """Raised inside an atomic batch to undo it"""
+
+class BatchView(APIView):
+    """
+    Run several API calls in one request.
+
+    Body: ``{"atomic": false, "requests": [{"method": "POST", "path":
+    "/api/user-skills/", "body": {...}, "query": {...}}, ...]}``. The
+    response lists ``{"status", "body"}`` per sub-request, in order.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'batch'
+
+    def post(self, request):
+        items = request.data.get('requests') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({"error": "'requests' must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > get_setting('MAX_REQUESTS'):
+            return Response(
+                {"error": f"A batch can hold at most {get_setting('MAX_REQUESTS')} requests."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        errors = {index: error for index, error in enumerate(map(self.validate_item, items)) if error}
+        if errors:
+            return Response({"error": "Invalid batch.", "requests": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        atomic = bool(request.data.get('atomic', False))
+        results = []
+        try:
+            if atomic:
+                with transaction.atomic():
+                    self.run(request, items, results, stop_on_error=True)
+                    if results[-1]['status'] >= 400:
+                        raise BatchRollback
+            else:
+                self.run(request, items, results, stop_on_error=False)
+        except BatchRollback:
+            results += [
+                {"status": NOT_RUN, "body": {"error": "Not run: an earlier request in the batch failed."}}
+                for _ in items[len(results):]
+            ]
+            return Response(
+                {"atomic": True, "committed": False, "results": results},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({"atomic": atomic, "committed": True, "results": results})
+
+    def validate_item(self, item):
+        """Error message for a malformed sub-request, or None"""
+        if not isinstance(item, dict):
+            return "Each request must be an object."
+        if str(item.get('method', 'GET')).upper() not in ALLOWED_METHODS:
+            return f"Method must be one of {', '.join(sorted(ALLOWED_METHODS))}."
+        path = item.get('path')
+        if not isinstance(path, str) or not path.startswith(get_setting('PATH_PREFIX')):
+            return f"'path' must start with {get_setting('PATH_PREFIX')}."
+        if urlsplit(path).path.rstrip('/') == self.request.path.rstrip('/'):
+            return "Batches cannot be nested."
+        if not isinstance(item.get('query', {}), dict):
+            return "'query' must be an object."
+        return None
+
+    def run(self, request, items, results, stop_on_error):
+        for item in items:
+            results.append(self.dispatch_item(request, item))
+            if stop_on_error and results[-1]['status'] >= 400:
+                return
+
+    def dispatch_item(self, request, item):
+        """Resolve and call the view for one sub-request"""
+        method = str(item.get('method', 'GET')).upper()
+        path, _, query_string = item['path'].partition('?')
+        if item.get('query'):
+            query_string = '&'.join(filter(None, [query_string, urlencode(item['query'], doseq=True)]))
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return {"status": status.HTTP_404_NOT_FOUND, "body": {"error": "Not found."}}
+
+        sub_request = self.build_request(request, method, path, query_string, item.get('body'))
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        except Exception as e:
+            logger.error(f"Batch sub-request {method} {path} failed: {e}", exc_info=True)
+            return {
+                "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "body": {"error": "An unexpected error occurred. Please try again."}
+            }
+        return {"status": response.status_code, "body": self.response_body(response)}
+
+    def build_request(self, request, method, path, query_string, body):
+        """A request for ``path`` that shares the caller's headers and authentication"""
+        payload = b'' if body is None else json.dumps(body).encode('utf-8')
+        environ = {
+            key: value for key, value in request.META.items()
+            if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_CONTENT_ENCODING')
+        }
+        environ.update({
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'SCRIPT_NAME': '',
+            'QUERY_STRING': query_string,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(payload)),
+            'wsgi.input': io.BytesIO(payload),
+        })
+        sub_request = WSGIRequest(environ)
+        # The caller is already authenticated; DRF reuses the user instead of
+        # decoding the token and loading the user again for every item
+        sub_request.user = request.user
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+        sub_request._dont_enforce_csrf_checks = True
+        return sub_request
+
+    def response_body(self, response):
+        if hasattr(response, 'data'):
+            return response.data
+        content = b''.join(response) if response.streaming else response.content
+        if response.get('Content-Type', '').startswith('application/json'):
+            try:
+                return json.loads(content)
+            except ValueError:
+                pass
+        return content.decode(response.charset or 'utf-8', errors='replace')
@@ -1,8 +1,10 @@
 import logging
 import json
 import re
-from django.http import JsonResponse
-from django.core.exceptions import ValidationError
+from django.http import Http404, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+from django.core.exceptions import PermissionDenied, ValidationError
 from django.utils.deprecation import MiddlewareMixin
 from django.utils.html import strip_tags
 from rest_framework import status
@@ -10,8 +12,23 @@ from rest_framework.response import Response
 from rest_framework.views import exception_handler
 from django.conf import settings
 
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
 logger = logging.getLogger(__name__)
 
+COMPRESSION_DEFAULTS = {
+    'MIN_SIZE': 1024,
+    'GZIP_MAX_RANDOM_BYTES': 100,
+    'BROTLI_QUALITY': 4,
+    'CONTENT_TYPES': ['application/json', 'text/', 'application/javascript', 'image/svg+xml'],
+}
+
+def compression_setting(name):
+    return getattr(settings, 'COMPRESSION', {}).get(name, COMPRESSION_DEFAULTS[name])
+
 class SecurityMiddleware(MiddlewareMixin):
     """
     Security middleware to protect against common attacks
@@ -95,6 +112,9 @@ class ErrorHandlingMiddleware(MiddlewareMixin):
     
     def process_exception(self, request, exception):
         """Handle exceptions and return consistent error responses"""
+        if isinstance(exception, (Http404, PermissionDenied)):
+            # Django turns these into 404 and 403 responses itself
+            return None
         logger.error(f"Unhandled exception: {exception}", exc_info=True)
         
         if request.path.startswith('/api/'):
@@ -124,6 +144,114 @@ class RequestLoggingMiddleware(MiddlewareMixin):
         logger.info(f"Response: {response.status_code} for {request.method} {request.path}")
         return response
 
+class RateLimitHeadersMiddleware(MiddlewareMixin):
+    """
+    Report the state of the tightest rate-limit bucket checked for the
+    request (see talent_bridge/throttling.py) in RateLimit-* headers
+    """
+    
+    def process_response(self, request, response):
+        bucket = getattr(request, 'rate_limit', None)
+        if bucket is not None:
+            response['RateLimit-Limit'] = str(bucket.limit)
+            response['RateLimit-Remaining'] = str(bucket.remaining)
+            response['RateLimit-Reset'] = str(bucket.reset)
+            response['RateLimit-Policy'] = f"{bucket.limit};w={bucket.period}"
+        return response
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress text and JSON responses with brotli (when the brotli package is
+    installed) or gzip, following the client's Accept-Encoding preferences.
+    Bodies under COMPRESSION['MIN_SIZE'] bytes are sent as is, since the
+    headers and CPU cost outweigh the saving.
+    """
+    
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code == 206:
+            return response
+        if not response.streaming and len(response.content) < compression_setting('MIN_SIZE'):
+            return response
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not any(content_type.startswith(prefix) for prefix in compression_setting('CONTENT_TYPES')):
+            return response
+        
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        
+        if response.streaming:
+            response.streaming_content = self.compress_stream(encoding, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = self.compress(encoding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+        
+        # The body is no longer byte-identical to what a strong ETag promised
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+    
+    @staticmethod
+    def negotiate(accept_encoding):
+        """
+        Best supported coding for an Accept-Encoding header, or None; brotli
+        wins ties. Codings with q=0 are refused, and so is compression
+        altogether when the client ranks ``identity`` above every coding.
+        """
+        offered = ['br', 'gzip'] if brotli else ['gzip']
+        weights = {}
+        for part in accept_encoding.split(','):
+            coding, _, params = part.strip().partition(';')
+            coding = coding.strip().lower()
+            quality = 1.0
+            match = re.search(r'q\s*=\s*([0-9.]+)', params)
+            if match:
+                try:
+                    quality = float(match.group(1))
+                except ValueError:
+                    quality = 0.0
+            if coding:
+                weights[coding] = quality
+        best, best_quality = None, 0.0
+        for coding in offered:
+            quality = weights.get(coding, weights.get('*', 0.0))
+            if quality > best_quality:
+                best, best_quality = coding, quality
+        if weights.get('identity', 0.0) > best_quality:
+            return None
+        return best
+    
+    @staticmethod
+    def compress(encoding, content):
+        if encoding == 'br':
+            return brotli.compress(content, quality=compression_setting('BROTLI_QUALITY'))
+        # Random padding mitigates BREACH, as in Django's GZipMiddleware
+        return compress_string(content, max_random_bytes=compression_setting('GZIP_MAX_RANDOM_BYTES'))
+    
+    @staticmethod
+    def compress_stream(encoding, chunks):
+        if encoding == 'gzip':
+            return compress_sequence(chunks, max_random_bytes=compression_setting('GZIP_MAX_RANDOM_BYTES'))
+        
+        def brotli_sequence():
+            compressor = brotli.Compressor(quality=compression_setting('BROTLI_QUALITY'))
+            for chunk in chunks:
+                # Flush per chunk so streamed rows reach the client promptly
+                data = compressor.process(chunk) + compressor.flush()
+                if data:
+                    yield data
+            yield compressor.finish()
+        return brotli_sequence()
+
 def custom_exception_handler(exc, context):
     """
     Custom exception handler for DRF
@@ -52,8 +52,39 @@ PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
 ]
 
-# Rate Limiting (if using django-ratelimit)
-# RATELIMIT_USE_CACHE = 'default'
+# Caches: 'default' holds swap summaries, facet counts and the badge catalog;
+# rate limit buckets get their own alias so those entries never cull them.
+# Local memory is per process; use Redis or Memcached in production, e.g.
+# {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/1'}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+        'OPTIONS': {'MAX_ENTRIES': 100000},  # Two buckets per active client and scope
+    },
+}
+
+# Rate Limiting: token buckets per user and per IP (talent_bridge/throttling.py).
+# Each scope ("<viewset basename>.<action>" or a view's throttle_scope) has its
+# own buckets; rates are "<requests>/<period>", None disables a bucket.
+RATE_LIMITS = {
+    'CACHE': 'throttle',  # Must be shared by all workers in production (Redis, Memcached)
+    'KEY_PREFIX': 'rl',
+    'DEFAULT': {'user': '600/min', 'ip': '300/min'},
+    'SCOPES': {
+        'auth.login': {'ip': '10/min'},
+        'auth.register': {'ip': '5/hour'},
+        'user.search': {'user': '60/min', 'ip': '120/min'},
+        'user.list': {'user': '120/min'},
+        'swaps.create': {'user': '20/min', 'ip': '60/min'},
+        'user-skills.bulk': {'user': '30/min'},
+        'batch': {'user': '60/min'},
+    },
+}
 
 # File Upload Security
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
@@ -85,10 +116,14 @@ INSTALLED_APPS = [
     'swaps',
     'ratings',
     'notifications',
+    'jobs',
+    'events',
+    'metrics',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Must be at the top
+    'talent_bridge.middleware.CompressionMiddleware',  # gzip/brotli; before anything that edits the body
     'talent_bridge.middleware.SecurityMiddleware',  # Security checks
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -97,6 +132,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'talent_bridge.middleware.RateLimitHeadersMiddleware',  # RateLimit-* headers set by TokenBucketThrottle
     'talent_bridge.middleware.ErrorHandlingMiddleware',
     'talent_bridge.middleware.RequestLoggingMiddleware',
 ]
@@ -186,11 +222,31 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'talent_bridge.renderers.FastJSONRenderer',  # orjson when installed, stdlib json otherwise
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'talent_bridge.throttling.TokenBucketThrottle',  # Rates in RATE_LIMITS
+    ],
+    'NUM_PROXIES': 0,  # Client IP for rate limits; set to the number of proxies in front of the app
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'EXCEPTION_HANDLER': 'talent_bridge.middleware.custom_exception_handler',
 }
 
+COMPRESSION = {
+    'MIN_SIZE': 1024,  # Bytes; smaller responses are sent uncompressed
+    'GZIP_MAX_RANDOM_BYTES': 100,  # BREACH mitigation padding, as in Django's GZipMiddleware
+    'BROTLI_QUALITY': 4,  # 0-11; used only when the brotli package is installed
+    'CONTENT_TYPES': ['application/json', 'text/', 'application/javascript', 'image/svg+xml'],
+}
+
+BATCH = {
+    'MAX_REQUESTS': 20,  # Sub-requests per POST /api/batch/
+    'PATH_PREFIX': '/api/',  # Only API views can be batched
+}
+
 # JWT Settings
 
 SIMPLE_JWT = {
@@ -205,6 +261,31 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
 
+# Background job queue (run with `python manage.py run_workers`)
+JOB_QUEUE = {
+    'ALWAYS_EAGER': False,  # Run tasks in-process on commit instead of queueing
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 5,  # Seconds, doubled after each failed attempt
+    'LOCK_TIMEOUT': 300,  # Seconds before a running job is considered abandoned
+}
+
+# Reputation scoring (see users/reputation.py)
+REPUTATION = {
+    'PRIOR_MEAN': 3.5,  # Score new users are shrunk towards
+    'PRIOR_WEIGHT': 5.0,  # Number of pseudo-ratings at the prior mean
+    'HALF_LIFE_DAYS': 180,  # A rating's weight halves after this many days
+}
+
+# Notification retention (run with `python manage.py compact_notifications`)
+NOTIFICATION_RETENTION = {
+    'READ_DAYS': 30,  # Read notifications older than this are deleted
+    'ARCHIVE_DAYS': 180,  # Any notification older than this is archived, then deleted
+    'ARCHIVE_DIR': BASE_DIR / 'archive',
+}
+
+# Same-type swap request and rating notifications within this many seconds are merged
+NOTIFICATION_COALESCE_WINDOW = 86400
+
 # CORS Settings
 CORS_ALLOW_ALL_ORIGINS = False
 CORS_ALLOWED_ORIGINS = [
@@ -238,6 +319,62 @@ CORS_ALLOW_HEADERS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Avatar thumbnails (see users/avatars.py)
+AVATAR_RENDITIONS = {
+    'SIZES': [48, 128, 512],
+    'FORMAT': 'WEBP',  # Falls back to JPEG if Pillow lacks WebP support
+    'QUALITY': 82,
+}
+
+# Offline geocoding and ?near= proximity search (see users/geo.py)
+GEOCODING = {
+    'GEOHASH_PRECISION': 9,  # ~5 m cells
+    'DEFAULT_RADIUS_KM': 25,
+    'MAX_RADIUS_KM': 500,
+}
+
+# Related skills from co-occurrence (see skills/cooccurrence.py)
+RELATED_SKILLS = {
+    'TOP_K': 10,
+    'MIN_USERS': 2,  # Ignore pairs held together by fewer users
+    'BATCH_SIZE': 2000,
+}
+
+SKILL_DEDUP = {
+    'SIMILARITY_THRESHOLD': 0.6,  # Trigram Jaccard similarity for merge_skills and /api/skills/similar/
+    'BATCH_SIZE': 2000,  # Rows rewritten per UPDATE when merging
+}
+
+SKILL_TAXONOMY = {
+    'SEPARATOR': '>',  # Between levels in import_taxonomy files
+    'BATCH_SIZE': 2000,
+}
+
+SWAP_RINGS = {
+    'MAX_LENGTH': 4,  # 3- and 4-person rings
+    'BRANCHING': 20,  # Candidates kept per skill, best reputation first
+    'RINGS_PER_USER': 3,
+    'BATCH_SIZE': 2000,
+}
+
+SWAP_MONITOR = {
+    'PAGE_SIZE': 50,  # Rows per page of /api/swaps/monitor/ without ?limit=
+    'MAX_PAGE_SIZE': 500,
+    'CSV_CHUNK_SIZE': 2000,  # Rows fetched and written per chunk of the CSV export
+}
+
+EVENT_LOG = {
+    'BATCH_SIZE': 500,  # Events handed to a consumer at once, and rows per insert in record_many
+    'SETTLE_SECONDS': 1,  # The admin event feed holds back events this young in case earlier ones are still uncommitted
+    'GAP_SECONDS': 60,  # Consumers wait this long for an id skipped in the log to commit before taking it as rolled back
+}
+
+METRICS = {
+    'BATCH_SIZE': 1000,  # Source rows counted per rollup transaction
+    'GAP_SECONDS': 60,  # Rollups wait this long for an id skipped in a source table to commit before taking it as rolled back
+    'MAX_RANGE_DAYS': 1100,  # Longest range /api/admin/metrics/timeseries/ serves
+}
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -296,5 +433,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'jobs': {
+            'handlers': ['file', 'console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
@@ -0,0 +1,509 @@
+import datetime
+import decimal
+import gzip
+import uuid
+from collections import namedtuple
+from io import BytesIO
+from itertools import count
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from notifications.models import Notification
+from ratings.models import Rating
+from skills.cooccurrence import rebuild as rebuild_related_skills
+from skills.models import Skill, UserSkill
+from swaps.models import SwapRequest, SwapRing, SwapRingMember
+from users.models import Badge, UserBadge
+from users.seeding import generate_dataset
+from talent_bridge.middleware import CompressionMiddleware, brotli
+from talent_bridge.renderers import FastJSONRenderer
+from talent_bridge.throttling import take_token
+from talent_bridge.urls import router
+
+User = get_user_model()
+
+# Maximum number of SQL queries per routed action, independent of dataset and
+# page size. Keys are (URL name, viewset action) as registered on the router.
+QUERY_BUDGETS = {
+    # users
+    # count + page + 2 profile prefetches, plus 3 grouped facet queries on a cold cache
+    ('user-list', 'list'): 7,
+    ('user-list', 'create'): 6,
+    ('user-detail', 'retrieve'): 4,
+    ('user-detail', 'update'): 3,
+    ('user-detail', 'partial_update'): 3,
+    ('user-detail', 'destroy'): 15,
+    ('user-me', 'me'): 4,
+    ('user-my-profile', 'my_profile'): 4,
+    ('user-public-discover', 'public_discover'): 1,
+    ('user-update-profile', 'update_profile'): 5,
+    ('user-upload-avatar', 'upload_avatar'): 8,
+    ('user-my-requests', 'my_requests'): 2,
+    ('user-search', 'search'): 4,
+    ('user-matches', 'matches'): 5,
+    ('user-admin-list', 'admin_list'): 2,
+    ('user-admin-dashboard', 'admin_dashboard'): 25,
+    ('user-admin-users-detailed', 'admin_users_detailed'): 4,
+    ('user-admin-update', 'admin_update'): 5,
+    ('user-toggle-active', 'toggle_active'): 3,
+    ('user-ban', 'ban'): 6,
+    ('user-unban', 'unban'): 5,
+    # skills
+    ('skill-list', 'list'): 3,
+    ('skill-detail', 'retrieve'): 2,
+    ('skill-popular', 'popular'): 2,
+    ('skill-related', 'related'): 3,
+    ('skill-similar', 'similar'): 2,
+    ('skill-hierarchy', 'hierarchy'): 4,
+    ('skill-move', 'move'): 11,
+    ('skill-reject', 'reject'): 15,
+    ('user-skills-list', 'list'): 3,
+    ('user-skills-list', 'create'): 13,
+    ('user-skills-detail', 'retrieve'): 2,
+    ('user-skills-detail', 'update'): 3,
+    ('user-skills-detail', 'partial_update'): 3,
+    ('user-skills-detail', 'destroy'): 5,
+    ('user-skills-offered', 'offered'): 2,
+    ('user-skills-wanted', 'wanted'): 2,
+    ('user-skills-bulk', 'bulk'): 16,
+    # swaps
+    ('swaps-list', 'list'): 3,
+    ('swaps-list', 'create'): 28,
+    ('swaps-detail', 'retrieve'): 6,
+    ('swaps-detail', 'update'): 9,
+    ('swaps-detail', 'partial_update'): 9,
+    ('swaps-detail', 'destroy'): 8,
+    ('swaps-sent', 'sent'): 2,
+    ('swaps-received', 'received'): 2,
+    ('swaps-my-requests', 'my_requests'): 3,
+    ('swaps-summary', 'summary'): 2,
+    ('swaps-monitor', 'monitor'): 2,
+    ('swaps-accept', 'accept'): 10,
+    ('swaps-reject', 'reject'): 10,
+    ('swaps-complete', 'complete'): 10,
+    ('swaps-cancel', 'cancel'): 10,
+    ('swaps-rings', 'rings'): 3,
+    # ratings
+    ('ratings-list', 'list'): 7,
+    ('ratings-list', 'create'): 15,
+    ('ratings-detail', 'retrieve'): 6,
+    ('ratings-detail', 'update'): 13,
+    ('ratings-detail', 'partial_update'): 12,
+    ('ratings-detail', 'destroy'): 12,
+    # notifications
+    ('notifications-list', 'list'): 3,
+    ('notifications-detail', 'retrieve'): 2,
+    ('notifications-detail', 'update'): 3,
+    ('notifications-detail', 'partial_update'): 3,
+    ('notifications-detail', 'destroy'): 3,
+    ('notifications-unread', 'unread'): 2,
+    ('notifications-mark-all-read', 'mark_all_read'): 2,
+    ('notifications-mark-read', 'mark_read'): 3,
+    ('notifications-broadcast', 'broadcast'): 3,
+}
+
+# Routed actions that cannot succeed through the API and so have no budget
+UNBUDGETED = {
+    # NotificationSerializer exposes no user field, notifications are server-side only
+    ('notifications-list', 'create'),
+}
+
+# Each measured request: who sends it, the URL kwargs, the payload and the
+# status it must get (201 for create, 204 for delete and 200 otherwise by
+# default). Callables receive the test case so per-request fixtures are
+# created outside the capture.
+Case = namedtuple(
+    'Case', 'route action method role kwargs data format status', defaults=('member', None, None, 'json', None)
+)
+
+def expected_status(case):
+    if case.status:
+        return case.status
+    if case.action == 'create':
+        return 201
+    return 204 if case.method == 'delete' else 200
+
+CASES = [
+    Case('user-list', 'list', 'get', None),
+    Case('user-list', 'create', 'post', 'admin', data=lambda t: {'username': t.unique('created').replace(' ', '_')}),
+    Case('user-detail', 'retrieve', 'get', kwargs=lambda t: {'pk': t.other.pk}),
+    Case('user-detail', 'update', 'put', kwargs=lambda t: {'pk': t.member.pk},
+         data={'first_name': 'Budget', 'last_name': 'Member', 'bio': 'Updated', 'location': 'Pune'}),
+    Case('user-detail', 'partial_update', 'patch', kwargs=lambda t: {'pk': t.member.pk},
+         data={'bio': 'Patched'}),
+    Case('user-detail', 'destroy', 'delete', 'admin', kwargs=lambda t: {'pk': t.make_user().pk}),
+    Case('user-me', 'me', 'get'),
+    Case('user-my-profile', 'my_profile', 'get'),
+    Case('user-public-discover', 'public_discover', 'get', None),
+    Case('user-update-profile', 'update_profile', 'patch', data={'location': 'Chennai'}),
+    Case('user-upload-avatar', 'upload_avatar', 'post', data=lambda t: {'avatar': t.avatar_file()}, format='multipart'),
+    Case('user-my-requests', 'my_requests', 'get'),
+    Case('user-search', 'search', 'get', data={'q': 'budget'}),
+    Case('user-matches', 'matches', 'get', data={'mutual': 'false'}),
+    Case('user-admin-list', 'admin_list', 'get', 'admin'),
+    Case('user-admin-dashboard', 'admin_dashboard', 'get', 'admin'),
+    Case('user-admin-users-detailed', 'admin_users_detailed', 'get', 'admin'),
+    Case('user-admin-update', 'admin_update', 'patch', 'admin', kwargs=lambda t: {'pk': t.other.pk},
+         data={'availability': 'weekends'}),
+    Case('user-toggle-active', 'toggle_active', 'post', 'admin', kwargs=lambda t: {'pk': t.make_user().pk}),
+    Case('user-ban', 'ban', 'post', 'admin', kwargs=lambda t: {'pk': t.make_user().pk}),
+    Case('user-unban', 'unban', 'post', 'admin', kwargs=lambda t: {'pk': t.make_user().pk}),
+    Case('skill-list', 'list', 'get'),
+    Case('skill-detail', 'retrieve', 'get', kwargs=lambda t: {'pk': t.skill.pk}),
+    Case('skill-popular', 'popular', 'get'),
+    Case('skill-similar', 'similar', 'get', data={'name': 'Pythn'}),
+    Case('skill-hierarchy', 'hierarchy', 'get', kwargs=lambda t: {'pk': t.skill.pk}),
+    Case('skill-move', 'move', 'post', 'admin',
+         kwargs=lambda t: {'pk': Skill.objects.create(name=t.unique('moved')).pk},
+         data=lambda t: {'parent': t.skill.pk}),
+    Case('skill-related', 'related', 'get', kwargs=lambda t: {'pk': Skill.objects.get(name='Python').pk}),
+    Case('skill-reject', 'reject', 'post', 'admin',
+         kwargs=lambda t: {'pk': Skill.objects.create(name=t.unique('Rejected')).pk}),
+    Case('user-skills-list', 'list', 'get'),
+    Case('user-skills-list', 'create', 'post',
+         data=lambda t: {'skill_name': t.unique('Skill'), 'skill_type': 'offered', 'proficiency': 3}),
+    Case('user-skills-detail', 'retrieve', 'get', 'admin', kwargs=lambda t: {'pk': t.admin_skill.pk}),
+    Case('user-skills-detail', 'update', 'put', 'admin', kwargs=lambda t: {'pk': t.admin_skill.pk},
+         data=lambda t: {'skill_name': t.unique('Skill'), 'skill_type': 'offered', 'proficiency': 4}),
+    Case('user-skills-detail', 'partial_update', 'patch', 'admin', kwargs=lambda t: {'pk': t.admin_skill.pk},
+         data={'proficiency': 2}),
+    Case('user-skills-detail', 'destroy', 'delete', 'admin',
+         kwargs=lambda t: {'pk': t.make_user_skill(t.admin).pk}),
+    Case('user-skills-offered', 'offered', 'get'),
+    Case('user-skills-wanted', 'wanted', 'get'),
+    Case('user-skills-bulk', 'bulk', 'put', data=lambda t: {
+        'offered': [{'skill_name': t.skill.name, 'proficiency': 3}, {'skill_name': t.unique('Bulk offer')}],
+        'wanted': [{'skill_name': t.unique('Bulk want'), 'description': 'Measured'}],
+    }),
+    Case('swaps-list', 'list', 'get'),
+    Case('swaps-list', 'create', 'post',
+         data=lambda t: {'to_user_id': t.other.pk, 'skill_offered_name': t.unique('Offer'),
+                         'skill_wanted_name': t.unique('Want'), 'message': 'Swap?'}),
+    Case('swaps-detail', 'retrieve', 'get', kwargs=lambda t: {'pk': t.make_swap().pk}),
+    Case('swaps-detail', 'update', 'put', 'other', kwargs=lambda t: {'pk': t.make_swap().pk},
+         data={'response_message': 'Reviewed'}),
+    Case('swaps-detail', 'partial_update', 'patch', 'other', kwargs=lambda t: {'pk': t.make_swap().pk},
+         data={'response_message': 'Reviewed'}),
+    Case('swaps-detail', 'destroy', 'delete', 'admin', kwargs=lambda t: {'pk': t.make_swap().pk}),
+    Case('swaps-sent', 'sent', 'get'),
+    Case('swaps-received', 'received', 'get'),
+    Case('swaps-my-requests', 'my_requests', 'get'),
+    Case('swaps-summary', 'summary', 'get'),
+    Case('swaps-monitor', 'monitor', 'get', 'admin',
+         data=lambda t: {'status': 'pending,completed', 'user': t.member.pk, 'skill': t.skill.pk}),
+    Case('swaps-accept', 'accept', 'post', 'other', kwargs=lambda t: {'pk': t.make_swap().pk}),
+    Case('swaps-reject', 'reject', 'post', 'other', kwargs=lambda t: {'pk': t.make_swap().pk}),
+    Case('swaps-complete', 'complete', 'post',
+         kwargs=lambda t: {'pk': t.make_swap(SwapRequest.Status.ACCEPTED).pk}),
+    Case('swaps-cancel', 'cancel', 'delete', kwargs=lambda t: {'pk': t.make_swap().pk}, status=200),
+    Case('swaps-rings', 'rings', 'get'),
+    Case('ratings-list', 'list', 'get'),
+    Case('ratings-list', 'create', 'post',
+         data=lambda t: {'swap_request_id': t.make_swap(SwapRequest.Status.COMPLETED).pk, 'score': 5}),
+    Case('ratings-detail', 'retrieve', 'get', kwargs=lambda t: {'pk': t.make_rating().pk}),
+    Case('ratings-detail', 'update', 'put', kwargs=lambda t: {'pk': t.make_rating().pk},
+         data=lambda t: {'swap_request': t.make_swap(SwapRequest.Status.COMPLETED).pk, 'score': 4}),
+    Case('ratings-detail', 'partial_update', 'patch', kwargs=lambda t: {'pk': t.make_rating().pk},
+         data={'score': 3}),
+    Case('ratings-detail', 'destroy', 'delete', kwargs=lambda t: {'pk': t.make_rating().pk}),
+    Case('notifications-list', 'list', 'get'),
+    Case('notifications-detail', 'retrieve', 'get', 'admin',
+         kwargs=lambda t: {'pk': t.make_notification(t.admin).pk}),
+    Case('notifications-detail', 'update', 'put', 'admin',
+         kwargs=lambda t: {'pk': t.make_notification(t.admin).pk}, data={'is_read': True}),
+    Case('notifications-detail', 'partial_update', 'patch', 'admin',
+         kwargs=lambda t: {'pk': t.make_notification(t.admin).pk}, data={'is_read': True}),
+    Case('notifications-detail', 'destroy', 'delete', 'admin',
+         kwargs=lambda t: {'pk': t.make_notification(t.admin).pk}),
+    Case('notifications-unread', 'unread', 'get'),
+    Case('notifications-mark-all-read', 'mark_all_read', 'post'),
+    Case('notifications-mark-read', 'mark_read', 'post',
+         data=lambda t: {'ids': [t.make_notification(t.member).pk]}),
+    Case('notifications-broadcast', 'broadcast', 'post', 'admin',
+         data={'title': 'Maintenance', 'message': 'Back soon'}),
+]
+
+def routed_actions():
+    """Every (URL name, action) pair exposed by the API router"""
+    pairs = set()
+    for pattern in router.urls:
+        actions = getattr(pattern.callback, 'actions', None)
+        if pattern.name and actions:
+            pairs.update((pattern.name, action) for action in actions.values())
+    return pairs
+
+class QueryBudgetTests(TestCase):
+    """
+    Every routed action must stay within its query budget, and the count must
+    not change as the dataset grows, so an N+1 fails even under budget.
+    """
+    sizes = (8, 32)
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        cache.clear()
+        self.sequence = count()
+        self.member = User.objects.create_user(
+            username='budget_member', email='budget_member@example.com', password='password123'
+        )
+        self.other = User.objects.create_user(
+            username='budget_other', email='budget_other@example.com', password='password123'
+        )
+        self.admin = User.objects.create_user(
+            username='budget_admin', email='budget_admin@example.com', password='password123',
+            role=User.Roles.ADMIN, is_staff=True
+        )
+        self.skill = Skill.objects.create(name='Budget Skill')
+        self.admin_skill = UserSkill.objects.create(
+            user=self.admin, skill=self.skill, skill_type=UserSkill.SkillType.OFFERED
+        )
+        badge = Badge.objects.create(name='Budget Badge', description='Measured', icon='*')
+        UserBadge.objects.create(user=self.other, badge=badge)
+
+    def unique(self, label):
+        return f"{label} {next(self.sequence)}"
+
+    def make_user(self):
+        name = self.unique('budget_user').replace(' ', '_')
+        return User.objects.create_user(username=name, email=f"{name}@example.com", password='password123')
+
+    def make_user_skill(self, user):
+        skill = Skill.objects.create(name=self.unique('Skill'))
+        return UserSkill.objects.create(user=user, skill=skill, skill_type=UserSkill.SkillType.WANTED)
+
+    def make_swap(self, status=SwapRequest.Status.PENDING, from_user=None, to_user=None):
+        return SwapRequest.objects.create(
+            from_user=from_user or self.member, to_user=to_user or self.other,
+            skill_offered=self.skill, skill_wanted=self.skill, status=status
+        )
+
+    def make_rating(self):
+        swap = self.make_swap(SwapRequest.Status.COMPLETED)
+        return Rating.objects.create(from_user=self.other, to_user=self.member, swap_request=swap, score=4)
+
+    def make_notification(self, user):
+        return Notification.objects.create(
+            user=user, notification_type=Notification.Type.SYSTEM, title='Budget', message='Measured'
+        )
+
+    def avatar_file(self):
+        buffer = BytesIO()
+        Image.new('RGB', (64, 64), 'teal').save(buffer, format='PNG')
+        return SimpleUploadedFile('avatar.png', buffer.getvalue(), content_type='image/png')
+
+    def grow(self, size):
+        """Add ``size`` seeded users plus rows owned by the measured users"""
+        generate_dataset(users=size, seed=size, prefix=f'budget{size}_')
+        partners = list(User.objects.filter(username__startswith=f'budget{size}_'))
+        for i, partner in enumerate(partners):
+            sender, recipient = (self.member, partner) if i % 2 else (partner, self.member)
+            self.make_swap(from_user=sender, to_user=recipient)
+            completed = self.make_swap(SwapRequest.Status.COMPLETED, from_user=partner, to_user=self.other)
+            Rating.objects.create(from_user=partner, to_user=self.member, swap_request=completed, score=5)
+            self.make_notification(self.member)
+            self.make_user_skill(self.member)
+            Skill.objects.create(name=self.unique('sub-skill'), parent=self.skill)
+        for first, second in zip(partners[::2], partners[1::2]):
+            ring = SwapRing.objects.create(signature=self.unique('ring'), size=3)
+            SwapRingMember.objects.bulk_create(
+                SwapRingMember(ring=ring, user=user, position=position, teaches=self.skill)
+                for position, user in enumerate([self.member, first, second])
+            )
+        rebuild_related_skills()
+
+    def client_for(self, role):
+        client = APIClient()
+        if role:
+            user = getattr(self, role)
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        return client
+
+    def measure(self, case):
+        resolve = lambda value: value(self) if callable(value) else value
+        kwargs = resolve(case.kwargs) or {}
+        data = resolve(case.data)
+        client = self.client_for(case.role)
+        url = reverse(case.route, kwargs=kwargs)
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            if case.method == 'get':
+                response = client.get(url, data)
+            else:
+                response = getattr(client, case.method)(url, data, format=case.format)
+
+        self.assertEqual(
+            response.status_code, expected_status(case),
+            f"{case.route} {case.action} returned {response.status_code}: {getattr(response, 'data', '')}"
+        )
+        return len(queries)
+
+    def test_every_routed_action_has_a_budget(self):
+        budgeted = set(QUERY_BUDGETS) | UNBUDGETED
+        self.assertEqual(routed_actions() - budgeted, set())
+        self.assertEqual(budgeted - routed_actions(), set())
+        self.assertEqual({(case.route, case.action) for case in CASES}, set(QUERY_BUDGETS))
+
+    def test_query_counts_stay_within_budget(self):
+        counts = {}
+        for size in self.sizes:
+            self.grow(size)
+            for case in CASES:
+                counts.setdefault((case.route, case.action), []).append(self.measure(case))
+
+        for key, measured in counts.items():
+            with self.subTest(route=key[0], action=key[1], counts=measured):
+                self.assertLessEqual(max(measured), QUERY_BUDGETS[key])
+                self.assertEqual(len(set(measured)), 1, "query count grows with the dataset")
+
+
+class TokenBucketTests(TestCase):
+    def setUp(self):
+        self.cache = caches['throttle']
+        self.cache.clear()
+
+    def test_bucket_drains_and_refills(self):
+        buckets = [take_token(self.cache, 'rl:test', '3/min', now=1000) for _ in range(4)]
+        self.assertEqual([bucket.allowed for bucket in buckets], [True, True, True, False])
+        self.assertEqual(buckets[3].retry_after, 20)
+        self.assertTrue(take_token(self.cache, 'rl:test', '3/min', now=1020).allowed)
+
+    def test_draining_bucket_is_kept_alive(self):
+        take_token(self.cache, 'rl:test', '3/min', now=1000)
+        with mock.patch.object(self.cache, 'touch', wraps=self.cache.touch) as touch:
+            self.assertTrue(take_token(self.cache, 'rl:test', '3/min', now=1001).allowed)
+        touch.assert_called_once_with('rl:test', 120)
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='batch_member', email='batch_member@example.com', password='password123'
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.member).access_token}")
+        self.url = reverse('batch')
+
+    def add_skill(self, name):
+        return {'method': 'POST', 'path': '/api/user-skills/',
+                'body': {'skill_name': name, 'skill_type': 'offered', 'proficiency': 3}}
+
+    def invalid_skill(self):
+        return {'method': 'POST', 'path': '/api/user-skills/', 'body': {'skill_name': 'Broken', 'skill_type': 'sold'}}
+
+    def test_items_run_in_order_as_the_caller(self):
+        response = self.client.post(self.url, {'requests': [
+            self.add_skill('Pottery'),
+            {'method': 'GET', 'path': '/api/user-skills/offered/'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['committed'])
+        self.assertEqual([result['status'] for result in response.data['results']], [201, 200])
+        self.assertEqual(UserSkill.objects.get(user=self.member).skill.name, 'Pottery')
+
+    def test_failures_do_not_stop_a_plain_batch(self):
+        response = self.client.post(self.url, {'requests': [
+            self.add_skill('Pottery'), self.invalid_skill(), self.add_skill('Weaving'),
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.data['results']], [201, 400, 201])
+        self.assertEqual(UserSkill.objects.filter(user=self.member).count(), 2)
+
+    def test_atomic_batch_rolls_back_and_skips_the_rest(self):
+        response = self.client.post(self.url, {'atomic': True, 'requests': [
+            self.add_skill('Pottery'), self.invalid_skill(), self.add_skill('Weaving'),
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.data['committed'])
+        self.assertEqual([result['status'] for result in response.data['results']], [201, 400, 424])
+        self.assertFalse(UserSkill.objects.filter(user=self.member).exists())
+        self.assertFalse(Skill.objects.filter(name__in=['Pottery', 'Weaving']).exists())
+
+    def test_batches_cannot_be_nested(self):
+        response = self.client.post(self.url, {'requests': [
+            self.add_skill('Pottery'),
+            {'method': 'POST', 'path': '/api/batch/', 'body': {'requests': [self.add_skill('Weaving')]}},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['requests'], {1: "Batches cannot be nested."})
+        self.assertFalse(UserSkill.objects.exists())
+
+
+class FastJSONRendererTests(TestCase):
+    def assert_renders_like_drf(self, data):
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_output_matches_json_renderer(self):
+        self.assert_renders_like_drf({
+            'joined_at': timezone.make_aware(datetime.datetime(2026, 3, 1, 12, 30, 15, 250000)),
+            'naive': datetime.datetime(2026, 3, 1, 12, 30),
+            'day': datetime.date(2026, 3, 1),
+            'at': datetime.time(9, 5, 1, 500),
+            'rating': decimal.Decimal('4.50'),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'bio': 'Line\u2028separated\u2029paragraphs, caf\u00e9 \U0001f600 "quoted" </script>',
+            'counts': {1: 2, 'three': [None, True, 1.5]},
+            'huge': 2 ** 70,
+        })
+
+    def test_indented_requests_use_the_stdlib_encoder(self):
+        data = {'skills': ['Python', 'Django']}
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2')
+        )
+
+
+class CompressionNegotiationTests(TestCase):
+    def respond(self, accept_encoding, content_type='application/json'):
+        response = HttpResponse(b'{"skills": []}' * 200, content_type=content_type)
+        request = RequestFactory().get('/api/skills/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_gzip_is_used_when_accepted(self):
+        response = self.respond('gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), b'{"skills": []}' * 200)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_refused_codings_are_not_used(self):
+        for accept_encoding in ['', 'gzip;q=0', 'br;q=0, gzip;q=0', '*;q=0', 'identity',
+                                'gzip;q=0.5, identity', 'deflate']:
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.respond(accept_encoding)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response.content, b'{"skills": []}' * 200)
+                self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_wildcards_and_weights(self):
+        negotiate = CompressionMiddleware.negotiate
+        # brotli is only offered when the package is installed
+        self.assertEqual(negotiate('*'), 'br' if brotli else 'gzip')
+        self.assertEqual(negotiate('*;q=0.8, gzip;q=0'), 'br' if brotli else None)
+        self.assertEqual(negotiate('identity;q=0.5, gzip'), 'gzip')
+        self.assertEqual(negotiate('GZIP; q=0.3'), 'gzip')
+
+    def test_other_content_types_are_left_alone(self):
+        self.assertFalse(self.respond('gzip', content_type='image/png').has_header('Content-Encoding'))
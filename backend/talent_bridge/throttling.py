@@ -0,0 +1,140 @@
+"""
+Token-bucket rate limiting.
+
+Every API request draws a token from a per-user bucket (when authenticated)
+and a per-IP bucket. A rate of ``"20/min"`` is a bucket of 20 tokens that
+refills evenly over a minute, so clients can burst up to 20 requests and
+then continue at one every three seconds. Rates come from
+``RATE_LIMITS['DEFAULT']``, overridden per viewset action
+(``"<basename>.<action>"``, e.g. ``"swaps.create"``) or per view
+``throttle_scope`` in ``RATE_LIMITS['SCOPES']``.
+
+Buckets are stored as GCRA theoretical arrival times (the moment the bucket
+will be full again, in microseconds) in the shared cache, so a check is a
+single atomic ``incr``; denied requests give their token back with ``decr``.
+``incr`` keeps the key's original expiry, so busy buckets are ``touch``ed to
+stay alive while they drain. An idle bucket is reset with ``set``, which can
+admit a request or two extra under contention but never denies one wrongly.
+"""
+import re
+import time
+from functools import lru_cache
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+DEFAULTS = {
+    'CACHE': 'default',
+    'KEY_PREFIX': 'rl',
+    'DEFAULT': {'user': '600/min', 'ip': '300/min'},
+    'SCOPES': {},
+}
+
+PERIODS = {'s': 1, 'sec': 1, 'second': 1, 'm': 60, 'min': 60, 'minute': 60,
+           'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+MICROSECONDS = 1_000_000
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``"20/min"`` or ``"100/5m"`` as ``(capacity, period in seconds)``"""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d*)\s*([a-z]+)\s*', rate or '')
+    if not match or match.group(3) not in PERIODS or not int(match.group(1)):
+        raise ValueError(f"Invalid rate limit '{rate}'; expected e.g. '20/min'.")
+    return int(match.group(1)), int(match.group(2) or 1) * PERIODS[match.group(3)]
+
+class Bucket:
+    """Outcome of drawing one token: whether it was granted and the bucket's state afterwards"""
+    __slots__ = ('allowed', 'limit', 'period', 'remaining', 'reset', 'retry_after')
+
+    def __init__(self, allowed, limit, period, remaining, reset, retry_after):
+        self.allowed = allowed
+        self.limit = limit
+        self.period = period
+        self.remaining = remaining
+        self.reset = reset
+        self.retry_after = retry_after
+
+def _give_back(cache, key, interval):
+    try:
+        cache.decr(key, interval)
+    except ValueError:
+        # Expired in the meantime, so the bucket is full anyway
+        pass
+
+def take_token(cache, key, rate, now=None):
+    """Draw one token from the bucket at ``key``; returns a Bucket"""
+    capacity, period = parse_rate(rate)
+    now = int((time.time() if now is None else now) * MICROSECONDS)
+    interval = max(1, period * MICROSECONDS // capacity)
+    burst = period * MICROSECONDS
+    timeout = period * 2
+    try:
+        arrival = cache.incr(key, interval)
+    except ValueError:
+        # No bucket yet; another request may create it first
+        arrival = now + interval if cache.add(key, now + interval, timeout) else cache.incr(key, interval)
+    if arrival < now + interval:
+        # Idle long enough to be full again
+        arrival = now + interval
+        cache.set(key, arrival, timeout)
+    else:
+        # Expiring mid-drain would hand the client a full bucket
+        cache.touch(key, timeout)
+
+    allowed = arrival - now <= burst
+    if not allowed:
+        _give_back(cache, key, interval)
+        arrival -= interval
+    remaining = max(0, (burst - (arrival - now)) // interval)
+    reset = -(-(arrival - now) // MICROSECONDS)
+    retry_after = 0 if allowed else -(-(arrival + interval - burst - now) // MICROSECONDS)
+    return Bucket(allowed, capacity, period, remaining, reset, retry_after)
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Per-user and per-IP token buckets, configured in settings.RATE_LIMITS.
+    The tightest bucket is reported in ``RateLimit-*`` response headers.
+    """
+    bucket = None
+
+    def allow_request(self, request, view):
+        # Read settings once; attribute access on the settings object is slow on this path
+        config = getattr(settings, 'RATE_LIMITS', {})
+        scope = self.get_scope(view)
+        rates = {**config.get('DEFAULT', DEFAULTS['DEFAULT']), **config.get('SCOPES', {}).get(scope, {})}
+        cache = caches[config.get('CACHE', DEFAULTS['CACHE'])]
+        prefix = f"{config.get('KEY_PREFIX', DEFAULTS['KEY_PREFIX'])}:{scope}"
+
+        keys = []
+        if rates.get('user') and request.user is not None and request.user.is_authenticated:
+            keys.append((f"{prefix}:u:{request.user.pk}", rates['user']))
+        if rates.get('ip'):
+            keys.append((f"{prefix}:ip:{self.get_ident(request)}", rates['ip']))
+
+        buckets = []
+        for key, rate in keys:
+            buckets.append(take_token(cache, key, rate))
+            if not buckets[-1].allowed:
+                # Give back the tokens already drawn from the other buckets
+                for (drawn_key, _), drawn in zip(keys, buckets[:-1]):
+                    _give_back(cache, drawn_key, max(1, drawn.period * MICROSECONDS // drawn.limit))
+                break
+        if not buckets:
+            return True
+        self.bucket = min(buckets, key=lambda bucket: (bucket.allowed, bucket.remaining))
+        # Reported by RateLimitHeadersMiddleware
+        request._request.rate_limit = self.bucket
+        return self.bucket.allowed
+
+    def wait(self):
+        return self.bucket.retry_after if self.bucket is not None else None
+
+    def get_scope(self, view):
+        """``throttle_scope`` of the view, else ``"<basename>.<action>"`` for viewsets"""
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        if getattr(view, 'basename', None):
+            return f"{view.basename}.{view.action}"
+        return view.__class__.__name__
@@ -28,11 +28,14 @@ from rest_framework import status
 from django.http import HttpResponse
 import csv
 
-from users.views import RegisterView, CustomTokenObtainPairView, UserViewSet
+from users.views import RegisterView, CustomTokenObtainPairView, UserViewSet, avatar_rendition
 from skills.views import SkillViewSet, UserSkillViewSet
 from swaps.views import SwapRequestViewSet
 from ratings.views import RatingViewSet
 from notifications.views import NotificationViewSet
+from metrics.views import TimeseriesView
+from events.views import EventFeedView
+from .batch import BatchView
 
 # Create a router and register our viewsets with it
 router = DefaultRouter()
@@ -74,7 +77,13 @@ urlpatterns = [
     
     # API endpoints
     path('api/', include(router.urls)),
+    path('api/batch/', BatchView.as_view(), name='batch'),
     path('api/admin/reports/<str:report_type>/', AdminReportView.as_view(), name='admin-reports'),
+    path('api/admin/metrics/timeseries/', TimeseriesView.as_view(), name='metrics-timeseries'),
+    path('api/admin/events/', EventFeedView.as_view(), name='event-feed'),
+    
+    # Content-addressed avatar thumbnails, cached as immutable
+    path('media/avatars/r/<str:digest>/<int:size>-q<int:quality>.<str:ext>', avatar_rendition, name='avatar-rendition'),
 ]
 
 # Serve media files in development
@@ -0,0 +1,94 @@
+"""
+Avatar renditions.
+
+Uploaded avatars are cropped to a square and rendered at each configured size.
+Renditions are stored under the SHA-256 of the source image and named after
+their size, quality and format, so identical uploads share files and a
+rendition URL never changes content, which lets it be served with an
+immutable far-future cache lifetime. Changing the quality or format yields
+new files under new URLs.
+"""
+import hashlib
+from pathlib import Path
+from django.conf import settings
+from django.urls import reverse
+from PIL import Image, ImageOps, features
+
+DEFAULTS = {
+    'SIZES': [48, 128, 512],
+    'FORMAT': 'WEBP',
+    'QUALITY': 82,
+}
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+def get_setting(name):
+    return getattr(settings, 'AVATAR_RENDITIONS', {}).get(name, DEFAULTS[name])
+
+def rendition_format():
+    """Configured output format, falling back to JPEG without WebP support"""
+    image_format = get_setting('FORMAT').upper()
+    if image_format == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return image_format
+
+def rendition_root():
+    return Path(settings.MEDIA_ROOT) / 'avatars' / 'renditions'
+
+def rendition_path(digest, size, quality=None, extension=None):
+    quality = quality or get_setting('QUALITY')
+    extension = extension or EXTENSIONS[rendition_format()]
+    return rendition_root() / digest[:2] / digest / f"{size}-q{quality}.{extension}"
+
+def rendition_etag(digest, size, quality, extension):
+    """Entity tag of a rendition: its path names everything its bytes depend on"""
+    return f'"{digest}-{size}-q{quality}.{extension}"'
+
+def rendition_urls(digest, request=None):
+    """Map each size to the URL of its rendition, or None without renditions"""
+    if not digest:
+        return None
+    extension = EXTENSIONS[rendition_format()]
+    quality = get_setting('QUALITY')
+    urls = {}
+    for size in get_setting('SIZES'):
+        url = reverse('avatar-rendition', kwargs={
+            'digest': digest, 'size': size, 'quality': quality, 'ext': extension
+        })
+        urls[str(size)] = request.build_absolute_uri(url) if request else url
+    return urls
+
+def render_avatar(source_path):
+    """
+    Render every size for the image at ``source_path`` and return its digest.
+
+    Safe to run in a worker process: it touches only the filesystem. Sizes
+    that already exist for the digest at the configured quality and format
+    are skipped.
+    """
+    data = Path(source_path).read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    image_format = rendition_format()
+    
+    pending = [
+        size for size in get_setting('SIZES')
+        if not rendition_path(digest, size).exists()
+    ]
+    if not pending:
+        return digest
+    
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        edge = min(image.size)
+        square = ImageOps.fit(image, (edge, edge), method=Image.LANCZOS)
+        
+        for size in pending:
+            path = rendition_path(digest, size)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            rendition = square.resize((size, size), Image.LANCZOS) if size < edge else square
+            # Write to a temporary name so readers never see a partial file
+            partial = path.with_suffix('.partial')
+            rendition.save(partial, format=image_format, quality=get_setting('QUALITY'))
+            partial.replace(path)
+    
+    return digest
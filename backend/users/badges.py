@@ -0,0 +1,182 @@
+"""
+Declarative badge rules.
+
+Each rule awards a badge when a user's aggregate counters satisfy its
+conditions. Conditions are Django lookups on ``User`` so the same rule can be
+checked in memory for a single user after an event, or applied as a filter to
+award the badge to every qualifying user at once.
+"""
+import operator
+from django.core.cache import cache
+from django.db import transaction
+from events.log import build, record_many
+from events.models import Event
+from notifications.models import Notification
+from .models import BADGE_CATALOG_CACHE_KEY, User, Badge, UserBadge
+
+class BadgeRule:
+    """A badge plus the user conditions and events that can award it"""
+    
+    def __init__(self, name, description, icon, conditions, events, notify=True):
+        self.name = name
+        self.description = description
+        self.icon = icon
+        self.conditions = conditions
+        self.events = events
+        self.notify = notify
+    
+    def matches(self, user):
+        """Check the conditions against an in-memory user"""
+        for lookup, expected in self.conditions.items():
+            field, _, op = lookup.partition('__')
+            compare = LOOKUP_OPERATORS[op or 'exact']
+            if not compare(getattr(user, field), expected):
+                return False
+        return True
+
+LOOKUP_OPERATORS = {
+    'exact': operator.eq,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+}
+
+# Events that can change the counters the rules depend on
+REGISTERED = 'registered'
+RATING_RECEIVED = 'rating_received'
+SWAP_COMPLETED = 'swap_completed'
+
+BADGE_RULES = [
+    BadgeRule(
+        name="New Member",
+        description="Welcome to the skill swap community!",
+        icon="🆕",
+        conditions={},
+        events=[REGISTERED],
+        notify=False
+    ),
+    BadgeRule(
+        name="Perfect Rating",
+        description="Received a perfect 5-star rating",
+        icon="⭐",
+        conditions={'rating__gte': 5.0, 'total_ratings__gte': 1},
+        events=[RATING_RECEIVED],
+        notify=False
+    ),
+    BadgeRule(
+        name="Frequent Swapper",
+        description="Completed 5 or more skill swaps",
+        icon="🔄",
+        conditions={'total_completed_swaps__gte': 5},
+        events=[RATING_RECEIVED, SWAP_COMPLETED]
+    ),
+    BadgeRule(
+        name="Top Rated",
+        description="Maintained a 4.5+ rating across 5+ reviews",
+        icon="🏆",
+        conditions={'rating__gte': 4.5, 'total_ratings__gte': 5},
+        events=[RATING_RECEIVED]
+    ),
+]
+
+# Seconds the catalog is cached; also bounds staleness after queryset updates that bypass Badge.save
+CATALOG_TIMEOUT = 3600
+
+def get_badge_catalog():
+    """
+    Map badge names to Badge rows, cached in the shared cache until a badge
+    is saved or deleted.
+
+    Badges for rules that have no row yet are created in one bulk insert.
+    """
+    catalog = cache.get(BADGE_CATALOG_CACHE_KEY)
+    if catalog is None:
+        catalog = {badge.name: badge for badge in Badge.objects.all()}
+        missing = [
+            Badge(name=rule.name, description=rule.description, icon=rule.icon)
+            for rule in BADGE_RULES if rule.name not in catalog
+        ]
+        if missing:
+            Badge.objects.bulk_create(missing)
+            catalog.update({badge.name: badge for badge in Badge.objects.filter(
+                name__in=[badge.name for badge in missing]
+            )})
+            # Rows created here would vanish from the cache's view if the transaction rolled back
+            transaction.on_commit(lambda: cache.set(BADGE_CATALOG_CACHE_KEY, catalog, CATALOG_TIMEOUT))
+        else:
+            cache.set(BADGE_CATALOG_CACHE_KEY, catalog, CATALOG_TIMEOUT)
+    return catalog
+
+def reset_badge_catalog():
+    cache.delete(BADGE_CATALOG_CACHE_KEY)
+
+def badge_notification(user_id, badge):
+    return Notification(
+        user_id=user_id,
+        notification_type=Notification.Type.BADGE_EARNED,
+        title="New Badge Earned",
+        message=f"You've earned the '{badge.name}' badge!",
+        related_object_id=badge.id,
+        related_object_type="badge"
+    )
+
+def award_event(user_id, badge):
+    """The badge.awarded event; notifications for rules with ``notify`` are derived from it"""
+    return build(Event.Type.BADGE_AWARDED, user_id, badge_id=badge.id, badge=badge.name)
+
+def evaluate_user_badges(user, event):
+    """Award any badges the user now qualifies for after ``event``"""
+    catalog = get_badge_catalog()
+    rules = [rule for rule in BADGE_RULES if event in rule.events and rule.matches(user)]
+    if not rules:
+        return []
+    
+    owned = set(UserBadge.objects.filter(
+        user=user, badge__in=[catalog[rule.name] for rule in rules]
+    ).values_list('badge_id', flat=True))
+    earned = [rule for rule in rules if catalog[rule.name].id not in owned]
+    if not earned:
+        return []
+    
+    UserBadge.objects.bulk_create(
+        [UserBadge(user=user, badge=catalog[rule.name]) for rule in earned],
+        ignore_conflicts=True
+    )
+    record_many([award_event(user.id, catalog[rule.name]) for rule in earned])
+    return [rule.name for rule in earned]
+
+def evaluate_all_badges(batch_size=1000, dry_run=False):
+    """
+    Award every rule's badge to all qualifying users with set-based queries.
+
+    Returns a mapping of badge name to the number of users awarded.
+    """
+    catalog = get_badge_catalog()
+    awarded = {}
+    
+    for rule in BADGE_RULES:
+        badge = catalog[rule.name]
+        user_ids = User.objects.filter(**rule.conditions).exclude(
+            badges__badge=badge
+        ).order_by('id').values_list('id', flat=True)
+        
+        count = 0
+        last_id = 0
+        while True:
+            batch = list(user_ids.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1]
+            count += len(batch)
+            if dry_run:
+                continue
+            with transaction.atomic():
+                UserBadge.objects.bulk_create(
+                    [UserBadge(user_id=user_id, badge=badge) for user_id in batch],
+                    ignore_conflicts=True
+                )
+                record_many([award_event(user_id, badge) for user_id in batch])
+        awarded[rule.name] = count
+    
+    return awarded
@@ -0,0 +1,44 @@
+from collections import Counter, defaultdict
+from django.db.models import F
+from events.log import consumer
+from events.models import Event
+from swaps.models import SwapRequest
+from .badges import evaluate_user_badges, REGISTERED, RATING_RECEIVED, SWAP_COMPLETED
+from .models import User
+
+def reset_counters():
+    User.objects.filter(total_completed_swaps__gt=0).update(total_completed_swaps=0)
+
+@consumer('users.counters', types=[
+    Event.Type.USER_REGISTERED, Event.Type.SWAP_STATUS_CHANGED, Event.Type.RATING_CREATED,
+], reset=reset_counters)
+def update_counters(events):
+    """
+    Count completed swaps per user and award the badges the events make
+    users eligible for. Replayable: badges already owned are kept.
+    """
+    completed = Counter()
+    triggers = defaultdict(set)
+    for event in events:
+        if event.type == Event.Type.USER_REGISTERED:
+            triggers[event.object_id].add(REGISTERED)
+        elif event.type == Event.Type.RATING_CREATED:
+            triggers[event.payload['to_user_id']].add(RATING_RECEIVED)
+        elif event.payload['status'] == SwapRequest.Status.COMPLETED:
+            for user_id in [event.payload['from_user_id'], event.payload['to_user_id']]:
+                completed[user_id] += 1
+                triggers[user_id].add(SWAP_COMPLETED)
+
+    # One UPDATE per distinct increment rather than per user
+    by_increment = defaultdict(list)
+    for user_id, count in completed.items():
+        by_increment[count].append(user_id)
+    for count, user_ids in by_increment.items():
+        User.objects.filter(id__in=user_ids).update(total_completed_swaps=F('total_completed_swaps') + count)
+
+    users = User.objects.in_bulk(list(triggers))
+    for user_id, badge_events in triggers.items():
+        # Users deleted since are skipped
+        if user_id in users:
+            for badge_event in sorted(badge_events):
+                evaluate_user_badges(users[user_id], badge_event)
@@ -0,0 +1,121 @@
+"""
+Faceted filtering for the public user list.
+
+Filters arrive as query parameters and are normalized into a canonical dict,
+which doubles as the cache key for the facet counts of that result set.
+Skill filters are correlated EXISTS subqueries over UserSkill, so they never
+duplicate users the way a join would, and include sub-skills through the
+taxonomy closure table.
+"""
+import hashlib
+import json
+import math
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Exists, OuterRef
+from skills.models import UserSkill
+from skills.taxonomy import descendant_ids, descendants_of_name
+from .models import User
+
+TOP_SKILLS = 10
+
+def _split(query_params, name):
+    """Comma-separated and repeated values of a parameter, deduplicated and sorted"""
+    values = set()
+    for raw in query_params.getlist(name):
+        values.update(value.strip().lower() for value in raw.split(',') if value.strip())
+    return sorted(values)
+
+def parse_filters(query_params):
+    """
+    Normalize ``availability``, ``offers``, ``wants``, ``min_rating`` and
+    ``location`` parameters, raising ValidationError for invalid values.
+    """
+    filters = {}
+
+    availability = _split(query_params, 'availability')
+    unknown = set(availability) - set(User.Availability.values)
+    if unknown:
+        raise ValidationError(f"Unknown availability: {', '.join(sorted(unknown))}.")
+    if availability:
+        filters['availability'] = availability
+
+    for name in ['offers', 'wants']:
+        skills = _split(query_params, name)
+        if skills:
+            filters[name] = skills
+
+    min_rating = query_params.get('min_rating')
+    if min_rating:
+        try:
+            filters['min_rating'] = float(min_rating)
+        except ValueError:
+            raise ValidationError("min_rating must be a number.")
+        if not math.isfinite(filters['min_rating']):
+            raise ValidationError("min_rating must be a finite number.")
+
+    location = ' '.join(query_params.get('location', '').split()).lower()
+    if location:
+        filters['location'] = location
+
+    return filters
+
+def _has_skill(skill_type, skill):
+    """
+    EXISTS subquery for a skill given by id or name, or any skill under it in
+    the taxonomy ("Web Development" matches React)
+    """
+    user_skills = UserSkill.objects.filter(user=OuterRef('pk'), skill_type=skill_type)
+    if skill.isdigit():
+        return Exists(user_skills.filter(skill_id__in=descendant_ids([int(skill)])))
+    return Exists(user_skills.filter(skill_id__in=descendants_of_name(skill)))
+
+def apply_filters(queryset, filters):
+    """Restrict users to those matching every filter; each listed skill is required"""
+    if 'availability' in filters:
+        queryset = queryset.filter(availability__in=filters['availability'])
+    for skill in filters.get('offers', []):
+        queryset = queryset.filter(_has_skill(UserSkill.SkillType.OFFERED, skill))
+    for skill in filters.get('wants', []):
+        queryset = queryset.filter(_has_skill(UserSkill.SkillType.WANTED, skill))
+    if 'min_rating' in filters:
+        queryset = queryset.filter(rating__gte=filters['min_rating'])
+    if 'location' in filters:
+        queryset = queryset.filter(location__icontains=filters['location'])
+    return queryset
+
+def facet_cache_key(filters):
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+    return f"users:facets:{digest}"
+
+def compute_facets(queryset, filters):
+    """
+    Availability counts and the most common offered and wanted skills, in
+    three grouped queries. Facets are disjunctive: each one counts the users
+    in ``queryset`` matching every filter but its own, so choosing a value
+    does not hide the alternatives.
+    """
+    def matching(facet):
+        others = {name: value for name, value in filters.items() if name != facet}
+        return apply_filters(queryset, others).order_by().values('pk')
+
+    availability = dict.fromkeys(User.Availability.values, 0)
+    rows = (
+        User.objects.filter(pk__in=matching('availability'))
+        .order_by().values('availability').annotate(count=Count('id'))
+    )
+    for row in rows:
+        availability[row['availability']] = row['count']
+
+    facets = {'availability': availability}
+    for key, skill_type in [('offers', UserSkill.SkillType.OFFERED), ('wants', UserSkill.SkillType.WANTED)]:
+        rows = (
+            UserSkill.objects.filter(user_id__in=matching(key), skill_type=skill_type)
+            .order_by().values('skill_id', 'skill__name')
+            .annotate(count=Count('user_id'))
+            .order_by('-count', 'skill__name')[:TOP_SKILLS]
+        )
+        facets[key] = [
+            {'id': row['skill_id'], 'name': row['skill__name'], 'count': row['count']}
+            for row in rows
+        ]
+    return facets
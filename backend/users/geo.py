@@ -0,0 +1,201 @@
+"""
+Offline geocoding and proximity search.
+
+Free-text locations are resolved against a bundled gazetteer
+(``users/data/gazetteer.tsv``) into coordinates and a geohash. A proximity
+query first narrows candidates to the few geohash cells covering the search
+radius, which is an indexed range scan, then keeps the rows whose exact
+haversine distance is within the radius.
+"""
+import csv
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+DEFAULTS = {
+    'GAZETTEER': Path(__file__).resolve().parent / 'data' / 'gazetteer.tsv',
+    'GEOHASH_PRECISION': 9,
+    'DEFAULT_RADIUS_KM': 25,
+    'MAX_RADIUS_KM': 500,
+}
+
+EARTH_RADIUS_KM = 6371.0088
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEO_FIELDS = ['latitude', 'longitude', 'geohash']
+COORDINATES_RE = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$')
+
+def get_setting(name):
+    return getattr(settings, 'GEOCODING', {}).get(name, DEFAULTS[name])
+
+def normalize_place(text):
+    """Lowercase, accent-free, single-spaced form of a place name"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r'[^\w\s,.-]', ' ', text.lower())
+    return re.sub(r'\s+', ' ', text).strip(' ,.-')
+
+@lru_cache(maxsize=1)
+def load_gazetteer():
+    """Map every normalized name and alias to ``(name, latitude, longitude)``"""
+    places = {}
+    with open(get_setting('GAZETTEER'), encoding='utf-8', newline='') as handle:
+        for row in csv.reader(handle, delimiter='\t'):
+            if not row or row[0].startswith('#'):
+                continue
+            name, country, latitude, longitude = row[:4]
+            place = (name, float(latitude), float(longitude))
+            aliases = row[4].split('|') if len(row) > 4 else []
+            for alias in [name, *aliases, f"{name}, {country}"]:
+                if alias.strip():
+                    places.setdefault(normalize_place(alias), place)
+    return places
+
+def geocode(text):
+    """
+    Resolve a location to ``(name, latitude, longitude)``, or None.
+
+    Tries the whole string, then each comma-separated part, so
+    "Koramangala, Bangalore, India" resolves to Bengaluru.
+    """
+    normalized = normalize_place(text)
+    if not normalized:
+        return None
+    places = load_gazetteer()
+    candidates = [normalized, *(part.strip(' .-') for part in normalized.split(','))]
+    for candidate in candidates:
+        if candidate in places:
+            return places[candidate]
+    return None
+
+def encode_geohash(latitude, longitude, precision=None):
+    precision = precision or get_setting('GEOHASH_PRECISION')
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        target, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (target[0] + target[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            target[0] = middle
+        else:
+            target[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+def location_fields(text):
+    """Geo column values for a free-text location (all empty when unknown)"""
+    place = geocode(text)
+    if place is None:
+        return {'latitude': None, 'longitude': None, 'geohash': ''}
+    _, latitude, longitude = place
+    return {'latitude': latitude, 'longitude': longitude, 'geohash': encode_geohash(latitude, longitude)}
+
+def cell_size(precision):
+    """Height and width in degrees of a geohash cell"""
+    lat_bits = 5 * precision // 2
+    lon_bits = 5 * precision - lat_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+def covering_prefixes(latitude, longitude, radius_km):
+    """
+    Geohash prefixes whose cells together cover the circle.
+
+    Picks the longest prefix whose cell is at least as large as the circle's
+    bounding box, so the box touches at most 2x2 cells; those are the cells
+    containing its corners.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(min(abs(latitude) + dlat, 89.9)))
+    dlon = min(180.0, dlat / max(cos_lat, 1e-6))
+
+    precision = 0
+    while precision < get_setting('GEOHASH_PRECISION'):
+        height, width = cell_size(precision + 1)
+        if height < 2 * dlat or width < 2 * dlon:
+            break
+        precision += 1
+    if precision == 0:
+        return ['']
+
+    prefixes = set()
+    for corner_lat in (latitude - dlat, latitude + dlat):
+        for corner_lon in (longitude - dlon, longitude + dlon):
+            corner_lat = max(-90.0, min(90.0, corner_lat))
+            corner_lon = (corner_lon + 180.0) % 360.0 - 180.0
+            prefixes.add(encode_geohash(corner_lat, corner_lon, precision))
+    return sorted(prefixes)
+
+def parse_point(text):
+    """Coordinates for "lat,lon" or a gazetteer place name, or None"""
+    match = COORDINATES_RE.match(text or '')
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+        return None
+    place = geocode(text)
+    return place and place[1:]
+
+def distance_expression(latitude, longitude):
+    """Haversine distance in km from a point to each row's coordinates"""
+    lat1, lon1 = Radians(Value(latitude)), Radians(Value(longitude))
+    lat2, lon2 = Radians(F('latitude')), Radians(F('longitude'))
+    a = (
+        Power(Sin((lat2 - lat1) / 2), 2)
+        + Cos(lat1) * Cos(lat2) * Power(Sin((lon2 - lon1) / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a), output_field=FloatField())
+
+def filter_near(queryset, latitude, longitude, radius_km):
+    """
+    Restrict users to those within ``radius_km`` and annotate ``distance_km``.
+
+    Prefix matches are expressed as ranges so they use the geohash index on
+    every backend.
+    """
+    prefilter = Q()
+    for prefix in covering_prefixes(latitude, longitude, radius_km):
+        prefilter |= Q(geohash__gte=prefix, geohash__lt=prefix + '~') if prefix else Q(geohash__gt='')
+    return queryset.filter(prefilter).annotate(
+        distance_km=distance_expression(latitude, longitude)
+    ).filter(distance_km__lte=radius_km)
+
+def geocode_users(queryset):
+    """Refresh geo columns with one UPDATE per distinct location; returns rows updated"""
+    updated = 0
+    locations = list(queryset.order_by().values_list('location', flat=True).distinct())
+    for location in locations:
+        updated += queryset.filter(location=location).update(**location_fields(location))
+    return updated
+
+def near_params(query_params):
+    """
+    Parse ``near`` and ``radius_km`` query parameters.
+
+    Returns ``(latitude, longitude, radius_km)``, None without ``near``, or
+    raises ValidationError for an unknown place or an out-of-range radius.
+    """
+    near = query_params.get('near', '').strip()
+    if not near:
+        return None
+    point = parse_point(near)
+    if point is None:
+        raise ValidationError(f"Unknown location '{near}'.")
+    try:
+        radius_km = float(query_params.get('radius_km') or get_setting('DEFAULT_RADIUS_KM'))
+    except ValueError:
+        raise ValidationError("radius_km must be a number.")
+    if not 0 < radius_km <= get_setting('MAX_RADIUS_KM'):
+        raise ValidationError(f"radius_km must be between 0 and {get_setting('MAX_RADIUS_KM')}.")
+    return (*point, radius_km)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from users.badges import evaluate_all_badges
+
+class Command(BaseCommand):
+    help = 'Award badges to every user that satisfies a badge rule'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users awarded per bulk insert')
+        parser.add_argument('--dry-run', action='store_true', help='Count qualifying users without awarding')
+
+    def handle(self, *args, **options):
+        awarded = evaluate_all_badges(
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run']
+        )
+        verb = 'Would award' if options['dry_run'] else 'Awarded'
+        for name, count in awarded.items():
+            self.stdout.write(f"{verb} '{name}' to {count} users")
@@ -0,0 +1,43 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from users.avatars import render_avatar
+from users.models import User
+
+def render_or_skip(path):
+    """Render one avatar, returning None for files Pillow can't read"""
+    try:
+        return render_avatar(path)
+    except (OSError, ValueError):
+        return None
+
+class Command(BaseCommand):
+    help = 'Render thumbnail sizes for uploaded avatars in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Worker processes')
+        parser.add_argument('--all', action='store_true', help='Re-render avatars that already have renditions')
+
+    def handle(self, *args, **options):
+        users = User.objects.exclude(avatar='').exclude(avatar__isnull=True)
+        if not options['all']:
+            users = users.filter(avatar_hash='')
+        
+        # Avatars set as external URLs have no local file to render
+        pending = [
+            (user.id, user.avatar.path) for user in users.only('id', 'avatar')
+            if os.path.isfile(user.avatar.path)
+        ]
+        if not pending:
+            self.stdout.write("No avatars to render")
+            return
+        
+        with ProcessPoolExecutor(max_workers=options['processes']) as pool:
+            digests = pool.map(render_or_skip, [path for _, path in pending], chunksize=8)
+            updated = [
+                User(id=user_id, avatar_hash=digest)
+                for (user_id, _), digest in zip(pending, digests) if digest
+            ]
+        
+        User.objects.bulk_update(updated, ['avatar_hash'], batch_size=500)
+        self.stdout.write(f"Rendered avatars for {len(updated)} users")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from users.geo import geocode_users
+from users.models import User
+
+class Command(BaseCommand):
+    help = 'Resolve user locations against the offline gazetteer into coordinates and geohashes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true',
+                            help='Only users whose location has not been resolved yet')
+
+    def handle(self, *args, **options):
+        unresolved = User.objects.filter(geohash='').exclude(location__isnull=True).exclude(location='')
+        users = unresolved if options['missing'] else User.objects.all()
+        
+        updated = geocode_users(users)
+        self.stdout.write(f"Geocoded {updated} users, {unresolved.count()} locations not in the gazetteer")
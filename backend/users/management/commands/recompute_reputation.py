@@ -0,0 +1,43 @@
+from itertools import groupby
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from ratings.models import Rating, RATING_FIELDS, rating_aggregates
+from users.models import User
+
+class Command(BaseCommand):
+    help = 'Recompute every user\'s mean rating, rating count and time-decayed reputation from their ratings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Users written per bulk update')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch_size = options['batch_size']
+        ratings = Rating.objects.order_by('to_user_id').values_list(
+            'to_user_id', 'score', 'created_at'
+        ).iterator(chunk_size=5000)
+        received = groupby(ratings, key=lambda row: row[0])
+        current = next(received, None)
+        
+        # Walk users and ratings in step, so users without ratings are reset too
+        updated = 0
+        last_id = 0
+        while True:
+            user_ids = list(User.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not user_ids:
+                break
+            batch = []
+            for user_id in user_ids:
+                rows = []
+                # Ratings of users deleted since they were read
+                while current and current[0] < user_id:
+                    current = next(received, None)
+                if current and current[0] == user_id:
+                    rows = [(score, created_at) for _, score, created_at in current[1]]
+                    current = next(received, None)
+                batch.append(User(id=user_id, **rating_aggregates(rows, now)))
+            User.objects.bulk_update(batch, RATING_FIELDS)
+            updated += len(batch)
+            last_id = user_ids[-1]
+        
+        self.stdout.write(f"Recomputed ratings and reputation for {updated} users")
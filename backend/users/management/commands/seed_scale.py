@@ -0,0 +1,34 @@
+import time
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from users.seeding import generate_dataset
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic dataset for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, required=True, help='Number of users to create')
+        parser.add_argument('--skills', type=int, default=None, help='Catalog size (default: users / 20, at least 50)')
+        parser.add_argument('--swaps-per-user', type=int, default=2)
+        parser.add_argument('--notifications-per-user', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; equal seeds give equal data')
+        parser.add_argument('--prefix', default='seed', help='Username prefix for generated users')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            counts = generate_dataset(
+                users=options['users'],
+                skills=options['skills'],
+                swaps_per_user=options['swaps_per_user'],
+                notifications_per_user=options['notifications_per_user'],
+                seed=options['seed'],
+                prefix=options['prefix'],
+                log=self.stdout.write
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        call_command('recompute_reputation', stdout=self.stdout)
+        
+        total = sum(counts.values())
+        self.stdout.write(f"Created {total} rows in {time.monotonic() - started:.1f}s")
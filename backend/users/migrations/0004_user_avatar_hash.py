@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_reputation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_hash',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 of the avatar its renditions were built from', max_length=64),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-19 09:55
+
+from django.db import migrations, models
+
+
+def geocode_existing_users(apps, schema_editor):
+    from users.geo import geocode_users
+    User = apps.get_model('users', 'User')
+    geocode_users(User.objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_avatar_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(geocode_existing_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-19 10:57
+
+import users.reputation
+from django.db import migrations, models
+
+
+def reset_unrated_users(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    User.objects.filter(reputation_weight__lte=0).update(reputation=users.reputation.default_reputation())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_geolocation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='reputation',
+            field=models.FloatField(db_index=True, default=users.reputation.default_reputation),
+        ),
+        migrations.RunPython(reset_unrated_users, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
+from django.core.cache import cache
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
+from .geo import GEO_FIELDS, location_fields
+from .reputation import default_reputation
 
 class User(AbstractUser):
     """
@@ -21,7 +24,12 @@ class User(AbstractUser):
     )
     bio = models.TextField(blank=True, null=True)
     location = models.CharField(max_length=100, blank=True, null=True)
+    # Resolved from location against the offline gazetteer (see users/geo.py)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    avatar_hash = models.CharField(max_length=64, blank=True, default='', help_text=_('SHA-256 of the avatar its renditions were built from'))
     is_public = models.BooleanField(default=True, help_text=_('Whether the profile is visible to others'))
     
     # Availability choices
@@ -44,6 +52,12 @@ class User(AbstractUser):
     total_ratings = models.PositiveIntegerField(default=0)
     total_completed_swaps = models.PositiveIntegerField(default=0)
     
+    # Bayesian time-decayed reputation (see users/reputation.py)
+    reputation = models.FloatField(default=default_reputation, db_index=True)
+    reputation_score_sum = models.FloatField(default=0.0)
+    reputation_weight = models.FloatField(default=0.0)
+    reputation_updated_at = models.DateTimeField(blank=True, null=True)
+    
     # Additional fields
     joined_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -51,6 +65,19 @@ class User(AbstractUser):
     @property
     def is_admin(self):
         return self.role == self.Roles.ADMIN
+    
+    def save(self, *args, **kwargs):
+        # Keep coordinates in step with the free-text location
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'location' in update_fields:
+            for field, value in location_fields(self.location).items():
+                setattr(self, field, value)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *GEO_FIELDS}
+        super().save(*args, **kwargs)
+
+# Cache key of the badge name -> Badge mapping (see users/badges.py)
+BADGE_CATALOG_CACHE_KEY = 'badges:catalog'
 
 class Badge(models.Model):
     """
@@ -63,6 +90,16 @@ class Badge(models.Model):
     
     def __str__(self):
         return self.name
+    
+    def save(self, *args, **kwargs):
+        """Override save to drop the cached badge catalog"""
+        super().save(*args, **kwargs)
+        cache.delete(BADGE_CATALOG_CACHE_KEY)
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        cache.delete(BADGE_CATALOG_CACHE_KEY)
+        return result
 
 class UserBadge(models.Model):
     """
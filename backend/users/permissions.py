@@ -9,8 +9,9 @@ class IsOwnerOrAdmin(permissions.BasePermission):
         if request.user.is_authenticated and request.user.role == 'admin':
             return True
             
-        # Object must have a user attribute that matches the request user
-        return obj == request.user
+        # Object must have a user attribute that matches the request user,
+        # or be the request user itself
+        return getattr(obj, 'user', obj) == request.user
 
 class IsAdminUser(permissions.BasePermission):
     """
@@ -0,0 +1,253 @@
+"""
+Deterministic synthetic dataset for load testing.
+
+``generate_dataset`` fills the database with users, skills, user skills,
+swaps in every status, ratings and notifications using only bulk inserts.
+Skill popularity follows a Zipf distribution so a few skills dominate, as in
+production. The same ``seed`` always produces the same rows.
+"""
+import bisect
+import itertools
+import random
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Avg, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from events.log import build, mark_handled, record_many
+from events.models import Event
+from notifications.models import Notification
+from ratings.models import Rating
+from skills.dedup import index_skills, skill_key
+from skills.models import Skill, UserSkill
+from skills.taxonomy import add_roots
+from swaps.models import SwapRequest
+from .geo import location_fields
+from .models import User
+
+BASE_SKILLS = [
+    'Python', 'JavaScript', 'React', 'Django', 'SQL', 'Data Analysis', 'Machine Learning',
+    'Graphic Design', 'Photography', 'Video Editing', 'Copywriting', 'Public Speaking',
+    'Spanish', 'French', 'German', 'Japanese', 'Guitar', 'Piano', 'Singing', 'Drawing',
+    'Cooking', 'Baking', 'Yoga', 'Fitness Training', 'Excel', 'Accounting', 'Marketing',
+    'SEO', 'UX Design', 'Figma', 'Java', 'Go', 'Rust', 'Kotlin', 'Swift', 'Docker',
+    'Kubernetes', 'Linux', 'Networking', 'Cybersecurity', 'Project Management',
+    'Negotiation', 'Writing', 'Editing', 'Chess', 'Gardening', 'Woodworking', 'Sewing',
+    'Knitting', 'Calligraphy',
+]
+FIRST_NAMES = [
+    'Alice', 'Bob', 'Carol', 'David', 'Eva', 'Farid', 'Grace', 'Hiro', 'Ines', 'Jonas',
+    'Kavya', 'Liam', 'Maya', 'Noah', 'Olga', 'Priya', 'Quinn', 'Ravi', 'Sara', 'Tomas',
+]
+LAST_NAMES = [
+    'Smith', 'Garcia', 'Chen', 'Patel', 'Muller', 'Rossi', 'Kim', 'Silva', 'Nguyen', 'Cohen',
+    'Ivanova', 'Sato', 'Okafor', 'Dubois', 'Larsen', 'Kumar', 'Moreau', 'Novak',
+]
+LOCATIONS = [
+    'Mumbai', 'Bengaluru', 'Delhi', 'Pune', 'London', 'Berlin', 'Paris', 'New York',
+    'San Francisco', 'Toronto', 'Sydney', 'Singapore', 'Tokyo', 'Sao Paulo', 'Nairobi',
+]
+# Relative frequency of each swap status
+STATUS_WEIGHTS = {
+    SwapRequest.Status.PENDING: 30,
+    SwapRequest.Status.ACCEPTED: 15,
+    SwapRequest.Status.REJECTED: 15,
+    SwapRequest.Status.COMPLETED: 30,
+    SwapRequest.Status.CANCELED: 10,
+}
+BATCH_SIZE = 5000
+# Statuses a seeded swap went through after being requested
+STATUS_HISTORY = {
+    SwapRequest.Status.PENDING: [],
+    SwapRequest.Status.ACCEPTED: [SwapRequest.Status.ACCEPTED],
+    SwapRequest.Status.REJECTED: [SwapRequest.Status.REJECTED],
+    SwapRequest.Status.COMPLETED: [SwapRequest.Status.ACCEPTED, SwapRequest.Status.COMPLETED],
+    SwapRequest.Status.CANCELED: [SwapRequest.Status.CANCELED],
+}
+
+class ZipfSampler:
+    """Draw indexes in ``range(n)`` with probability proportional to 1 / (rank + 1) ** s"""
+    
+    def __init__(self, n, rng, s=1.1):
+        self.rng = rng
+        self.cumulative = list(itertools.accumulate(1 / (rank + 1) ** s for rank in range(n)))
+    
+    def sample(self):
+        return bisect.bisect(self.cumulative, self.rng.random() * self.cumulative[-1])
+    
+    def distinct(self, k):
+        chosen = set()
+        while len(chosen) < min(k, len(self.cumulative)):
+            chosen.add(self.sample())
+        return chosen
+
+def generate_dataset(users, skills=None, swaps_per_user=2, notifications_per_user=3,
+                     seed=42, prefix='seed', log=None):
+    """
+    Insert a synthetic dataset and return the number of rows created per model.
+
+    Usernames are ``<prefix><n>``, so different prefixes can be stacked in
+    one database. Raises ValueError if any of the usernames is taken.
+    """
+    usernames = [f"{prefix}{i}" for i in range(users)]
+    for start in range(0, users, BATCH_SIZE):
+        if User.objects.filter(username__in=usernames[start:start + BATCH_SIZE]).exists():
+            raise ValueError(f"Usernames with the prefix '{prefix}' are already taken; seed with another prefix")
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    skills = skills or max(len(BASE_SKILLS), users // 20)
+    counts = {}
+    
+    with transaction.atomic():
+        # Skills, shared with any existing rows of the same name
+        names = [
+            BASE_SKILLS[i] if i < len(BASE_SKILLS) else f"{BASE_SKILLS[i % len(BASE_SKILLS)]} {i // len(BASE_SKILLS) + 1}"
+            for i in range(skills)
+        ]
+        Skill.objects.bulk_create([Skill(name=name, key=skill_key(name)) for name in names], ignore_conflicts=True)
+        created = list(Skill.objects.filter(name__in=names, ancestor_links__isnull=True))
+        index_skills(created)
+        add_roots(created)
+        by_name = dict(Skill.objects.filter(name__in=names).values_list('name', 'id'))
+        skill_ids = [by_name[name] for name in names]
+        counts['skills'] = len(skill_ids)
+        log(f"Skills: {len(skill_ids)}")
+        
+        # Users share one precomputed password hash ("password123")
+        password = make_password('password123')
+        located = {location: {'location': location, **location_fields(location)} for location in LOCATIONS}
+        seeded_users = User.objects.bulk_create([
+            User(
+                username=username,
+                email=f"{username}@example.com",
+                password=password,
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                **located[rng.choice(LOCATIONS)],
+                availability=rng.choice(User.Availability.values),
+                bio=f"Synthetic user {i}",
+            )
+            for i, username in enumerate(usernames)
+        ], batch_size=BATCH_SIZE)
+        user_ids = [user.pk for user in seeded_users]
+        seeded_events = record_many([build(Event.Type.USER_REGISTERED, user_id, actor_id=user_id) for user_id in user_ids])
+        counts['users'] = len(user_ids)
+        log(f"Users: {len(user_ids)}")
+        
+        # Offered and wanted skills drawn from the Zipf popularity curve
+        zipf = ZipfSampler(len(skill_ids), rng)
+        offered = {}
+        user_skills = []
+        for user_id in user_ids:
+            offered[user_id] = [skill_ids[i] for i in sorted(zipf.distinct(rng.randint(1, 5)))]
+            for skill_id in offered[user_id]:
+                user_skills.append(UserSkill(
+                    user_id=user_id, skill_id=skill_id,
+                    skill_type=UserSkill.SkillType.OFFERED, proficiency=rng.randint(1, 5)
+                ))
+            for i in sorted(zipf.distinct(rng.randint(1, 4))):
+                user_skills.append(UserSkill(
+                    user_id=user_id, skill_id=skill_ids[i],
+                    skill_type=UserSkill.SkillType.WANTED, proficiency=1
+                ))
+        UserSkill.objects.bulk_create(user_skills, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        counts['user_skills'] = len(user_skills)
+        log(f"User skills: {len(user_skills)}")
+        
+        # Swaps between random pairs in every status
+        statuses, weights = zip(*STATUS_WEIGHTS.items())
+        swaps = []
+        for from_user_id in user_ids:
+            for _ in range(swaps_per_user if len(user_ids) > 1 else 0):
+                to_user_id = rng.choice(user_ids)
+                if to_user_id == from_user_id:
+                    continue
+                swaps.append(SwapRequest(
+                    from_user_id=from_user_id,
+                    to_user_id=to_user_id,
+                    skill_offered_id=rng.choice(offered[from_user_id]),
+                    skill_wanted_id=rng.choice(offered[to_user_id]),
+                    message="Would you like to swap skills?",
+                    status=rng.choices(statuses, weights)[0],
+                ))
+        SwapRequest.objects.bulk_create(swaps, batch_size=BATCH_SIZE)
+        seeded_events += record_many([event for swap in swaps for event in swap_events(swap)])
+        counts['swaps'] = len(swaps)
+        log(f"Swaps: {len(swaps)}")
+        
+        # Ratings on most completed swaps, from one or both sides
+        ratings = []
+        for swap in swaps:
+            if swap.status != SwapRequest.Status.COMPLETED:
+                continue
+            for rater, ratee in [(swap.from_user_id, swap.to_user_id), (swap.to_user_id, swap.from_user_id)]:
+                if rng.random() < 0.7:
+                    ratings.append(Rating(
+                        from_user_id=rater, to_user_id=ratee, swap_request_id=swap.pk,
+                        score=rng.choices([1, 2, 3, 4, 5], [2, 3, 10, 35, 50])[0],
+                    ))
+        Rating.objects.bulk_create(ratings, batch_size=BATCH_SIZE)
+        seeded_events += record_many([
+            build(
+                Event.Type.RATING_CREATED, rating.pk, actor_id=rating.from_user_id,
+                from_user_id=rating.from_user_id, to_user_id=rating.to_user_id,
+                swap_request_id=rating.swap_request_id, score=rating.score
+            )
+            for rating in ratings
+        ])
+        counts['ratings'] = len(ratings)
+        log(f"Ratings: {len(ratings)}")
+        
+        # Notifications, about half of them read
+        types = [Notification.Type.SWAP_REQUEST, Notification.Type.SWAP_ACCEPTED,
+                 Notification.Type.NEW_RATING, Notification.Type.SYSTEM]
+        notifications = [
+            Notification(
+                user_id=user_id,
+                notification_type=rng.choice(types),
+                title="Seeded notification",
+                message="Generated for load testing",
+                is_read=rng.random() < 0.5,
+            )
+            for user_id in user_ids for _ in range(notifications_per_user)
+        ]
+        Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+        counts['notifications'] = len(notifications)
+        log(f"Notifications: {len(notifications)}")
+        
+        # Denormalized counters bypassed by bulk_create
+        for start in range(0, len(user_ids), BATCH_SIZE):
+            refresh_user_counters(User.objects.filter(id__in=user_ids[start:start + BATCH_SIZE]))
+        # The seeded history needs no notifications and the counters are already
+        # set; events already waiting in the log are still handed out
+        mark_handled(seeded_events)
+    
+    return counts
+
+def swap_events(swap):
+    """Events for a seeded swap: its creation and each status it went through since"""
+    users = {'from_user_id': swap.from_user_id, 'to_user_id': swap.to_user_id}
+    events = [build(Event.Type.SWAP_CREATED, swap.pk, actor_id=swap.from_user_id,
+                    status=SwapRequest.Status.PENDING, **users)]
+    previous_status = SwapRequest.Status.PENDING
+    for status in STATUS_HISTORY[swap.status]:
+        actor_id = swap.from_user_id if status == SwapRequest.Status.CANCELED else swap.to_user_id
+        events.append(build(Event.Type.SWAP_STATUS_CHANGED, swap.pk, actor_id=actor_id,
+                            status=status, previous_status=previous_status, **users))
+        previous_status = status
+    return events
+
+def refresh_user_counters(users):
+    """Recompute rating and completed swap counters for a queryset of users in one UPDATE"""
+    received = Rating.objects.filter(to_user=OuterRef('pk')).order_by().values('to_user')
+    completed = SwapRequest.objects.filter(status=SwapRequest.Status.COMPLETED).order_by()
+    
+    users.update(
+        rating=Coalesce(Subquery(received.annotate(avg=Avg('score')).values('avg')), 0.0),
+        total_ratings=Coalesce(Subquery(received.annotate(total=Count('id')).values('total')), 0),
+        total_completed_swaps=(
+            Coalesce(Subquery(completed.filter(from_user=OuterRef('pk')).values('from_user').annotate(
+                total=Count('id')).values('total')), 0) +
+            Coalesce(Subquery(completed.filter(to_user=OuterRef('pk')).values('to_user').annotate(
+                total=Count('id')).values('total')), 0)
+        ),
+    )
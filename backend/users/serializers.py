@@ -4,9 +4,12 @@ from django.utils.html import strip_tags
 from django.utils.text import slugify
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from django.contrib.auth.password_validation import validate_password
 from .models import Badge, UserBadge
+from .avatars import rendition_urls
 from skills.models import UserSkill, Skill
+from skills.dedup import resolve_skill
 
 User = get_user_model()
 
@@ -30,7 +33,41 @@ class UserSkillSerializer(serializers.ModelSerializer):
         fields = ['id', 'skill', 'skill_name', 'skill_type', 'proficiency', 'description']
         read_only_fields = ['id']
 
-class UserSerializer(serializers.ModelSerializer):
+def profile_prefetches(prefix=''):
+    """Prefetch lookups for the badges and skills rendered with a user profile"""
+    return [
+        Prefetch(f'{prefix}badges', queryset=UserBadge.objects.select_related('badge')),
+        Prefetch(f'{prefix}skills', queryset=UserSkill.objects.select_related('skill')),
+    ]
+
+class ProfileRelationsMixin:
+    """Badge and skill fields served from prefetched relations when available"""
+    
+    def _prefetched(self, obj, name):
+        return name in getattr(obj, '_prefetched_objects_cache', {})
+    
+    def _user_skills(self, obj, skill_type):
+        skills = obj.skills.all()
+        if not self._prefetched(obj, 'skills'):
+            skills = skills.select_related('skill')
+        return [user_skill for user_skill in skills if user_skill.skill_type == skill_type]
+    
+    def get_badges(self, obj):
+        user_badges = obj.badges.all()
+        if not self._prefetched(obj, 'badges'):
+            user_badges = user_badges.select_related('badge')
+        return UserBadgeSerializer(user_badges, many=True).data
+    
+    def get_skills_offered(self, obj):
+        skills = self._user_skills(obj, UserSkill.SkillType.OFFERED)
+        return UserSkillSerializer(skills, many=True).data
+    
+    def get_skills_wanted(self, obj):
+        skills = self._user_skills(obj, UserSkill.SkillType.WANTED)
+        return UserSkillSerializer(skills, many=True).data
+
+class UserSerializer(ProfileRelationsMixin, serializers.ModelSerializer):
+    avatar_urls = serializers.SerializerMethodField()
     badges = serializers.SerializerMethodField()
     skills_offered = serializers.SerializerMethodField()
     skills_wanted = serializers.SerializerMethodField()
@@ -41,37 +78,30 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name', 'bio', 'location',
-            'avatar', 'is_public', 'availability', 'rating', 'total_ratings', 
-            'total_completed_swaps', 'is_admin', 'role', 'badges', 'skills_offered', 
+            'avatar', 'avatar_urls', 'is_public', 'availability', 'rating', 'total_ratings', 
+            'total_completed_swaps', 'reputation', 'is_admin', 'role', 'badges', 'skills_offered', 
             'skills_wanted', 'joined_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'email', 'rating', 'total_ratings', 
-                          'total_completed_swaps', 'is_admin', 'role', 'joined_at', 'updated_at']
-    
-    def get_badges(self, obj):
-        user_badges = UserBadge.objects.filter(user=obj)
-        return UserBadgeSerializer(user_badges, many=True).data
-    
-    def get_skills_offered(self, obj):
-        skills = UserSkill.objects.filter(user=obj, skill_type=UserSkill.SkillType.OFFERED)
-        return UserSkillSerializer(skills, many=True).data
+        read_only_fields = ['id', 'email', 'rating', 'total_ratings', 'total_completed_swaps',
+                          'reputation', 'is_admin', 'role', 'joined_at', 'updated_at']
     
-    def get_skills_wanted(self, obj):
-        skills = UserSkill.objects.filter(user=obj, skill_type=UserSkill.SkillType.WANTED)
-        return UserSkillSerializer(skills, many=True).data
+    def get_avatar_urls(self, obj):
+        return rendition_urls(obj.avatar_hash, self.context.get('request'))
 
-class UserPublicSerializer(serializers.ModelSerializer):
+class UserPublicSerializer(ProfileRelationsMixin, serializers.ModelSerializer):
+    avatar_urls = serializers.SerializerMethodField()
     badges = serializers.SerializerMethodField()
     skills_offered = serializers.SerializerMethodField()
     skills_wanted = serializers.SerializerMethodField()
     name = serializers.SerializerMethodField()
+    distance_km = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = [
-            'id', 'name', 'username', 'bio', 'location', 'avatar', 'availability',
-            'rating', 'total_ratings', 'total_completed_swaps', 'badges',
-            'skills_offered', 'skills_wanted', 'joined_at'
+            'id', 'name', 'username', 'bio', 'location', 'avatar', 'avatar_urls', 'availability',
+            'rating', 'total_ratings', 'total_completed_swaps', 'reputation', 'badges',
+            'skills_offered', 'skills_wanted', 'distance_km', 'joined_at'
         ]
     
     def get_name(self, obj):
@@ -79,17 +109,13 @@ class UserPublicSerializer(serializers.ModelSerializer):
             return f"{obj.first_name} {obj.last_name}"
         return obj.username
     
-    def get_badges(self, obj):
-        user_badges = UserBadge.objects.filter(user=obj)
-        return UserBadgeSerializer(user_badges, many=True).data
+    def get_distance_km(self, obj):
+        # Only annotated by ?near= queries
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 1) if distance is not None else None
     
-    def get_skills_offered(self, obj):
-        skills = UserSkill.objects.filter(user=obj, skill_type=UserSkill.SkillType.OFFERED)
-        return UserSkillSerializer(skills, many=True).data
-    
-    def get_skills_wanted(self, obj):
-        skills = UserSkill.objects.filter(user=obj, skill_type=UserSkill.SkillType.WANTED)
-        return UserSkillSerializer(skills, many=True).data
+    def get_avatar_urls(self, obj):
+        return rendition_urls(obj.avatar_hash, self.context.get('request'))
 
 class RegisterSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(required=True)
@@ -246,7 +272,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         # Create skills for user
         for skill_name in skills_offered:
             if skill_name.strip():
-                skill, _ = Skill.objects.get_or_create(name=skill_name.strip())
+                skill = resolve_skill(skill_name)
                 UserSkill.objects.create(
                     user=user,
                     skill=skill,
@@ -255,7 +281,7 @@ class RegisterSerializer(serializers.ModelSerializer):
                 
         for skill_name in skills_wanted:
             if skill_name.strip():
-                skill, _ = Skill.objects.get_or_create(name=skill_name.strip())
+                skill = resolve_skill(skill_name)
                 UserSkill.objects.create(
                     user=user,
                     skill=skill,
@@ -337,6 +363,15 @@ class UserUpdateSerializer(serializers.ModelSerializer):
             if not re.match(r'^https?://.*', value) and not value.startswith('/'):
                 raise serializers.ValidationError("Please enter a valid image URL.")
         return value
+    
+    def update(self, instance, validated_data):
+        # Renditions belong to the previous avatar
+        if 'avatar' in validated_data and validated_data['avatar'] != instance.avatar.name:
+            instance.avatar_hash = ''
+        return super().update(instance, validated_data)
+
+class AvatarUploadSerializer(serializers.Serializer):
+    avatar = serializers.ImageField()
 
 class AdminUserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,15 @@
+import os
+from jobs.queue import task
+from .avatars import render_avatar
+from .models import User
+
+@task('users.process_avatar')
+def process_avatar(user_id):
+    """Render the thumbnail sizes for a user's uploaded avatar"""
+    user = User.objects.get(id=user_id)
+    # Avatars set as external URLs have no local file to render
+    if not user.avatar or not os.path.isfile(user.avatar.path):
+        return
+    
+    digest = render_avatar(user.avatar.path)
+    User.objects.filter(id=user_id, avatar=user.avatar.name).update(avatar_hash=digest)
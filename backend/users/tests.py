@@ -1,3 +1,256 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from events.log import consume, record
+from events.models import Event
+from notifications.models import Notification
+from ratings.models import Rating
+from skills.models import Skill, UserSkill
+from swaps.models import SwapRequest
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from .avatars import render_avatar, rendition_urls
+from .badges import BADGE_RULES, get_badge_catalog
+from .models import Badge, User
+from .reputation import apply_rating, bayesian_score, compute_reputation, decay_factor
+from .seeding import generate_dataset
 
-# Create your tests here.
+class BadgeCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_missing_rule_badges_are_created(self):
+        catalog = get_badge_catalog()
+        self.assertEqual(set(catalog), {rule.name for rule in BADGE_RULES})
+        self.assertEqual(Badge.objects.count(), len(BADGE_RULES))
+
+    def test_catalog_is_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            get_badge_catalog()
+        with self.assertNumQueries(0):
+            get_badge_catalog()
+
+    def test_saving_or_deleting_a_badge_refreshes_the_catalog(self):
+        badge = Badge.objects.create(name='Early Bird', description='Joined early', icon='*')
+        self.assertEqual(get_badge_catalog()['Early Bird'].id, badge.id)
+
+        badge.name = 'Pioneer'
+        badge.save()
+        catalog = get_badge_catalog()
+        self.assertNotIn('Early Bird', catalog)
+        self.assertEqual(catalog['Pioneer'].id, badge.id)
+
+        badge.delete()
+        self.assertNotIn('Pioneer', get_badge_catalog())
+
+
+@override_settings(REPUTATION={'PRIOR_MEAN': 3.5, 'PRIOR_WEIGHT': 5.0, 'HALF_LIFE_DAYS': 180})
+class ReputationTests(TestCase):
+    def test_weight_halves_every_half_life(self):
+        now = timezone.now()
+        self.assertEqual(decay_factor(None, now), 1.0)
+        self.assertEqual(decay_factor(now, now - timedelta(days=1)), 1.0)
+        self.assertAlmostEqual(decay_factor(now - timedelta(days=180), now), 0.5)
+        self.assertAlmostEqual(decay_factor(now - timedelta(days=360), now), 0.25)
+
+    def test_scores_shrink_towards_the_prior(self):
+        self.assertEqual(bayesian_score(0.0, 0.0), 3.5)
+        self.assertAlmostEqual(bayesian_score(5.0, 1.0), (5 * 3.5 + 5) / 6)
+        # A long record of 4.8s outranks a single 5
+        self.assertGreater(bayesian_score(4.8 * 50, 50), bayesian_score(5.0, 1.0))
+
+    def test_unrated_users_start_at_the_prior(self):
+        user = User.objects.create_user(username='unrated', email='unrated@example.com', password='pw')
+        self.assertEqual(user.reputation, 3.5)
+        self.assertEqual(compute_reputation([]), (3.5, 0.0, 0.0))
+
+    def test_incremental_updates_match_a_full_recompute(self):
+        now = timezone.now()
+        ratings = [(5, now - timedelta(days=400)), (2, now - timedelta(days=90)), (4, now - timedelta(days=3))]
+        user = User(reputation_score_sum=0.0, reputation_weight=0.0)
+        for score, created_at in ratings:
+            apply_rating(user, score, created_at)
+        # Bring the accumulators up to now the way a recompute does
+        apply_rating(user, 3, now)
+
+        reputation, score_sum, weight = compute_reputation(ratings + [(3, now)], now)
+        self.assertAlmostEqual(user.reputation_score_sum, score_sum)
+        self.assertAlmostEqual(user.reputation_weight, weight)
+        self.assertAlmostEqual(user.reputation, reputation)
+
+    def test_recompute_rebuilds_every_aggregate(self):
+        skill = Skill.objects.create(name='Chess')
+        rater, rated, unrated = [
+            User.objects.create_user(username=name, email=f"{name}@example.com", password='pw')
+            for name in ['rater', 'rated', 'formerly_rated']
+        ]
+        for score in [4, 2]:
+            swap = SwapRequest.objects.create(from_user=rater, to_user=rated, skill_offered=skill, skill_wanted=skill)
+            Rating.objects.create(from_user=rater, to_user=rated, swap_request=swap, score=score)
+        # Stale values: a queryset delete and a column added without a backfill
+        User.objects.filter(pk=unrated.pk).update(rating=5.0, total_ratings=3, reputation=4.4, reputation_weight=3.0)
+        User.objects.filter(pk=rated.pk).update(rating=0.0, total_ratings=0, reputation=3.5)
+
+        call_command('recompute_reputation', batch_size=2, stdout=StringIO())
+        rated.refresh_from_db()
+        unrated.refresh_from_db()
+        self.assertEqual((rated.rating, rated.total_ratings), (3.0, 2))
+        self.assertAlmostEqual(rated.reputation, bayesian_score(6.0, 2.0), places=4)
+        self.assertEqual(
+            (unrated.rating, unrated.total_ratings, unrated.reputation, unrated.reputation_weight),
+            (0.0, 0, 3.5, 0.0)
+        )
+
+
+class AvatarRenditionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        self.source = f"{media_root.name}/source.png"
+        Image.new('RGB', (64, 64), 'teal').save(self.source)
+        with self.settings(AVATAR_RENDITIONS={'SIZES': [48], 'FORMAT': 'JPEG'}):
+            render_avatar(self.source)
+        with self.settings(AVATAR_RENDITIONS={'SIZES': [48], 'FORMAT': 'WEBP'}):
+            self.digest = render_avatar(self.source)
+
+    def fetch(self, ext, quality=82, etag=None):
+        url = reverse('avatar-rendition', kwargs={'digest': self.digest, 'size': 48, 'quality': quality, 'ext': ext})
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        with self.settings(AVATAR_RENDITIONS={'SIZES': [48]}):
+            return self.client.get(url, **headers)
+
+    def test_etag_varies_with_format(self):
+        webp = self.fetch('webp')
+        jpeg = self.fetch('jpg')
+        self.assertEqual((webp.status_code, jpeg.status_code), (200, 200))
+        self.assertNotEqual(webp['ETag'], jpeg['ETag'])
+
+    def test_quality_changes_render_new_files_under_new_urls(self):
+        self.assertEqual(self.fetch('webp', quality=60).status_code, 404)
+        with self.settings(AVATAR_RENDITIONS={'SIZES': [48], 'FORMAT': 'WEBP', 'QUALITY': 60}):
+            render_avatar(self.source)
+            self.assertTrue(rendition_urls(self.digest)['48'].endswith('/48-q60.webp'))
+
+        old, new = self.fetch('webp'), self.fetch('webp', quality=60)
+        self.assertEqual((old.status_code, new.status_code), (200, 200))
+        self.assertNotEqual(old['ETag'], new['ETag'])
+        self.assertNotEqual(b''.join(old.streaming_content), b''.join(new.streaming_content))
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.fetch('webp')['ETag']
+        self.assertEqual(self.fetch('webp', etag=etag).status_code, 304)
+        self.assertEqual(self.fetch('jpg', etag=etag).status_code, 200)
+
+
+class SeedingTests(TestCase):
+    def test_prefixes_that_share_a_start_are_kept_apart(self):
+        generate_dataset(users=6, swaps_per_user=3, notifications_per_user=0, prefix='alpha')
+        counts = generate_dataset(users=4, swaps_per_user=3, notifications_per_user=0, prefix='alphabet')
+        self.assertEqual(counts['users'], 4)
+        self.assertEqual(User.objects.filter(username__regex=r'^alpha[0-9]+$').count(), 6)
+        for user in User.objects.filter(username__startswith='alpha'):
+            self.assertEqual(user.total_ratings, user.ratings_received.count())
+
+    def test_reseeding_a_prefix_fails_before_writing(self):
+        generate_dataset(users=3, notifications_per_user=0, prefix='again')
+        users = User.objects.count()
+        with self.assertRaisesMessage(ValueError, "'again'"):
+            generate_dataset(users=5, notifications_per_user=0, prefix='again')
+        self.assertEqual(User.objects.count(), users)
+
+    def test_events_waiting_in_the_log_are_still_handled(self):
+        alice = User.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        bob = User.objects.create_user(username='bob', email='bob@example.com', password='pw')
+        record(Event.Type.USER_VISIBILITY_CHANGED, alice.id, actor_id=alice.id, is_public=False)
+        record(
+            Event.Type.SWAP_STATUS_CHANGED, 10 ** 6, actor_id=bob.id,
+            status='completed', from_user_id=alice.id, to_user_id=bob.id
+        )
+        generate_dataset(users=8, swaps_per_user=3, notifications_per_user=0, prefix='live')
+        seeded = dict(User.objects.filter(username__startswith='live').values_list('id', 'total_completed_swaps'))
+
+        for name in ['notifications', 'users.counters']:
+            while consume(name):
+                pass
+        self.assertEqual(list(Notification.objects.values_list('user__username', flat=True)), ['alice'])
+        self.assertEqual(User.objects.get(pk=bob.pk).total_completed_swaps, 1)
+        self.assertEqual(
+            dict(User.objects.filter(username__startswith='live').values_list('id', 'total_completed_swaps')), seeded
+        )
+
+
+class UserFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        python, guitar = Skill.objects.create(name='Python'), Skill.objects.create(name='Guitar')
+        for name, availability, skills in [
+            ('ann', 'weekends', [python]),
+            ('bob', 'weekends', [python, guitar]),
+            ('cy', 'evenings', [guitar]),
+            ('dee', 'evenings', [python]),
+        ]:
+            user = User.objects.create_user(
+                username=name, email=f"{name}@example.com", password='pw', availability=availability
+            )
+            for skill in skills:
+                UserSkill.objects.create(user=user, skill=skill, skill_type=UserSkill.SkillType.OFFERED)
+
+    def get(self, **params):
+        return self.client.get(reverse('user-list'), params)
+
+    def test_each_facet_ignores_its_own_filter(self):
+        response = self.get(availability='weekends', offers='python')
+        self.assertEqual(sorted(user['username'] for user in response.data['results']), ['ann', 'bob'])
+        facets = response.data['facets']
+        # Python offerers by availability, weekend users by offered skill
+        self.assertEqual(facets['availability']['weekends'], 2)
+        self.assertEqual(facets['availability']['evenings'], 1)
+        self.assertEqual({skill['name']: skill['count'] for skill in facets['offers']}, {'Python': 2, 'Guitar': 1})
+
+    def test_min_rating_must_be_finite(self):
+        for value in ['nan', 'inf', '-Infinity']:
+            self.assertEqual(self.get(min_rating=value).status_code, 400)
+        self.assertEqual(self.get(min_rating='4.5').status_code, 200)
+
+
+class MatchesNearTests(TestCase):
+    def setUp(self):
+        self.python, self.guitar = Skill.objects.create(name='Python'), Skill.objects.create(name='Guitar')
+        self.me = self.make_user('me', 'Pune', offers=self.python, wants=self.guitar)
+        for name, location in [('delhi', 'Delhi'), ('mumbai', 'Mumbai'), ('pune', 'Pune')]:
+            self.make_user(name, location, offers=self.guitar, wants=self.python)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.me).access_token}")
+
+    def make_user(self, name, location, offers, wants):
+        user = User.objects.create_user(
+            username=name, email=f"{name}@example.com", password='pw', location=location
+        )
+        UserSkill.objects.create(user=user, skill=offers, skill_type=UserSkill.SkillType.OFFERED)
+        UserSkill.objects.create(user=user, skill=wants, skill_type=UserSkill.SkillType.WANTED)
+        return user
+
+    def matches(self, **params):
+        return self.client.get(reverse('user-matches'), params)
+
+    def test_near_keeps_matches_within_the_radius_nearest_first(self):
+        self.assertEqual(len(self.matches().data['results']), 3)
+        response = self.matches(near='Pune', radius_km=200)
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual([user['username'] for user in results], ['pune', 'mumbai'])
+        self.assertLess(results[0]['distance_km'], results[1]['distance_km'])
+
+    def test_unknown_places_and_bad_radii_are_rejected(self):
+        self.assertEqual(self.matches(near='Atlantis').status_code, 400)
+        self.assertEqual(self.matches(near='Pune', radius_km='-5').status_code, 400)
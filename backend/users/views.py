@@ -1,19 +1,31 @@
-from rest_framework import generics, permissions, status, viewsets
+from rest_framework import generics, permissions, status, viewsets, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
 from django.db.utils import IntegrityError
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.core.cache import cache
 import logging
+import re
 from .serializers import (
     UserSerializer, UserPublicSerializer, RegisterSerializer,
-    UserLoginSerializer, UserUpdateSerializer, AdminUserSerializer
+    UserLoginSerializer, UserUpdateSerializer, AdminUserSerializer,
+    AvatarUploadSerializer, profile_prefetches
 )
-from .models import Badge, UserBadge
 from skills.models import Skill, UserSkill
+from skills.taxonomy import ancestor_ids, descendant_ids
+from jobs.queue import enqueue
+from events.log import record
+from events.models import Event
+from .avatars import get_setting as avatar_setting, rendition_etag, rendition_path, EXTENSIONS
+from .geo import filter_near, near_params
+from .facets import apply_filters, compute_facets, facet_cache_key, parse_filters
 from .permissions import IsAdminUser, IsOwnerOrAdmin
 from swaps.serializers import SwapRequestDetailSerializer
 
@@ -27,24 +39,18 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [permissions.AllowAny]
     serializer_class = RegisterSerializer
+    throttle_scope = 'auth.register'
     
     def create(self, request, *args, **kwargs):
         try:
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
             
-            # Create user with skills (handled in serializer)
-            user = serializer.save()
-            
-            # Create First Swap badge for new user
-            first_badge, _ = Badge.objects.get_or_create(
-                name="New Member",
-                defaults={
-                    "description": "Welcome to the skill swap community!",
-                    "icon": "🆕"
-                }
-            )
-            UserBadge.objects.create(user=user, badge=first_badge)
+            # Create user with skills (handled in serializer); the New Member
+            # badge is awarded from the event log
+            with transaction.atomic():
+                user = serializer.save()
+                record(Event.Type.USER_REGISTERED, user.id, actor_id=user.id)
             
             # Generate JWT tokens
             refresh = RefreshToken.for_user(user)
@@ -91,6 +97,8 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     """
     Custom JWT token view that returns user details with token
     """
+    throttle_scope = 'auth.login'
+    
     def post(self, request, *args, **kwargs):
         try:
             # Handle both username and email login
@@ -153,12 +161,21 @@ class CustomTokenObtainPairView(TokenObtainPairView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+def _count_subquery(grouped):
+    """Correlated row count of a queryset narrowed to one user and grouped with ``values(<fk>)``"""
+    return Coalesce(models.Subquery(grouped.annotate(total=models.Count('id')).values('total')), 0)
+
 class UserViewSet(viewsets.ModelViewSet):
     """
     User management and profile endpoints
     """
     queryset = User.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['reputation', 'rating', 'joined_at']
+    near = None
+    facet_filters = None
+    facet_cache_timeout = 60
     
     def get_serializer_class(self):
         if self.action == 'list' or self.action == 'retrieve':
@@ -181,9 +198,48 @@ class UserViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         if self.action == 'list':
-            # For public listing, only return public profiles, ordered by id to fix pagination
-            return User.objects.filter(is_public=True, is_active=True).exclude(role='admin').order_by('id')
-        return User.objects.all().order_by('id')
+            queryset = apply_filters(self.public_queryset(), self.facet_filters or {})
+        else:
+            queryset = User.objects.all().order_by('id')
+        if self.action in ['list', 'retrieve']:
+            queryset = queryset.prefetch_related(*profile_prefetches())
+        if self.action == 'list' and self.near:
+            # Nearest first unless ?ordering= is given
+            queryset = queryset.order_by('distance_km', 'id')
+        return queryset
+    
+    def public_queryset(self):
+        """Public profiles, within ?near= if given, before the facet filters"""
+        # Ordered by id to fix pagination
+        queryset = User.objects.filter(is_public=True, is_active=True).exclude(role='admin').order_by('id')
+        if self.near:
+            queryset = filter_near(queryset, *self.near)
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        """
+        List public profiles filtered by availability, offers, wants, min_rating,
+        location and ?near=, with facet counts for the filtered result set
+        """
+        try:
+            self.near = near_params(request.query_params)
+            self.facet_filters = parse_filters(request.query_params)
+        except ValidationError as e:
+            return Response({"error": e.message}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = super().list(request, *args, **kwargs)
+        if isinstance(response.data, dict):
+            response.data['facets'] = self.get_facets()
+        return response
+    
+    def get_facets(self):
+        """Facet counts for the current filters, cached across pages and orderings"""
+        cache_key = facet_cache_key({**self.facet_filters, 'near': self.near})
+        facets = cache.get(cache_key)
+        if facets is None:
+            facets = compute_facets(self.public_queryset(), self.facet_filters)
+            cache.set(cache_key, facets, self.facet_cache_timeout)
+        return facets
     
     @action(detail=False, methods=['get'], url_path='me')
     def me(self, request):
@@ -259,22 +315,48 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def upload_avatar(self, request):
+        """Upload a new avatar image; thumbnails are rendered in the background"""
+        try:
+            serializer = AvatarUploadSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            
+            user = request.user
+            user.avatar = serializer.validated_data['avatar']
+            user.avatar_hash = ''
+            with transaction.atomic():
+                user.save(update_fields=['avatar', 'avatar_hash'])
+                enqueue('users.process_avatar', user_id=user.id)
+            
+            logger.info(f"Avatar uploaded: {user.username}")
+            return Response(UserSerializer(user, context={'request': request}).data)
+        except Exception as e:
+            logger.error(f"Avatar upload failed: {e}")
+            return Response(
+                {"error": "Failed to upload avatar. Please try again."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
     @action(detail=False, methods=['get'])
     def my_requests(self, request):
         """Get current user's swap requests"""
         try:
             from swaps.models import SwapRequest
-            from swaps.serializers import SwapRequestSerializer
+            from swaps.serializers import SwapRequestListSerializer
             
             if not request.user.is_authenticated:
                 return Response({"error": "Authentication required"}, status=status.HTTP_401_UNAUTHORIZED)
                 
-            # Get swap requests where user is either requester or provider
-            requests = SwapRequest.objects.filter(
-                models.Q(requester=request.user) | models.Q(provider=request.user)
+            # Get swap requests where user is either sender or recipient
+            requests = SwapRequest.objects.select_related(
+                'from_user', 'to_user', 'skill_offered', 'skill_wanted'
+            ).filter(
+                models.Q(from_user=request.user) | models.Q(to_user=request.user)
             ).order_by('-created_at')
             
-            serializer = SwapRequestSerializer(requests, many=True)
+            serializer = SwapRequestListSerializer(requests, many=True, context={'request': request})
             return Response(serializer.data)
         except Exception as e:
             logger.error(f"Failed to get user requests: {e}")
@@ -283,26 +365,74 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=False, methods=['get'])
+    def matches(self, request):
+        """
+        Users who offer something the current user wants and want something
+        they offer, counting sub-skills: wanting "Web Development" matches an
+        offer of React. ?mutual=false drops the second condition; ?near= and
+        radius_km keep those within reach, nearest first.
+        """
+        try:
+            near = near_params(request.query_params)
+            mine = UserSkill.objects.filter(user=request.user)
+            offers_wanted = UserSkill.objects.filter(
+                user=models.OuterRef('pk'), skill_type=UserSkill.SkillType.OFFERED,
+                skill_id__in=descendant_ids(mine.filter(skill_type=UserSkill.SkillType.WANTED).values('skill_id'))
+            )
+            users = User.objects.filter(is_public=True, is_active=True).exclude(role='admin').exclude(
+                pk=request.user.pk
+            ).filter(models.Exists(offers_wanted))
+            if request.query_params.get('mutual', '').lower() not in ['0', 'false', 'no']:
+                wants_offered = UserSkill.objects.filter(
+                    user=models.OuterRef('pk'), skill_type=UserSkill.SkillType.WANTED,
+                    skill_id__in=ancestor_ids(mine.filter(skill_type=UserSkill.SkillType.OFFERED).values('skill_id'))
+                )
+                users = users.filter(models.Exists(wants_offered))
+            users = users.order_by('-reputation', 'id').prefetch_related(*profile_prefetches())
+            if near:
+                users = filter_near(users, *near).order_by('distance_km', '-reputation', 'id')
+            
+            page = self.paginate_queryset(users)
+            serializer = UserPublicSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        except ValidationError as e:
+            return Response({"error": e.message}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"User matching failed: {e}")
+            return Response(
+                {"error": "Failed to load matches. Please try again."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Search users by skills, name, or location"""
+        """Search users by skills, name, or location, optionally near a place"""
         try:
             query = request.query_params.get('q', '')
-            if not query:
+            near = near_params(request.query_params)
+            if not query and not near:
                 return Response([])
                 
             users = User.objects.filter(
-                models.Q(first_name__icontains=query) |
-                models.Q(last_name__icontains=query) |
-                models.Q(username__icontains=query) |
-                models.Q(bio__icontains=query) |
-                models.Q(location__icontains=query),
                 is_public=True,
                 is_active=True
-            ).exclude(role='admin')
+            ).exclude(role='admin').order_by('-reputation', 'id').prefetch_related(*profile_prefetches())
+            if query:
+                users = users.filter(
+                    models.Q(first_name__icontains=query) |
+                    models.Q(last_name__icontains=query) |
+                    models.Q(username__icontains=query) |
+                    models.Q(bio__icontains=query) |
+                    models.Q(location__icontains=query)
+                )
+            if near:
+                users = filter_near(users, *near).order_by('distance_km', '-reputation', 'id')
             
             serializer = UserPublicSerializer(users, many=True)
             return Response(serializer.data)
+        except ValidationError as e:
+            return Response({"error": e.message}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"User search failed: {e}")
             return Response(
@@ -350,13 +480,12 @@ class UserViewSet(viewsets.ModelViewSet):
             
             # Get all skills with user counts
             all_skills = []
-            for skill in Skill.objects.all():
-                user_count = UserSkill.objects.filter(skill=skill).count()
+            for skill in Skill.objects.annotate(user_count=models.Count('userskill')).order_by('id'):
                 all_skills.append({
                     'id': skill.id,
                     'name': skill.name,
                     'category': getattr(skill, 'category', 'General'),
-                    'user_count': user_count
+                    'user_count': skill.user_count
                 })
             
             # Get rating statistics
@@ -364,14 +493,20 @@ class UserViewSet(viewsets.ModelViewSet):
             avg_rating = Rating.objects.aggregate(avg=models.Avg('score'))['avg'] or 0
             
             # Get recent activity
-            recent_users = User.objects.filter(is_active=True).order_by('-joined_at')[:10]
-            recent_swaps = SwapRequest.objects.order_by('-created_at')[:10]
+            recent_users = User.objects.filter(is_active=True).order_by('-joined_at').prefetch_related(
+                *profile_prefetches()
+            )[:10]
+            recent_swaps = SwapRequest.objects.select_related(
+                'from_user', 'to_user', 'skill_offered', 'skill_wanted'
+            ).prefetch_related(
+                *profile_prefetches('from_user__'), *profile_prefetches('to_user__')
+            ).order_by('-created_at')[:10]
             
             # Get users with most swaps
             top_users = User.objects.annotate(
                 swap_count=models.Count('sent_requests', distinct=True) + 
                           models.Count('received_requests', distinct=True)
-            ).filter(is_active=True).order_by('-swap_count')[:5]
+            ).filter(is_active=True).order_by('-swap_count').prefetch_related(*profile_prefetches())[:5]
             
             dashboard_data = {
                 'statistics': {
@@ -420,38 +555,38 @@ class UserViewSet(viewsets.ModelViewSet):
     def admin_users_detailed(self, request):
         """Get detailed user data for admin management"""
         try:
-            users = User.objects.all().order_by('-joined_at')
+            from swaps.models import SwapRequest
+            from ratings.models import Rating
+            
+            user_ref = models.OuterRef('pk')
+            sent = SwapRequest.objects.filter(from_user=user_ref).order_by().values('from_user')
+            received = SwapRequest.objects.filter(to_user=user_ref).order_by().values('to_user')
+            ratings = Rating.objects.filter(to_user=user_ref).order_by().values('to_user')
+            completed = SwapRequest.Status.COMPLETED
+            users = User.objects.annotate(
+                sent_count=_count_subquery(sent),
+                received_count=_count_subquery(received),
+                completed_count=(
+                    _count_subquery(sent.filter(status=completed)) + _count_subquery(received.filter(status=completed))
+                ),
+                ratings_count=_count_subquery(ratings),
+                avg_received=models.Subquery(ratings.annotate(avg=models.Avg('score')).values('avg')),
+            ).order_by('-joined_at').prefetch_related(*profile_prefetches())
             
             # Include related data
             user_data = []
-            from swaps.models import SwapRequest
             for user in users:
                 user_info = UserSerializer(user).data
-                
-                # Add swap statistics
-                sent_swaps = SwapRequest.objects.filter(from_user=user).count()
-                received_swaps = SwapRequest.objects.filter(to_user=user).count()
-                completed_swaps = SwapRequest.objects.filter(
-                    (models.Q(from_user=user) | models.Q(to_user=user)),
-                    status='completed'
-                ).count()
-                
-                # Add rating statistics
-                from ratings.models import Rating
-                user_ratings = Rating.objects.filter(to_user=user)
-                avg_rating = user_ratings.aggregate(avg=models.Avg('score'))['avg'] or 0
-                total_ratings = user_ratings.count()
-                
                 user_info.update({
                     'swap_stats': {
-                        'sent': sent_swaps,
-                        'received': received_swaps,
-                        'completed': completed_swaps,
-                        'total': sent_swaps + received_swaps
+                        'sent': user.sent_count,
+                        'received': user.received_count,
+                        'completed': user.completed_count,
+                        'total': user.sent_count + user.received_count
                     },
                     'rating_stats': {
-                        'average': round(avg_rating, 2),
-                        'total': total_ratings
+                        'average': round(user.avg_received or 0, 2),
+                        'total': user.ratings_count
                     }
                 })
                 
@@ -475,28 +610,19 @@ class UserViewSet(viewsets.ModelViewSet):
             
             serializer = AdminUserSerializer(user, data=request.data, partial=True)
             if serializer.is_valid():
-                serializer.save()
-                
-                # Send notification if visibility changed
-                if 'is_public' in request.data and old_is_public != user.is_public:
-                    from notifications.models import Notification
-                    Notification.objects.create(
-                        user=user,
-                        title="Profile Visibility Updated",
-                        message=f"Your profile is now {'public' if user.is_public else 'private'}.",
-                        notification_type="admin_update"
-                    )
-                
-                # Send notification if active status changed
-                if 'is_active' in request.data and old_is_active != user.is_active:
-                    from notifications.models import Notification
-                    status = "activated" if user.is_active else "deactivated"
-                    Notification.objects.create(
-                        user=user,
-                        title="Account Status Updated",
-                        message=f"Your account has been {status} by an administrator.",
-                        notification_type="admin_update"
-                    )
+                # The user is notified of visibility and account status changes from the event log
+                with transaction.atomic():
+                    serializer.save()
+                    if old_is_public != user.is_public:
+                        record(
+                            Event.Type.USER_VISIBILITY_CHANGED, user.id,
+                            actor_id=request.user.id, is_public=user.is_public
+                        )
+                    if old_is_active != user.is_active:
+                        record(
+                            Event.Type.USER_ACTIVATED if user.is_active else Event.Type.USER_DEACTIVATED,
+                            user.id, actor_id=request.user.id
+                        )
                 
                 logger.info(f"Admin updated user: {user.username}")
                 return Response(serializer.data)
@@ -535,9 +661,13 @@ class UserViewSet(viewsets.ModelViewSet):
         """Ban user from platform"""
         try:
             user = self.get_object()
+            was_active = user.is_active
             user.is_active = False
             user.is_public = False
-            user.save()
+            with transaction.atomic():
+                user.save()
+                if was_active != user.is_active:
+                    record(Event.Type.USER_DEACTIVATED, user.id, actor_id=request.user.id)
             
             logger.info(f"Admin banned user: {user.username}")
             
@@ -557,9 +687,13 @@ class UserViewSet(viewsets.ModelViewSet):
         """Unban user from platform"""
         try:
             user = self.get_object()
+            was_active = user.is_active
             user.is_active = True
             user.is_public = True
-            user.save()
+            with transaction.atomic():
+                user.save()
+                if was_active != user.is_active:
+                    record(Event.Type.USER_ACTIVATED, user.id, actor_id=request.user.id)
             
             logger.info(f"Admin unbanned user: {user.username}")
             
@@ -573,3 +707,50 @@ class UserViewSet(viewsets.ModelViewSet):
                 {"error": "Failed to unban user. Please try again."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def avatar_rendition(request, digest, size, quality, ext):
+    """
+    Serve an avatar rendition.
+
+    Rendition paths are content-addressed, so responses are cached as
+    immutable for a year. Single byte ranges are honoured.
+    """
+    if (not re.fullmatch(r'[0-9a-f]{64}', digest) or size not in avatar_setting('SIZES')
+            or not 1 <= quality <= 100 or ext not in EXTENSIONS.values()):
+        raise Http404
+    path = rendition_path(digest, size, quality, ext)
+    if not path.is_file():
+        raise Http404
+    
+    headers = {
+        'Cache-Control': 'public, max-age=31536000, immutable',
+        'ETag': rendition_etag(digest, size, quality, ext),
+        'Accept-Ranges': 'bytes',
+    }
+    if request.META.get('HTTP_IF_NONE_MATCH') == headers['ETag']:
+        return HttpResponseNotModified(headers=headers)
+    
+    content_type = 'image/webp' if ext == 'webp' else 'image/jpeg'
+    file_size = path.stat().st_size
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', ''))
+    if not match or match.groups() == ('', ''):
+        return FileResponse(path.open('rb'), content_type=content_type, headers=headers)
+    
+    start, end = match.groups()
+    if start:
+        start, end = int(start), min(int(end) if end else file_size - 1, file_size - 1)
+    else:
+        # Suffix range: the last N bytes
+        start, end = max(file_size - int(end), 0), file_size - 1
+    if start > end:
+        return HttpResponse(status=416, headers={**headers, 'Content-Range': f'bytes */{file_size}'})
+    
+    with path.open('rb') as rendition:
+        rendition.seek(start)
+        content = rendition.read(end - start + 1)
+    return HttpResponse(content, status=206, content_type=content_type, headers={
+        **headers, 'Content-Range': f'bytes {start}-{end}/{file_size}'
+    })